@@ -1,598 +1,620 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi import FastAPI, HTTPException, Header, Query, Request
+from fastapi.responses import JSONResponse, RedirectResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
-import time
-import tempfile
-import requests
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Deque, List, Literal, Optional, Tuple
+from collections import deque
+from contextlib import asynccontextmanager
+from urllib.parse import quote, urlencode
+import asyncio
+import hashlib
+import json
+import logging
 import os
-from urllib.parse import urlencode
-app = FastAPI(title="DBLP BibTeX Fetcher")
-
-HTTP_PROXY = os.environ.get('HTTP_PROXY', '') # 例如: 'http://127.0.0.1:7890'
-HTTPS_PROXY = os.environ.get('HTTPS_PROXY', '') # 例如: 'https://127.0.0.1:7890'
-PROXIES = None
-if HTTP_PROXY or HTTPS_PROXY:
-    PROXIES = {}
-    if HTTP_PROXY:
-        PROXIES['http'] = HTTP_PROXY
-    if HTTPS_PROXY:
-        PROXIES['https'] = HTTPS_PROXY
+import secrets
+import time
+from assets import INDEX, Asset, StaticAssets
+from compression import CompressionMiddleware, negotiate
+from engine import (
+    DBLP_PAGE_MAX_SIZE, DBLP_PROBE_TIMEOUT, DBLP_RESULTSET_TTL, SEARCHES_INFLIGHT, SEARCH_FAILURES,
+    SEARCH_SECONDS, BatchPlan, aclose, bib_resolver, cache, crossref_key, crossref_parents, decode_cursor,
+    encode_cursor, error_kind, fetch_bibtex_by_key, format_paper, fuzzy_index, is_dblp_key, memory_cache,
+    mirror_pool, next_cursor, offline_index, paper_from_hit, prefetch_page, prober, rate_limiter, refresh_offline_index,
+    search_batch, search_hits, search_keyword, search_page, warm_fuzzy_index,
+)
+from results import ResultStore, gzip_stream, iter_bibtex
+from jobs import JobManager
+from metrics import CONTENT_TYPE, REGISTRY, SIZE_BUCKETS, Histogram
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    refresher = asyncio.create_task(refresh_offline_index()) if offline_index is not None else None
+    warmup = asyncio.create_task(asyncio.to_thread(warm_fuzzy_index))
+    probing = asyncio.create_task(prober.run()) if offline_index is None else None
+    janitor = asyncio.create_task(_purge_result_sets())
+    job_manager.start()
+    yield
+    await job_manager.stop()
+    job_manager.close()
+    if refresher is not None:
+        refresher.cancel()
+    warmup.cancel()
+    if probing is not None:
+        probing.cancel()
+    janitor.cancel()
+    await aclose()
+
+def json_bytes(content) -> bytes:
+    """序列化为紧凑的 UTF-8 JSON；安装了 orjson 时使用它，大批量结果的序列化快数倍。"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+class FastJSONResponse(JSONResponse):
+    """接口直接返回它时跳过 FastAPI 的 jsonable_encoder，内容须为 dict/list/str 等 JSON 原生类型。"""
+    def render(self, content) -> bytes:
+        return json_bytes(content)
+
+app = FastAPI(title="DBLP BibTeX Fetcher", lifespan=lifespan, default_response_class=FastJSONResponse)
+# 按 Accept-Encoding 以 br / gzip 压缩文本类响应（见 compression.py）
+app.add_middleware(CompressionMiddleware)
+
+# 网页界面的静态资源，启动时载入内存并预压缩
+static_assets = StaticAssets(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static'))
+
+# 管理接口（/api/admin/*）的访问令牌；未设置时管理接口一律拒绝
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+
+# 搜索结果集保存在服务端，下载时只需提交结果集 ID
+result_store = ResultStore(cache, DBLP_RESULTSET_TTL)
+
+# 下载时同时获取 BibTeX 的条目数上限；条目按原顺序写出，每个条目就绪即发送
+DBLP_DOWNLOAD_CONCURRENCY = int(os.environ.get('DBLP_DOWNLOAD_CONCURRENCY', '16'))
+
+# 批处理任务：状态持久化，重启后继续处理未完成的条目
+DBLP_JOBS_PATH = os.environ.get('DBLP_JOBS_PATH', 'dblp_jobs.sqlite3')
+DBLP_JOB_WORKERS = int(os.environ.get('DBLP_JOB_WORKERS', '4'))
+
+# HTTP 缓存：GET 形式的搜索、翻页与 BibTeX 接口带 ETag 与 Cache-Control，可由浏览器、反向代理或 CDN 缓存
+DBLP_HTTP_MAX_AGE = int(os.environ.get('DBLP_HTTP_MAX_AGE', '3600'))
+DBLP_HTTP_BIB_MAX_AGE = int(os.environ.get('DBLP_HTTP_BIB_MAX_AGE', '86400'))
+
+# 抓取流水线的指标定义在 engine.py，这里只记录接口层的批量大小
+BATCH_SIZE = Histogram('dblp_batch_keywords', '单次提交的关键词数', ['endpoint'], buckets=SIZE_BUCKETS)
+
+async def _purge_result_sets():
+    """定期删除过期的结果集；搜索与 BibTeX 的过期条目保留，供上游不可用时回退。"""
+    while True:
+        await asyncio.sleep(min(DBLP_RESULTSET_TTL, 3600))
+        try:
+            await asyncio.to_thread(result_store.purge_expired)
+        except Exception:
+            logger.exception('清理过期结果集失败')
+
+# 与 engine.BIB_STYLES 对应的 DBLP BibTeX 格式
+BibStyle = Literal['condensed', 'standard', 'crossref']
 
 class SearchRequest(BaseModel):
     keywords: List[str]
     max_results: int = 10
+    # 按 DBLP key 去重：多个关键词命中同一记录时只返回（并只获取）一次
+    dedupe: bool = True
+    # 把 CoRR 预印本并入其正式发表版本（需开启 dedupe）
+    merge_corr: bool = False
+    # 为 False 时只返回搜索结果自带的元数据，BibTeX 通过 /api/bibtex 按需获取
+    bibtex: bool = True
+    # crossref 格式的条目只引用会议录记录，下载时每个会议录只附一次
+    style: BibStyle = 'standard'
+
+class BibtexRequest(BaseModel):
+    keys: List[str]
+    style: BibStyle = 'standard'
 
 class BibEntry(BaseModel):
     title: str
     authors: str
     year: Optional[str]
     bibtex: str
+    key: Optional[str] = None
+    crossref: Optional[str] = None
 
-def generate_bibtex_simple(title: str, authors: List[str], year: Optional[str], url: Optional[str]) -> str:
-    import re
-    key_base = re.sub(r'[^a-zA-Z0-9]+', '_', (title or 'entry').lower()).strip('_')
-    key_year = year if year and str(year).isdigit() else 'noyear'
-    key = f"{key_base[:40]}_{key_year}"
-    author_str = ' and '.join([a for a in authors if a]) if authors else 'Unknown'
-    lines = []
-    lines.append(f"@article{{{key},")
-    lines.append(f"  title={{{{ {title} }}}},")
-    lines.append(f"  author={{{{ {author_str} }}}},")
-    if year:
-        lines.append(f"  year={{{{ {year} }}}},")
-    if url:
-        lines.append(f"  url={{{{ {url} }}}},")
-    lines.append("}")
-    return "\n".join(lines)
-
-def _dblp_authors(info_authors) -> List[str]:
-    names = []
-    if isinstance(info_authors, dict) and 'author' in info_authors:
-        authors = info_authors['author']
-        if isinstance(authors, list):
-            for a in authors:
-                t = a.get('text') if isinstance(a, dict) else str(a)
-                if t:
-                    names.append(t)
-        elif isinstance(authors, dict):
-            t = authors.get('text')
-            if t:
-                names.append(t)
-        else:
-            t = str(authors)
-            if t:
-                names.append(t)
-    return names
-
-def _fetch_bibtex_from_info(info: dict) -> Optional[str]:
-    urls = []
-    u = info.get('url')
-    k = info.get('key')
-    if u:
-        urls.append(u + '.bib' if not u.endswith('.bib') else u)
-        urls.append(u + '?view=bibtex')
-    if k:
-        urls.append(f'https://dblp.org/rec/bibtex/{k}.bib')
-        urls.append(f'https://dblp.org/rec/{k}.bib')
-    seen = set()
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    for url in urls:
-        if url in seen:
-            continue
-        seen.add(url)
-        try:
-            r = requests.get(url, timeout=20, proxies=PROXIES, headers=headers, allow_redirects=True)
-            if r.status_code == 200 and r.text.strip().startswith('@'):
-                return r.text
-        except Exception:
-            pass
-    return None
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    # If-None-Match 使用弱比较：忽略 W/ 前缀（反向代理压缩后常把强 ETag 改为弱 ETag）
+    tags = (t.strip() for t in if_none_match.split(','))
+    return etag in (t[2:] if t.startswith('W/') else t for t in tags)
+
+def _cacheable(request: Request, body: dict, max_age: int) -> Response:
+    """返回带强 ETag（正文摘要）与 Cache-Control 的 JSON；客户端已持有相同内容时返回 304。"""
+    response = FastJSONResponse(body)
+    headers = {'ETag': '"' + hashlib.sha256(response.body).hexdigest()[:32] + '"',
+               'Cache-Control': f'public, max-age={max_age}'}
+    if _etag_matches(request.headers.get('If-None-Match'), headers['ETag']):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return response
+
+def _redirect_to_canonical(request: Request, path: str, params: List[Tuple[str, str]]) -> Optional[Response]:
+    """参数不是规范形式时重定向（308）到规范 URL，使等价请求在各级缓存中共用同一条目。"""
+    query = urlencode(params)
+    if request.url.path == path and request.url.query == query:
+        return None
+    url = f'{path}?{query}' if query else path
+    return RedirectResponse(url, status_code=308, headers={'Cache-Control': f'public, max-age={DBLP_HTTP_MAX_AGE}'})
 
-def search_dblp(query: str, num_results: int = 10) -> List[dict]:
-    results = []
+def _has_fallback(results: List[dict]) -> bool:
+    # DBLP 暂时不可用时生成的简易条目，恢复后应重新获取
+    return any(r.get('fallback') for r in results)
+
+async def _keyword_papers(request: SearchRequest, keyword: str) -> Tuple[List[dict], Optional[str]]:
+    """搜索单个关键词，返回 ``(论文列表, 错误类型)``；失败时论文列表为空（日志与指标由 search_keyword 记录）。"""
     try:
-        params = {'q': query, 'h': num_results, 'f': 0, 'format': 'json'}
-        url = 'https://dblp.org/search/publ/api?' + urlencode(params)
-        r = requests.get(url, timeout=30, proxies=PROXIES, headers={'User-Agent': 'Mozilla/5.0'})
-        if r.status_code != 200:
-            return results
-        data = r.json()
-        hits = data.get('result', {}).get('hits', {}).get('hit', [])
-        if isinstance(hits, dict):
-            hits = [hits]
-        for h in hits[:num_results]:
-            info = h.get('info', {})
-            title = info.get('title', 'N/A')
-            authors = _dblp_authors(info.get('authors'))
-            year = str(info.get('year')) if info.get('year') else None
-            bibtex = _fetch_bibtex_from_info(info) or generate_bibtex_simple(title, authors, year, info.get('url'))
-            results.append({'title': title, 'authors': authors, 'year': year, 'bibtex': bibtex})
-    except Exception:
-        pass
-    return results
+        return await search_keyword(keyword, request.max_results, request.bibtex, request.style), None
+    except Exception as e:
+        return [], error_kind(e)
+
+async def _run_search(request: SearchRequest) -> Tuple[List[dict], List[dict]]:
+    if request.dedupe:
+        papers, mapping = await search_batch(request.keywords, request.max_results, request.merge_corr,
+                                             request.bibtex, request.style)
+        all_results = [format_paper(p) for p in papers]
+    else:
+        all_results, mapping = [], []
+        # 关键词并发搜索，节奏由全局限速器控制；gather 保持关键词顺序
+        batches = await asyncio.gather(*(_keyword_papers(request, k) for k in request.keywords))
+        for keyword, (papers, error) in zip(request.keywords, batches):
+            start = len(all_results)
+            all_results.extend(format_paper(p) for p in papers)
+            mapping.append({'keyword': keyword, 'results': list(range(start, len(all_results)))})
+            cursor = next_cursor(keyword, papers, request.max_results)
+            if error:
+                # 与去重路径一致：失败的关键词带 error，而不是表现为“没有结果”
+                mapping[-1]['error'] = error
+            elif cursor is not None:
+                mapping[-1]['next_cursor'] = cursor
+    return all_results, mapping
 
 @app.post("/api/search")
 async def search_papers(request: SearchRequest):
-    all_results = []
-    for i, keyword in enumerate(request.keywords):
-        papers = search_dblp(keyword, request.max_results)
-        for paper in papers:
-            all_results.append({
-                'title': paper.get('title', 'N/A'),
-                'authors': ', '.join(paper.get('authors', [])) if paper.get('authors') else 'N/A',
-                'year': str(paper.get('year', 'N/A')),
-                'bibtex': paper.get('bibtex', '')
-            })
-        if i < len(request.keywords) - 1:
-            time.sleep(1.0)
-    if not all_results:
-        return {"total": 0, "results": []}
-    return {"total": len(all_results), "results": all_results}
+    BATCH_SIZE.labels('search').observe(len(request.keywords))
+    all_results, mapping = await _run_search(request)
+    body = {"total": len(all_results), "results": all_results, "keywords": mapping}
+    if all_results:
+        # 只有元数据的结果集同样保存，下载时由服务端按 key 补齐 BibTeX
+        body["result_set_id"] = await asyncio.to_thread(result_store.create, all_results)
+    return FastJSONResponse(body)
+
+@app.get("/api/search")
+async def search_papers_get(request: Request, q: List[str] = Query([]),
+                            max_results: int = Query(10, ge=1, le=DBLP_PAGE_MAX_SIZE), dedupe: bool = True,
+                            merge_corr: bool = False, bibtex: bool = True, style: BibStyle = 'standard'):
+    """可缓存的搜索：每个关键词一个 q 参数，其余参数同 POST /api/search；不返回 result_set_id"""
+    keywords = [' '.join(k.split()) for k in q if k.strip()]
+    if not keywords:
+        raise HTTPException(status_code=400, detail="需要提供至少一个 q 参数")
+    # 规范形式：关键词按原顺序，其余参数只在不同于默认值时出现，顺序固定
+    params = [('q', k) for k in keywords]
+    if max_results != 10:
+        params.append(('max_results', str(max_results)))
+    for name, value, default in (('dedupe', dedupe, True), ('merge_corr', merge_corr, False),
+                                 ('bibtex', bibtex, True)):
+        if value != default:
+            params.append((name, 'true' if value else 'false'))
+    if style != 'standard':
+        params.append(('style', style))
+    redirect = _redirect_to_canonical(request, '/api/search', params)
+    if redirect is not None:
+        return redirect
+    BATCH_SIZE.labels('search').observe(len(keywords))
+    all_results, mapping = await _run_search(SearchRequest(keywords=keywords, max_results=max_results,
+                                                           dedupe=dedupe, merge_corr=merge_corr, bibtex=bibtex,
+                                                           style=style))
+    body = {"total": len(all_results), "results": all_results, "keywords": mapping}
+    if any('error' in m for m in mapping) or _has_fallback(all_results):
+        # 部分关键词失败、或含本地生成的简易条目的结果不应被缓存
+        return FastJSONResponse(body, headers={'Cache-Control': 'no-store'})
+    return _cacheable(request, body, DBLP_HTTP_MAX_AGE)
+
+async def _stream_search(request: SearchRequest):
+    """逐条产出 NDJSON 事件：每篇论文的 BibTeX 就绪后立即发送。
+
+    事件类型：``progress``（已完成关键词数）、``keyword``（某关键词命中数；去重时附对应记录的 ``keys``）、
+    ``result``（一篇论文，已由其他关键词返回的记录不再重复发送）、``error``（某关键词失败）、
+    ``done``（结束，附总数与结果集 ID）。
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    collected = []
+    total = len(request.keywords)
+    BATCH_SIZE.labels('stream').observe(total)
+    plan = BatchPlan(request.merge_corr) if request.dedupe else None
+
+    async def run(index: int, keyword: str):
+        started = time.perf_counter()
+        SEARCHES_INFLIGHT.inc()
+        try:
+            hits = await search_hits(keyword, request.max_results)
+            if hits is None:
+                raise RuntimeError('DBLP 搜索请求失败')
+            hits = hits[:request.max_results]
+            event = {'type': 'keyword', 'index': index, 'keyword': keyword, 'hits': len(hits)}
+            cursor = next_cursor(keyword, hits, request.max_results)
+            if cursor is not None:
+                # 可能还有更多结果：用 /api/search/page 继续翻页
+                event['next_cursor'] = cursor
+            if plan is not None:
+                # 已被其他关键词领取的记录不再获取，keys 给出本关键词对应的全部记录
+                claimed = plan.add(hits)
+                event['keys'] = list(dict.fromkeys(plan.hits[slot]['info'].get('key') for slot, _ in claimed))
+                hits = [plan.hits[slot] for slot, first in claimed if first]
+                slots = [slot for slot, first in claimed if first]
+            else:
+                slots = [None] * len(hits)
+            await queue.put(event)
+
+            async def emit(hit: dict, slot: Optional[int]):
+                paper = await paper_from_hit(hit, request.bibtex, request.style)
+                if slot is not None and slot in plan.merged:
+                    paper['merged'] = plan.merged[slot]
+                await queue.put({'type': 'result', 'keyword_index': index, **format_paper(paper)})
+
+            await asyncio.gather(*(emit(h, slot) for h, slot in zip(hits, slots)))
+            SEARCH_SECONDS.labels('ok' if hits else 'empty').observe(time.perf_counter() - started)
+        except Exception as e:
+            SEARCH_FAILURES.labels(error_kind(e)).inc()
+            SEARCH_SECONDS.labels('error').observe(time.perf_counter() - started)
+            await queue.put({'type': 'error', 'index': index, 'keyword': keyword,
+                             'detail': str(e) or type(e).__name__})
+        finally:
+            SEARCHES_INFLIGHT.dec()
+            await queue.put(None)
+
+    tasks = [asyncio.create_task(run(i, k)) for i, k in enumerate(request.keywords)]
+    try:
+        done = count = 0
+        yield json_bytes({'type': 'progress', 'done': 0, 'total': total}) + b'\n'
+        while done < total:
+            event = await queue.get()
+            if event is None:
+                done += 1
+                event = {'type': 'progress', 'done': done, 'total': total}
+            elif event['type'] == 'result':
+                count += 1
+                collected.append({k: v for k, v in event.items() if k not in ('type', 'keyword_index')})
+            yield json_bytes(event) + b'\n'
+        done_event = {'type': 'done', 'total': count}
+        if collected:
+            done_event['result_set_id'] = await asyncio.to_thread(result_store.create, collected)
+        yield json_bytes(done_event) + b'\n'
+    finally:
+        # 客户端中途断开时停止剩余的抓取
+        for t in tasks:
+            t.cancel()
+
+@app.post("/api/search/stream")
+async def search_papers_stream(request: SearchRequest):
+    """流式搜索：以 NDJSON 逐条返回结果与进度"""
+    return StreamingResponse(_stream_search(request), media_type='application/x-ndjson')
+
+@app.get("/api/search/page")
+async def search_papers_page(request: Request, q: Optional[str] = None, size: int = Query(10, ge=1, le=DBLP_PAGE_MAX_SIZE),
+                             cursor: Optional[str] = None, bibtex: bool = False, style: BibStyle = 'standard'):
+    """按游标翻页浏览单个关键词的结果：首页传 q（与 size），之后传上一页返回的 next_cursor / prev_cursor"""
+    if cursor:
+        decoded = decode_cursor(cursor)
+        if decoded is None:
+            raise HTTPException(status_code=400, detail="无效的游标")
+        q, offset, size = decoded
+    elif q and q.strip():
+        offset = 0
+    else:
+        raise HTTPException(status_code=400, detail="需要提供 q 或 cursor")
+    try:
+        page = await search_page(q, offset, size)
+    except Exception as e:
+        SEARCH_FAILURES.labels(error_kind(e)).inc()
+        raise HTTPException(status_code=502, detail=f"DBLP 搜索请求失败: {error_kind(e)}")
+    if page is None:
+        raise HTTPException(status_code=502, detail="DBLP 搜索请求失败")
+    papers = await asyncio.gather(*(paper_from_hit(h, bibtex, style) for h in page['hits']))
+    body = {"query": q, "offset": offset, "size": size, "total": page['total'],
+            "results": [format_paper(p) for p in papers]}
+    if offset + size < page['total']:
+        body["next_cursor"] = encode_cursor(q, offset + size, size)
+        # 用户阅读当前页时在后台取好下一页
+        prefetch_page(q, offset + size, size)
+    if offset > 0:
+        body["prev_cursor"] = encode_cursor(q, max(0, offset - size), size)
+    if _has_fallback(body["results"]):
+        return FastJSONResponse(body, headers={'Cache-Control': 'no-store'})
+    return _cacheable(request, body, DBLP_HTTP_MAX_AGE)
+
+@app.get("/api/bibtex/{key:path}")
+async def get_bibtex(request: Request, key: str, style: BibStyle = 'standard'):
+    """按 DBLP 记录 key 获取单条 BibTeX，供只返回元数据的搜索按需加载；crossref 格式另返回被引用的记录 key"""
+    if not is_dblp_key(key):
+        raise HTTPException(status_code=400, detail="无效的 DBLP 记录 key")
+    if key.startswith('DBLP:'):
+        # 规范 URL 不带 DBLP: 前缀
+        params = [('style', style)] if style != 'standard' else []
+        return _redirect_to_canonical(request, '/api/bibtex/' + quote(key[len('DBLP:'):]), params)
+    text = await fetch_bibtex_by_key(key, style)
+    if text is None:
+        raise HTTPException(status_code=404, detail="未能获取该记录的 BibTeX")
+    body = {"key": key, "bibtex": text}
+    if style == 'crossref' and crossref_key(text):
+        body["crossref"] = crossref_key(text)
+    return _cacheable(request, body, DBLP_HTTP_BIB_MAX_AGE)
+
+@app.post("/api/bibtex")
+async def get_bibtex_batch(request: BibtexRequest):
+    """批量获取选中记录的 BibTeX；未能获取的 key 列在 missing 中"""
+    keys = list(dict.fromkeys(k.strip() for k in request.keys if k.strip()))
+    invalid = [k for k in keys if not is_dblp_key(k)]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"无效的 DBLP 记录 key: {invalid[0]}")
+    texts = await asyncio.gather(*(fetch_bibtex_by_key(k, request.style) for k in keys))
+    results = [{"key": k, "bibtex": t} for k, t in zip(keys, texts)]
+    if request.style == 'crossref':
+        for item in results:
+            if item["bibtex"] and crossref_key(item["bibtex"]):
+                item["crossref"] = crossref_key(item["bibtex"])
+    return FastJSONResponse({"results": results, "missing": [k for k, t in zip(keys, texts) if t is None]})
+
+async def _job_worker(keyword: str, max_results: int) -> List[dict]:
+    # 搜索失败时抛出异常，条目记为 error，可通过 /api/jobs/{job_id}/retry 重试
+    return [format_paper(p) for p in await search_keyword(keyword, max_results)]
+
+job_manager = JobManager(DBLP_JOBS_PATH, _job_worker, DBLP_JOB_WORKERS)
+
+@app.post("/api/jobs")
+async def submit_job(request: SearchRequest):
+    """提交批处理任务，立即返回任务 ID；适合上千条标题的参考文献列表"""
+    keywords = [k.strip() for k in request.keywords if k.strip()]
+    if not keywords:
+        raise HTTPException(status_code=400, detail="请输入至少一个关键词或论文标题")
+    BATCH_SIZE.labels('job').observe(len(keywords))
+    job_id = await asyncio.to_thread(job_manager.submit, keywords, request.max_results)
+    return {"job_id": job_id, "total": len(keywords)}
+
+@app.get("/api/jobs/{job_id}")
+async def job_status(job_id: str):
+    """任务进度：各状态条目数与已获取的论文数"""
+    status = await asyncio.to_thread(job_manager.status, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return status
+
+@app.get("/api/jobs/{job_id}/results")
+async def job_results(job_id: str, offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000)):
+    """分页返回已完成条目的结果，任务未结束时即为部分结果"""
+    if await asyncio.to_thread(job_manager.status, job_id) is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    items = await asyncio.to_thread(job_manager.results, job_id, offset, limit)
+    return FastJSONResponse({"offset": offset, "items": items,
+                             "next_offset": offset + len(items) if len(items) == limit else None})
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """取消任务：尚未处理的条目不再处理，已完成的结果保留"""
+    if await asyncio.to_thread(job_manager.status, job_id) is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return {"cancelled": await asyncio.to_thread(job_manager.cancel, job_id)}
+
+@app.post("/api/jobs/{job_id}/retry")
+async def retry_job(job_id: str):
+    """把失败的条目重新排队，返回重新排队的条目数；已取消的任务不能重试"""
+    if await asyncio.to_thread(job_manager.status, job_id) is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return {"retried": await asyncio.to_thread(job_manager.retry, job_id)}
+
+async def _iter_job_entries(job_id: str, page: int = 200) -> AsyncIterator[List[dict]]:
+    offset = 0
+    while True:
+        items = await asyncio.to_thread(job_manager.results, job_id, offset, page)
+        yield [entry for item in items for entry in item['results']]
+        if len(items) < page:
+            return
+        offset += page
+
+@app.get("/api/jobs/{job_id}/download")
+async def download_job(job_id: str, compress: bool = False):
+    """流式下载任务中已获取的全部 BibTeX"""
+    if await asyncio.to_thread(job_manager.status, job_id) is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return _bib_response(_iter_job_entries(job_id), compress)
 
 @app.get("/api/check-dblp")
 async def check_dblp():
+    """返回后台探测得到的可达状态、滚动延迟、熔断器状态与各镜像的健康度（按当前尝试顺序），不发起实时请求"""
+    if offline_index is not None:
+        return {"reachable": await asyncio.to_thread(offline_index.ready), "offline": True}
+    await prober.wait_ready(DBLP_PROBE_TIMEOUT)
+    return {**prober.snapshot(), "mirrors": mirror_pool.stats()}
+
+def _check_admin(token: Optional[str]):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="未设置 ADMIN_TOKEN，管理接口已禁用")
+    if token is None or not secrets.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="管理接口需要有效的 X-Admin-Token")
+
+@app.get("/api/admin/cache")
+async def cache_stats(x_admin_token: Optional[str] = Header(None)):
+    """缓存统计：各命名空间的条目数、大小、命中/未命中次数"""
+    _check_admin(x_admin_token)
+    if cache is None:
+        return {"enabled": False, "memory": memory_cache.stats(), "fuzzy": fuzzy_index.stats()}
+    return {"enabled": True, **await asyncio.to_thread(cache.stats), "memory": memory_cache.stats(), "fuzzy": fuzzy_index.stats()}
+
+@app.delete("/api/admin/cache")
+async def cache_purge(namespace: Optional[str] = None, expired_only: bool = False,
+                      x_admin_token: Optional[str] = Header(None)):
+    """清空缓存；可只清理某个命名空间或只清理过期条目"""
+    _check_admin(x_admin_token)
+    if not expired_only:
+        memory_cache.clear()
+    if cache is None:
+        return {"enabled": False, "purged": 0}
+    return {"enabled": True, "purged": await asyncio.to_thread(cache.purge, namespace, expired_only)}
+
+@app.get("/api/admin/ratelimit")
+async def ratelimit_stats(x_admin_token: Optional[str] = Header(None)):
+    """全局限速器状态：当前速率、排队请求数、被限流次数"""
+    _check_admin(x_admin_token)
+    return rate_limiter.stats()
+
+@app.get("/api/admin/resolver")
+async def resolver_stats(x_admin_token: Optional[str] = Header(None)):
+    """各 BibTeX URL 形式的成功率、延迟以及对冲次数"""
+    _check_admin(x_admin_token)
+    return bib_resolver.stats()
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus 文本格式的指标：各阶段延迟、状态码、错误、进行中请求与缓存命中"""
+    # 部分指标在抓取时读取磁盘缓存或 Redis 的统计，放到线程中执行
+    return Response(await asyncio.to_thread(REGISTRY.render), media_type=CONTENT_TYPE)
+
+def _bib_response(batches: AsyncIterable[List[dict]], compress: bool,
+                  tail: Optional[Callable[[], Awaitable[List[str]]]] = None) -> StreamingResponse:
+    chunks = iter_bibtex(batches, tail)
+    if compress:
+        return StreamingResponse(gzip_stream(chunks), media_type='application/gzip',
+                                 headers={'Content-Disposition': 'attachment; filename="references.bib.gz"'})
+    return StreamingResponse(chunks, media_type='application/x-bibtex',
+                             headers={'Content-Disposition': 'attachment; filename="references.bib"'})
+
+async def _with_bibtex(entries: List[dict], style: str, written: List[dict], missing: List[str]) -> AsyncIterator[List[dict]]:
+    """按原顺序分批产出带 BibTeX 的条目：只有元数据的条目按 key 获取 BibTeX，最多 DBLP_DOWNLOAD_CONCURRENCY
+    个同时进行；最前面的条目就绪即产出一批，批内为此时已就绪的连续条目（压缩时每批刷新一次）。
+    产出的条目追加到 ``written``，未能获取的条目 key 追加到 ``missing``。
+    """
+    async def resolve(entry: dict) -> dict:
+        return {**entry, 'bibtex': await fetch_bibtex_by_key(entry['key'], style)}
+
+    loop = asyncio.get_running_loop()
+    window: Deque[asyncio.Future] = deque()
+    pending = iter(entries)
+
+    def fill():
+        while len(window) < DBLP_DOWNLOAD_CONCURRENCY:
+            entry = next(pending, None)
+            if entry is None:
+                return
+            if entry.get('bibtex') or not entry.get('key'):
+                # 已有 BibTeX 的条目无需获取，与相邻的已就绪条目合为一批写出
+                future = loop.create_future()
+                future.set_result(entry)
+                window.append(future)
+            else:
+                window.append(asyncio.create_task(resolve(entry)))
+
     try:
-        r = requests.get('https://dblp.org/search/publ/api?q=test&h=1&format=json', timeout=10, proxies=PROXIES)
-        ok = r.status_code == 200
-        return {"reachable": ok}
-    except Exception:
-        return {"reachable": False}
+        fill()
+        while window:
+            await window[0]
+            batch = []
+            while window and window[0].done():
+                entry = window.popleft().result()
+                fill()
+                if entry.get('bibtex'):
+                    batch.append(entry)
+                else:
+                    missing.append(entry.get('key') or '')
+            written.extend(batch)
+            if batch:
+                yield batch
+    finally:
+        # 客户端中途断开时停止剩余的获取
+        for task in window:
+            task.cancel()
 
-@app.post("/api/download")
-async def download_bibtex(results: List[BibEntry]):
-    """下载所有BibTeX为一个文件"""
-    bibtex_content = "\n\n".join([entry.bibtex for entry in results])
-    
-    with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.bib', encoding='utf-8') as f:
-        f.write(bibtex_content)
-        temp_path = f.name
-    
-    return FileResponse(
-        temp_path,
-        media_type='application/x-bibtex',
-        filename='references.bib',
-        background=None
-    )
-
-@app.get("/", response_class=HTMLResponse)
-async def read_root():
-    html_content = """
-    <!DOCTYPE html>
-    <html lang="zh-CN">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>DBLP BibTeX 批量获取工具</title>
-        <style>
-            * { margin: 0; padding: 0; box-sizing: border-box; }
-            
-            body {
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                min-height: 100vh;
-                padding: 20px;
-            }
-            
-            .container {
-                max-width: 1200px;
-                margin: 0 auto;
-                background: white;
-                border-radius: 15px;
-                box-shadow: 0 20px 60px rgba(0,0,0,0.3);
-                overflow: hidden;
-            }
-            
-            .header {
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-                padding: 30px;
-                text-align: center;
-            }
-            
-            .header h1 { font-size: 2em; margin-bottom: 10px; }
-            .header p { font-size: 1.1em; opacity: 0.9; }
-            
-            .api-status {
-                padding: 15px;
-                margin: 20px 30px;
-                border-radius: 8px;
-                border-left: 4px solid #667eea;
-            }
-            
-            .api-status.ok { background: #d4edda; border-left-color: #28a745; }
-            .api-status.warning { background: #fff3cd; border-left-color: #ffc107; }
-            
-            .info-box {
-                background: #e7f3ff;
-                border: 1px solid #2196F3;
-                color: #0d47a1;
-                padding: 15px;
-                border-radius: 8px;
-                margin: 20px 30px;
-            }
-            
-            .info-title { font-weight: 600; margin-bottom: 8px; font-size: 1.1em; }
-            
-            .content { padding: 30px; }
-            .input-section { margin-bottom: 20px; }
-            
-            label {
-                display: block;
-                margin-bottom: 10px;
-                font-weight: 600;
-                color: #333;
-            }
-            
-            textarea, input[type="text"], input[type="number"] {
-                width: 100%;
-                padding: 12px;
-                border: 2px solid #e0e0e0;
-                border-radius: 8px;
-                font-size: 14px;
-                font-family: inherit;
-                transition: border-color 0.3s;
-            }
-            
-            textarea { resize: vertical; min-height: 120px; }
-            input:focus, textarea:focus { outline: none; border-color: #667eea; }
-            
-            .button-group { display: flex; gap: 15px; margin-top: 20px; }
-            
-            button {
-                flex: 1;
-                padding: 15px 30px;
-                font-size: 16px;
-                font-weight: 600;
-                border: none;
-                border-radius: 8px;
-                cursor: pointer;
-                transition: all 0.3s;
-            }
-            
-            .btn-primary {
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-            }
-            
-            .btn-primary:hover:not(:disabled) {
-                transform: translateY(-2px);
-                box-shadow: 0 5px 15px rgba(102, 126, 234, 0.4);
-            }
-            
-            .btn-secondary { background: #f0f0f0; color: #333; }
-            .btn-secondary:hover:not(:disabled) { background: #e0e0e0; }
-            button:disabled { background: #ccc; cursor: not-allowed; transform: none; }
-            
-            .results-section { margin-top: 30px; }
-            
-            .result-item {
-                background: #f8f9fa;
-                border: 1px solid #e0e0e0;
-                border-radius: 8px;
-                padding: 20px;
-                margin-bottom: 15px;
-                transition: box-shadow 0.3s;
-            }
-            
-            .result-item:hover {
-                box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-            }
-            
-            .result-title {
-                font-size: 1.2em;
-                font-weight: 600;
-                color: #333;
-                margin-bottom: 10px;
-                line-height: 1.4;
-            }
-            
-            .result-meta { 
-                color: #666; 
-                margin-bottom: 15px;
-                font-size: 0.95em;
-            }
-            
-            .bibtex-code {
-                background: #2d2d2d;
-                color: #f8f8f2;
-                padding: 15px;
-                border-radius: 5px;
-                font-family: 'Courier New', monospace;
-                font-size: 13px;
-                overflow-x: auto;
-                white-space: pre-wrap;
-                line-height: 1.5;
-            }
-            
-            .loading {
-                text-align: center;
-                padding: 40px;
-                color: #667eea;
-                font-size: 1.2em;
-            }
-            
-            .spinner {
-                border: 4px solid #f3f3f3;
-                border-top: 4px solid #667eea;
-                border-radius: 50%;
-                width: 40px;
-                height: 40px;
-                animation: spin 1s linear infinite;
-                margin: 20px auto;
-            }
-            
-            @keyframes spin {
-                0% { transform: rotate(0deg); }
-                100% { transform: rotate(360deg); }
-            }
-            
-            .stats {
-                background: #e8f4f8;
-                padding: 15px;
-                border-radius: 8px;
-                margin-bottom: 20px;
-                text-align: center;
-                font-weight: 600;
-                font-size: 1.1em;
-            }
-            
-            .error {
-                background: #f8d7da;
-                border: 1px solid #f5c6cb;
-                color: #721c24;
-                padding: 15px;
-                border-radius: 8px;
-                margin: 20px 0;
-            }
-            
-            code {
-                background: #f4f4f4;
-                padding: 2px 6px;
-                border-radius: 3px;
-                font-family: 'Courier New', monospace;
-                font-size: 0.9em;
-            }
-            
-            .link { 
-                color: #667eea; 
-                text-decoration: none; 
-                font-weight: 600;
-                transition: color 0.3s;
-            }
-            .link:hover { color: #764ba2; text-decoration: underline; }
-            
-            ul { line-height: 1.8; }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>📚 DBLP BibTeX 批量获取工具</h1>
-                <p>使用 DBLP Search API 获取 BibTeX</p>
-            </div>
-            
-            <div id="apiStatus" class="api-status">
-                <strong>🔄 正在检查 DBLP 连通性...</strong>
-            </div>
-            
-            <div class="info-box">
-                <div class="info-title">📖 使用说明</div>
-                <ol style="margin-left: 20px; margin-top: 8px;">
-                    <li>输入论文标题或关键词，点击开始搜索</li>
-                    <li>系统将调用 DBLP 搜索并获取 BibTeX</li>
-                    <li>支持批量关键词，每行一个</li>
-                </ol>
-                <p style="margin-top: 10px;">无需 API Key；若失败，请稍后重试。</p>
-            </div>
-            
-            <div class="content">
-                
-                
-                <div class="input-section">
-                    <label for="keywords">搜索关键词或论文标题（每行一个）：</label>
-                    <textarea id="keywords" rows="6" placeholder="建议输入完整论文标题以获得最准确的结果，例如：&#10;&#10;Attention is all you need&#10;BERT: Pre-training of Deep Bidirectional Transformers&#10;Deep Residual Learning for Image Recognition"></textarea>
-                </div>
-                
-                <div class="input-section">
-                    <label for="maxResults">每个关键词最大结果数（1-10）：</label>
-                    <input type="number" id="maxResults" value="5" min="1" max="10">
-                    <small style="color: #666; margin-top: 5px; display: block;">
-                        注意：每个结果约需2次请求（搜索+获取BibTeX），请合理设置数量
-                    </small>
-                </div>
-                
-                <div class="button-group">
-                    <button class="btn-primary" onclick="searchPapers()" id="searchBtn">🔍 开始搜索</button>
-                    <button class="btn-secondary" onclick="downloadAll()" id="downloadBtn" disabled>💾 下载所有BibTeX</button>
-                </div>
-                
-                <div id="results"></div>
-            </div>
-        </div>
-        
-        <script>
-            let currentResults = [];
-            
-            window.addEventListener('DOMContentLoaded', checkAPIStatus);
-            
-            async function checkAPIStatus() {
-                try {
-                    const response = await fetch('/api/check-dblp');
-                    const data = await response.json();
-                    const statusDiv = document.getElementById('apiStatus');
-                    
-                    if (data.reachable) {
-                        statusDiv.className = 'api-status ok';
-                        statusDiv.innerHTML = `
-                            <strong>✓ DBLP 可访问</strong>
-                        `;
-                    } else {
-                        statusDiv.className = 'api-status warning';
-                        statusDiv.innerHTML = `
-                            <strong>⚠ 无法访问 DBLP</strong><br>
-                            请检查网络连接后重试
-                        `;
-                    }
-                } catch (error) {
-                    console.error('Failed to check API status:', error);
-                }
-            }
-            
-            async function searchPapers() {
-                const keywordsText = document.getElementById('keywords').value;
-                const maxResults = parseInt(document.getElementById('maxResults').value);
-                
-                
-                const keywords = keywordsText.split('\\n')
-                    .map(k => k.trim())
-                    .filter(k => k.length > 0);
-                const estimatedCalls = keywords.length * maxResults * 2;
-                if (keywords.length === 0) {
-                    alert('请输入至少一个关键词或论文标题！');
-                    return;
-                }
-                
-                
-                
-                const resultsDiv = document.getElementById('results');
-                const searchBtn = document.getElementById('searchBtn');
-                
-                searchBtn.disabled = true;
-                resultsDiv.innerHTML = `
-                    <div class="loading">
-                        <div class="spinner"></div>
-                        <div>正在从 DBLP 获取数据...</div>
-                        <small style="color: #999; margin-top: 10px; display: block;">
-                            正在处理 ${keywords.length} 个关键词，每个最多 ${maxResults} 篇论文<br>
-                            预计使用 ${estimatedCalls} 次请求
-                        </small>
-                    </div>
-                `;
-                
-                try {
-                    const response = await fetch('/api/search', {
-                        method: 'POST',
-                        headers: { 'Content-Type': 'application/json' },
-                        body: JSON.stringify({
-                            keywords: keywords,
-                            max_results: maxResults
-                        })
-                    });
-                    
-                    if (!response.ok) {
-                        const error = await response.json();
-                        throw new Error(error.detail || '搜索失败');
-                    }
-                    
-                    const data = await response.json();
-                    currentResults = data.results;
-                    if (data.total === 0) {
-                        resultsDiv.innerHTML = `
-                            <div class="error">
-                                <strong>未找到任何论文</strong><br><br>
-                                请检查关键词是否完整，或尝试不同的关键词。
-                            </div>
-                        `;
-                    } else {
-                        displayResults(data);
-                        document.getElementById('downloadBtn').disabled = false;
-                    }
-                    
-                    // 刷新API状态
-                    setTimeout(checkAPIStatus, 1000);
-                    
-                } catch (error) {
-                    resultsDiv.innerHTML = `
-                        <div class="error">
-                            <strong>❌ 搜索失败</strong><br><br>
-                            ${error.message}<br><br>
-                            <strong>可能的原因：</strong>
-                            <ul style="margin-left: 20px; margin-top: 10px;">
-                                <li>网络连接问题</li>
-                                <li>关键词格式不正确</li>
-                                <li>DBLP 暂时不可用</li>
-                            </ul>
-                            <p style="margin-top: 10px;">DBLP 无需 API Key；请稍后重试。</p>
-                        </div>
-                    `;
-                } finally {
-                    searchBtn.disabled = false;
-                }
-            }
-            
-            function displayResults(data) {
-                const resultsDiv = document.getElementById('results');
-                
-                let html = `
-                    <div class="results-section">
-                        <div class="stats">
-                            📊 成功获取 ${data.total} 篇论文的 BibTeX 信息
-                        </div>
-                `;
-                
-                data.results.forEach((result, index) => {
-                    html += `
-                        <div class="result-item">
-                            <div class="result-title">
-                                ${index + 1}. ${escapeHtml(result.title)}
-                            </div>
-                            <div class="result-meta">
-                                👤 作者: ${escapeHtml(result.authors)} | 
-                                📅 年份: ${result.year}
-                            </div>
-                            <div class="bibtex-code">${escapeHtml(result.bibtex)}</div>
-                        </div>
-                    `;
-                });
-                
-                html += '</div>';
-                resultsDiv.innerHTML = html;
-            }
-            
-            async function downloadAll() {
-                if (currentResults.length === 0) {
-                    alert('没有可下载的结果！');
-                    return;
-                }
-                
-                try {
-                    const response = await fetch('/api/download', {
-                        method: 'POST',
-                        headers: { 'Content-Type': 'application/json' },
-                        body: JSON.stringify(currentResults)
-                    });
-                    
-                    if (!response.ok) throw new Error('下载失败');
-                    
-                    const blob = await response.blob();
-                    const url = window.URL.createObjectURL(blob);
-                    const a = document.createElement('a');
-                    a.href = url;
-                    a.download = 'references.bib';
-                    document.body.appendChild(a);
-                    a.click();
-                    window.URL.revokeObjectURL(url);
-                    document.body.removeChild(a);
-                    
-                    alert(`成功下载 ${currentResults.length} 篇论文的 BibTeX 信息！`);
-                    
-                } catch (error) {
-                    alert('下载失败: ' + error.message);
-                }
-            }
-            
-            function escapeHtml(text) {
-                const div = document.createElement('div');
-                div.textContent = text;
-                return div.innerHTML;
-            }
-        </script>
-    </body>
-    </html>
+async def _download(entries: List[dict], style: str, compress: bool) -> StreamingResponse:
+    written, missing = [], []
+
+    async def tail() -> List[str]:
+        texts = await crossref_parents(written)
+        if missing:
+            # 响应开始时还不知道哪些条目会失败，因此写在文件末尾而不是响应头中
+            texts.append(f'@comment{{BibTeX unavailable for {len(missing)} entries:\n  ' + ',\n  '.join(missing) + '\n}\n')
+        return texts
+
+    return _bib_response(_with_bibtex(entries, style, written, missing), compress, tail)
+
+async def _one_batch(entries: List[dict]) -> AsyncIterator[List[dict]]:
+    yield entries
+
+@app.get("/api/download/{result_set_id}")
+async def download_result_set(result_set_id: str, compress: bool = False, style: BibStyle = 'standard'):
+    """按结果集 ID 流式下载 BibTeX；compress=true 时返回 gzip 压缩的 references.bib.gz
+
+    只有元数据的条目（bibtex=false 的搜索）由服务端按 key 获取 style 格式的 BibTeX；
+    crossref 格式的条目引用的会议录记录附在文件末尾，每个只出现一次。
     """
-    return HTMLResponse(content=html_content)
+    entries = await asyncio.to_thread(result_store.get, result_set_id)
+    if entries is None:
+        raise HTTPException(status_code=404, detail="结果集不存在或已过期，请重新搜索")
+    return await _download(entries, style, compress)
+
+@app.post("/api/download/keys")
+async def download_keys(request: BibtexRequest, compress: bool = False):
+    """按 DBLP 记录 key 列表流式下载 BibTeX（选中的结果、翻页新增的结果），客户端无需先取回 BibTeX 再上传"""
+    keys = list(dict.fromkeys(k.strip() for k in request.keys if k.strip()))
+    invalid = [k for k in keys if not is_dblp_key(k)]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"无效的 DBLP 记录 key: {invalid[0]}")
+    return await _download([{'key': k} for k in keys], request.style, compress)
+
+@app.post("/api/download")
+async def download_bibtex(results: List[BibEntry], compress: bool = False):
+    """下载所有BibTeX为一个文件（兼容旧客户端：由请求体提供全部条目）"""
+    entries = [{'bibtex': entry.bibtex, 'key': entry.key, 'crossref': entry.crossref} for entry in results]
+    return _bib_response(_one_batch(entries), compress, lambda: crossref_parents(entries))
+
+def _asset_response(request: Request, asset: Asset, cache_control: str) -> Response:
+    """按 Accept-Encoding 返回预压缩的版本；压缩版本使用弱 ETag，与 CompressionMiddleware 一致。"""
+    encoding = negotiate(request.headers.get('Accept-Encoding'), tuple(asset.encoded))
+    etag = f'"{asset.version}"'
+    headers = {'Cache-Control': cache_control, 'ETag': f'W/{etag}' if encoding else etag}
+    if asset.encoded:
+        headers['Vary'] = 'Accept-Encoding'
+    if _etag_matches(request.headers.get('If-None-Match'), etag):
+        return Response(status_code=304, headers=headers)
+    if encoding is None:
+        return Response(asset.body, media_type=asset.media_type, headers=headers)
+    headers['Content-Encoding'] = encoding
+    return Response(asset.encoded[encoding], media_type=asset.media_type, headers=headers)
+
+@app.get("/", include_in_schema=False)
+async def read_root(request: Request):
+    # 页面每次向服务端验证，部署新版本后立即引用新版本号的资源
+    return _asset_response(request, static_assets.get(INDEX), 'no-cache')
+
+@app.get("/static/{name}", include_in_schema=False)
+async def static_file(request: Request, name: str, v: Optional[str] = None):
+    """网页界面的 CSS/JS；带与内容一致的版本号时长期缓存"""
+    asset = static_assets.get(name)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="文件不存在")
+    if v == asset.version:
+        return _asset_response(request, asset, 'public, max-age=31536000, immutable')
+    return _asset_response(request, asset, 'no-cache')
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # 多个 worker 进程共用缓存文件（或 DBLP_REDIS_URL）；未配置 Redis 时出站限速预算默认也经 SQLite 共享，
+    # 增加 worker 不会成倍增加对 DBLP 的请求
+    workers = int(os.environ.get('DBLP_WORKERS', '1'))
+    if workers > 1:
+        os.environ.setdefault('DBLP_SHARED_RATELIMIT', '1')
+        uvicorn.run("app:app", host="0.0.0.0", port=8000, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
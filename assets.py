@@ -0,0 +1,69 @@
+"""网页界面的静态资源（``static/``）。
+
+启动时把目录下的文件读入内存，按内容摘要生成版本号，并为文本类资源预先压缩出 gzip（与 br，
+安装了 ``brotli`` 包时）版本，请求时按 ``Accept-Encoding`` 直接返回，不再逐次压缩。
+``index.html`` 中对 ``/static/<name>`` 的引用改写为带版本号的 URL（``?v=<摘要>``），
+这些 URL 的内容不会变化，可以长期缓存；页面本身每次向服务端验证 ETag。
+"""
+import hashlib
+import mimetypes
+import os
+import re
+from typing import Dict, NamedTuple, Optional
+
+from compression import ENCODINGS, compress, is_compressible
+
+INDEX = 'index.html'
+
+_REF_RE = re.compile(r'''(["'])/static/([\w.-]+)\1''')
+
+
+class Asset(NamedTuple):
+    body: bytes
+    media_type: str
+    version: str
+    # 编码 -> 预压缩内容；只保留比原文小的编码
+    encoded: Dict[str, bytes]
+
+
+def _version(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()[:16]
+
+
+class StaticAssets:
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._assets: Dict[str, Asset] = {}
+        names = sorted(n for n in os.listdir(directory) if os.path.isfile(os.path.join(directory, n)))
+        # 先加载其他资源，index.html 引用它们时才有版本号
+        for name in sorted(names, key=lambda n: n == INDEX):
+            with open(os.path.join(directory, name), 'rb') as f:
+                body = f.read()
+            if name == INDEX:
+                body = _REF_RE.sub(self._versioned_ref, body.decode('utf-8')).encode('utf-8')
+            self._assets[name] = self._build(name, body)
+
+    def _versioned_ref(self, match: 're.Match') -> str:
+        quote, name = match.group(1), match.group(2)
+        return quote + self.url(name) + quote
+
+    @staticmethod
+    def _build(name: str, body: bytes) -> Asset:
+        media_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if media_type.startswith('text/') or media_type == 'application/javascript':
+            media_type += '; charset=utf-8'
+        encoded = {}
+        if is_compressible(media_type):
+            for encoding in ENCODINGS:
+                data = compress(body, encoding)
+                if len(data) < len(body):
+                    encoded[encoding] = data
+        return Asset(body, media_type, _version(body), encoded)
+
+    def get(self, name: str) -> Optional[Asset]:
+        return self._assets.get(name)
+
+    def url(self, name: str) -> str:
+        """带版本号的 URL；资源不存在时返回不带版本号的路径。"""
+        asset = self._assets.get(name)
+        return f'/static/{name}?v={asset.version}' if asset is not None else f'/static/{name}'
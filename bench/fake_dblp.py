@@ -0,0 +1,260 @@
+"""本地模拟的 DBLP 服务，供基准测试使用。
+
+记录来自 DBLP XML 转储（默认为仓库自带的 ``fixtures/dblp_sample.xml``）：标题命中样例记录时返回
+真实的 hit JSON 与 ``.bib``；其余查询按查询词确定性地合成一条记录，便于生成任意规模的批量负载。
+响应带 ``ETag``（正文摘要）与 ``Last-Modified``，请求携带匹配的 ``If-None-Match`` 时返回 304。
+可配置响应延迟、5xx 错误率与 429 限流率；``GET /_stats`` 返回按路径类型与状态码统计的请求数，
+``POST /_reset`` 清零统计。
+
+也可单独运行，供手动启动的服务指向它::
+
+    python bench/fake_dblp.py --port 9000 --latency 0.05 --error-rate 0.02
+    DBLP_BASE_URL=http://127.0.0.1:9000 uvicorn app:app
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fuzzy import normalize_title  # noqa: E402
+from offline import BIB_STYLES, _hit_info, iter_dump, render_dblp_bib  # noqa: E402
+
+DEFAULT_DUMP = os.path.join(ROOT, 'fixtures', 'dblp_sample.xml')
+# 所有记录共用的 Last-Modified，模拟一份固定的数据快照
+LAST_MODIFIED = 'Mon, 01 Jan 2024 00:00:00 GMT'
+
+
+class FakeDBLP:
+    def __init__(self, dump: Optional[str] = DEFAULT_DUMP, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0, retry_after: float = 1.0,
+                 seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.base_url = ''
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._records: Dict[str, dict] = {}
+        self._titles: List[Tuple[str, str]] = []
+        self.requests: Counter = Counter()
+        if dump:
+            iter_dump(dump, self._add)
+
+    def _add(self, rec: dict):
+        self._records[rec['key']] = rec
+        title = (rec['fields'].get('title') or [''])[0]
+        if rec['type'] != 'www' and title:
+            self._titles.append((normalize_title(title), rec['key']))
+
+    def _synthesize(self, query: str) -> dict:
+        digest = hashlib.sha1(query.encode('utf-8')).hexdigest()
+        key = f'conf/bench/B{digest[:10]}'
+        rec = self._records.get(key)
+        if rec is None:
+            rng = random.Random(digest)
+            rec = {
+                'type': 'inproceedings', 'key': key, 'mdate': '2024-01-01',
+                'fields': {
+                    'author': [f'Author {rng.randrange(1000)}' for _ in range(rng.randint(1, 4))],
+                    'title': [query.capitalize() + '.'],
+                    'booktitle': ['BENCH'],
+                    'year': [str(rng.randint(1990, 2024))],
+                    'pages': [f'{rng.randint(1, 500)}-{rng.randint(501, 900)}'],
+                    'ee': [f'https://doi.org/10.0000/bench.{digest[:8]}'],
+                },
+            }
+            with self._lock:
+                self._records[key] = rec
+        return rec
+
+    def _hit(self, rec: dict, score: int) -> dict:
+        info = _hit_info(rec['key'], rec['type'], rec['fields'])
+        info['url'] = f"{self.base_url}/rec/{rec['key']}"
+        return {'@score': str(score), '@id': rec['key'], 'info': info, 'url': info['url']}
+
+    def search(self, query: str, h: int, f: int = 0) -> dict:
+        words = set(normalize_title(query).split())
+        matched = [self._records[key] for norm, key in self._titles if words and words <= set(norm.split())]
+        if not matched:
+            matched = [self._synthesize(query)]
+        hits = [self._hit(rec, 10 - f - i) for i, rec in enumerate(matched[f:f + h])]
+        return {'result': {
+            'query': query,
+            'status': {'@code': '200', 'text': 'OK'},
+            'hits': {'@total': str(len(matched)), '@sent': str(len(hits)), 'hit': hits},
+        }}
+
+    def bibtex(self, key: str, style: str = 'standard') -> Optional[str]:
+        rec = self._records.get(key)
+        return render_dblp_bib(rec, style, self._records.get) if rec is not None else None
+
+    def inject(self) -> Optional[int]:
+        """按配置返回需要注入的错误状态码，或 None。"""
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        roll = self._random.random()
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 500
+        return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.requests)
+
+    def reset(self):
+        with self._lock:
+            self.requests.clear()
+
+    def count(self, kind: str, status: int):
+        with self._lock:
+            self.requests[f'{kind} {status}'] += 1
+
+
+def _bib_key(path: str, query: dict) -> Optional[str]:
+    if path.startswith('/rec/bibtex/') and path.endswith('.bib'):
+        return path[len('/rec/bibtex/'):-len('.bib')]
+    if path.startswith('/rec/') and path.endswith('.bib'):
+        return path[len('/rec/'):-len('.bib')]
+    if path.startswith('/rec/') and query.get('view') == ['bibtex']:
+        return path[len('/rec/'):]
+    return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: '_Server'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_validated(self, kind: str, body: bytes, content_type: str):
+        """带校验信息发送 200；客户端缓存的版本仍然有效时改为 304。"""
+        fake = self.server.fake
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        headers = {'ETag': etag, 'Last-Modified': LAST_MODIFIED}
+        if self.headers.get('If-None-Match') == etag:
+            fake.count(kind, 304)
+            self.send_response(304)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            return
+        fake.count(kind, 200)
+        self._send(200, body, content_type, headers)
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[dict] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        fake = self.server.fake
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        if url.path == '/_stats':
+            return self._send(200, json.dumps(fake.stats()).encode(), 'application/json')
+        if url.path == '/search/publ/api':
+            kind = 'search'
+        else:
+            kind = 'bib' if _bib_key(url.path, query) is not None else 'other'
+        injected = fake.inject()
+        if injected == 429:
+            fake.count(kind, 429)
+            return self._send(429, b'Too Many Requests', 'text/plain',
+                              {'Retry-After': f'{fake.retry_after:g}'})
+        if injected is not None:
+            fake.count(kind, injected)
+            return self._send(injected, b'Internal Server Error', 'text/plain')
+        if kind == 'search':
+            h = int((query.get('h') or ['10'])[0])
+            f = int((query.get('f') or ['0'])[0])
+            body = json.dumps(fake.search((query.get('q') or [''])[0], h, f)).encode()
+            return self._send_validated(kind, body, 'application/json')
+        text = None
+        if kind == 'bib':
+            param = (query.get('param') or ['1'])[0]
+            style = BIB_STYLES[int(param)] if param in ('0', '1', '2') else 'standard'
+            text = fake.bibtex(_bib_key(url.path, query), style)
+        if text is None:
+            fake.count(kind, 404)
+            return self._send(404, b'Not Found', 'text/plain')
+        return self._send_validated(kind, text.encode('utf-8'), 'application/x-bibtex; charset=utf-8')
+
+    def do_POST(self):
+        if urlsplit(self.path).path == '/_reset':
+            self.server.fake.reset()
+            return self._send(200, b'{}', 'application/json')
+        self._send(404, b'Not Found', 'text/plain')
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    fake: FakeDBLP
+
+    def handle_error(self, request, client_address):
+        # 对冲请求被取消时客户端会提前断开连接，不算错误
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+def serve(fake: FakeDBLP, host: str = '127.0.0.1', port: int = 0) -> _Server:
+    """在后台线程启动服务，返回 server；``fake.base_url`` 设为实际监听地址。"""
+    server = _Server((host, port), _Handler)
+    server.fake = fake
+    fake.base_url = f'http://{host}:{server.server_address[1]}'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_arguments(ap: argparse.ArgumentParser):
+    ap.add_argument('--dump', default=DEFAULT_DUMP, help='提供真实记录的 DBLP XML 转储')
+    ap.add_argument('--latency', type=float, default=0.05, help='每个响应的固定延迟（秒）')
+    ap.add_argument('--jitter', type=float, default=0.05, help='在固定延迟上叠加的均匀随机延迟上限（秒）')
+    ap.add_argument('--error-rate', type=float, default=0.0, help='返回 500 的比例')
+    ap.add_argument('--throttle-rate', type=float, default=0.0, help='返回 429 的比例')
+    ap.add_argument('--retry-after', type=float, default=1.0, help='429 响应的 Retry-After（秒）')
+    ap.add_argument('--seed', type=int, default=0)
+
+
+def from_arguments(args: argparse.Namespace) -> FakeDBLP:
+    return FakeDBLP(args.dump, args.latency, args.jitter, args.error_rate, args.throttle_rate,
+                    args.retry_after, args.seed)
+
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description='本地模拟 DBLP 服务')
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--port', type=int, default=9000)
+    add_arguments(ap)
+    args = ap.parse_args(argv)
+    server = serve(from_arguments(args), args.host, args.port)
+    print(f'模拟 DBLP 服务已启动: {server.fake.base_url}', flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+"""本地模拟的 Redis 服务，供基准测试与多 worker 部署的本地验证使用。
+
+只实现服务用到的命令（字符串、计数器、hash、过期与 SCAN，以及客户端 pipeline 使用的 MULTI/EXEC），
+支持 RESP2 与 ``HELLO 3`` 协商的 RESP3，数据只保存在内存中。也可单独运行，供手动启动的服务指向它::
+
+    python bench/fake_redis.py --port 6390
+    DBLP_REDIS_URL=redis://127.0.0.1:6390/0 uvicorn app:app --workers 4
+"""
+import argparse
+import fnmatch
+import socketserver
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+class Error(Exception):
+    pass
+
+
+class FakeRedis:
+    def __init__(self):
+        self.base_url = ''
+        self._lock = threading.Lock()
+        self._data: Dict[bytes, object] = {}
+        self._expires: Dict[bytes, float] = {}
+
+    def _alive(self, key: bytes) -> bool:
+        expires = self._expires.get(key)
+        if expires is not None and time.time() >= expires:
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    def _hash(self, key: bytes, create: bool = False) -> Optional[dict]:
+        if not self._alive(key):
+            if not create:
+                return None
+            self._data[key] = {}
+        value = self._data[key]
+        if not isinstance(value, dict):
+            raise Error('WRONGTYPE Operation against a key holding the wrong kind of value')
+        return value
+
+    def execute(self, args: List[bytes]):
+        name = args[0].decode().upper()
+        handler = getattr(self, 'cmd_' + name.lower(), None)
+        if handler is None:
+            raise Error(f"ERR unknown command '{name}'")
+        with self._lock:
+            return handler(*args[1:])
+
+    def cmd_ping(self, *args):
+        return args[0] if args else 'PONG'
+
+    def cmd_client(self, *args):
+        return 'OK'
+
+    def cmd_select(self, db):
+        return 'OK'
+
+    def cmd_flushdb(self, *args):
+        self._data.clear()
+        self._expires.clear()
+        return 'OK'
+
+    def cmd_get(self, key):
+        return self._data[key] if self._alive(key) else None
+
+    def cmd_set(self, key, value, *options):
+        options = [o.decode().upper() for o in options]
+        if 'NX' in options and self._alive(key):
+            return None
+        self._data[key] = value
+        self._expires.pop(key, None)
+        for flag, scale in (('EX', 1.0), ('PX', 0.001)):
+            if flag in options:
+                self._expires[key] = time.time() + float(options[options.index(flag) + 1]) * scale
+        return 'OK'
+
+    def cmd_del(self, *keys):
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                del self._data[key]
+                self._expires.pop(key, None)
+                removed += 1
+        return removed
+
+    def cmd_incrby(self, key, amount):
+        value = (int(self._data[key]) if self._alive(key) else 0) + int(amount)
+        self._data[key] = str(value).encode()
+        return value
+
+    def cmd_incr(self, key):
+        return self.cmd_incrby(key, 1)
+
+    def _set_expire(self, key, seconds: float) -> int:
+        if not self._alive(key):
+            return 0
+        self._expires[key] = time.time() + seconds
+        return 1
+
+    def cmd_expire(self, key, seconds):
+        return self._set_expire(key, float(seconds))
+
+    def cmd_pexpire(self, key, millis):
+        return self._set_expire(key, float(millis) / 1000)
+
+    def cmd_ttl(self, key):
+        if not self._alive(key):
+            return -2
+        expires = self._expires.get(key)
+        return -1 if expires is None else int(round(expires - time.time()))
+
+    def cmd_hset(self, key, *pairs):
+        value = self._hash(key, create=True)
+        added = 0
+        for field, item in zip(pairs[::2], pairs[1::2]):
+            added += field not in value
+            value[field] = item
+        return added
+
+    def cmd_hget(self, key, field):
+        value = self._hash(key)
+        return value.get(field) if value is not None else None
+
+    def cmd_hgetall(self, key):
+        return dict(self._hash(key) or {})
+
+    def cmd_hstrlen(self, key, field):
+        value = self._hash(key) or {}
+        return len(value.get(field, b''))
+
+    def cmd_scan(self, cursor, *options):
+        options = list(options)
+        pattern = '*'
+        count = 10
+        for i in range(0, len(options) - 1, 2):
+            flag = options[i].decode().upper()
+            if flag == 'MATCH':
+                pattern = options[i + 1].decode()
+            elif flag == 'COUNT':
+                count = int(options[i + 1])
+        keys = sorted(k for k in list(self._data) if self._alive(k))
+        start = int(cursor)
+        batch = keys[start:start + count]
+        following = start + count if start + count < len(keys) else 0
+        return [str(following).encode(), [k for k in batch if fnmatch.fnmatchcase(k.decode(), pattern)]]
+
+
+def _encode(value, resp3: bool = False) -> bytes:
+    if value is None:
+        return b'_\r\n' if resp3 else b'$-1\r\n'
+    if isinstance(value, dict):
+        if resp3:
+            return (b'%' + str(len(value)).encode() + b'\r\n'
+                    + b''.join(_encode(k, resp3) + _encode(v, resp3) for k, v in value.items()))
+        value = [item for pair in value.items() for item in pair]
+    if isinstance(value, Error):
+        return b'-' + str(value).encode() + b'\r\n'
+    if isinstance(value, str):
+        return b'+' + value.encode() + b'\r\n'
+    if isinstance(value, int):
+        return b':' + str(value).encode() + b'\r\n'
+    if isinstance(value, bytes):
+        return b'$' + str(len(value)).encode() + b'\r\n' + value + b'\r\n'
+    return b'*' + str(len(value)).encode() + b'\r\n' + b''.join(_encode(v, resp3) for v in value)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: '_Server'
+
+    def _read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            return line.split()
+        args = []
+        for _ in range(int(line[1:])):
+            size = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    def handle(self):
+        fake = self.server.fake
+        queued: Optional[List[List[bytes]]] = None
+        resp3 = False
+        while True:
+            try:
+                args = self._read_command()
+            except (ConnectionError, ValueError):
+                return
+            if args is None:
+                return
+            name = args[0].decode().upper() if args else ''
+            if name == 'HELLO':
+                # 协商协议版本，之后的回复按该版本编码
+                resp3 = len(args) > 1 and args[1] == b'3'
+                reply = {b'server': b'redis', b'version': b'7.0.0', b'proto': 3 if resp3 else 2}
+            elif name == 'MULTI':
+                queued, reply = [], 'OK'
+            elif name == 'EXEC':
+                replies = []
+                for queued_args in queued or []:
+                    try:
+                        replies.append(fake.execute(queued_args))
+                    except Error as e:
+                        replies.append(e)
+                queued, reply = None, replies
+            elif name == 'DISCARD':
+                queued, reply = None, 'OK'
+            elif queued is not None:
+                queued.append(args)
+                reply = 'QUEUED'
+            else:
+                try:
+                    reply = fake.execute(args)
+                except Error as e:
+                    reply = e
+            try:
+                self.wfile.write(_encode(reply, resp3))
+            except ConnectionError:
+                return
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    fake: FakeRedis
+
+
+def serve(fake: FakeRedis, host: str = '127.0.0.1', port: int = 0) -> _Server:
+    """在后台线程启动服务，返回 server；``fake.base_url`` 设为 ``redis://`` 地址。"""
+    server = _Server((host, port), _Handler)
+    server.fake = fake
+    fake.base_url = f'redis://{host}:{server.server_address[1]}/0'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description='本地模拟 Redis 服务')
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--port', type=int, default=6390)
+    args = ap.parse_args(argv)
+    server = serve(FakeRedis(), args.host, args.port)
+    print(f'模拟 Redis 服务已启动: {server.fake.base_url}', flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+"""对 ``POST /api/search`` 的离线基准测试。
+
+每个场景都会启动一个本地模拟 DBLP 服务（见 ``fake_dblp.py``），并以独立的 uvicorn 子进程启动服务
+（空缓存，``DBLP_BASE_URL`` 指向模拟服务），然后发送负载并统计延迟分位数与吞吐量：
+
+- ``small``：多个客户端并发发送大量 1–3 个关键词的小批量请求；
+- ``huge``：单个请求提交上千个关键词；
+- ``duplicates``：多个客户端同时提交完全相同的批量，检验请求合并与缓存；
+- ``rate_limited``：在接近生产的限速（``--limited-rate``，默认每秒 3 个请求）下提交一个 60 个关键词的批量，
+  检验限速排队不会让 BibTeX 超过截止时间而退化为本地生成的简易条目（见 ``fallbacks``）。
+
+``fallbacks`` 统计返回结果中本地生成的简易条目数；``--fail-on-fallback`` 在出现简易条目时以非零状态退出。
+
+``--workers`` 以多个 uvicorn worker 启动服务，``--backend`` 选择共享后端：``local``（各 worker 独立限速）、
+``sqlite``（限速预算经缓存文件共享）或 ``redis``（缓存与限速预算放在本地模拟的 Redis 中，见 ``fake_redis.py``）。
+配合较低的 ``--rate`` 可以检验增加 worker 后对上游的请求速率不超过配置值（见 ``upstream_per_s``）。
+
+``--mirrors`` 按逗号分隔的延迟启动多个模拟服务并配置为 ``DBLP_MIRRORS``，``upstream_by_mirror``
+给出各镜像实际承担的请求数，可用于检验请求是否集中到延迟最低的镜像。
+
+用法::
+
+    python bench/run.py
+    python bench/run.py --scenarios small,duplicates --latency 0.1 --error-rate 0.02 --json result.json
+    python bench/run.py --scenarios small --workers 4 --backend redis --rate 20
+    python bench/run.py --scenarios small --mirrors 0.3,0.02
+    python bench/run.py --scenarios rate_limited --fail-on-fallback
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+import fake_dblp
+import fake_redis
+
+ROOT = fake_dblp.ROOT
+
+_WORDS = (
+    'adaptive scalable efficient robust neural probabilistic distributed secure learned sparse '
+    'incremental approximate parallel graph query index cache transformer network model search '
+    'retrieval compression storage scheduling inference verification synthesis embedding'
+).split()
+
+
+def make_titles(count: int, seed: int) -> List[str]:
+    """生成互不相同的合成标题。"""
+    rng = random.Random(seed)
+    titles = []
+    for i in range(count):
+        words = rng.sample(_WORDS, rng.randint(4, 8))
+        titles.append(' '.join(words) + f' {seed}x{i}')
+    return titles
+
+
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class AppProcess:
+    """以 uvicorn 子进程运行服务，缓存与任务库放在临时目录，进程退出后删除。"""
+
+    def __init__(self, base_url: str, env: Dict[str, str], workers: int = 1):
+        self.port = _free_port()
+        self.url = f'http://127.0.0.1:{self.port}'
+        self._tmp = tempfile.TemporaryDirectory(prefix='dblp-bench-')
+        self._env = {
+            **os.environ,
+            'DBLP_BASE_URL': base_url,
+            'DBLP_CACHE_PATH': os.path.join(self._tmp.name, 'cache.sqlite3'),
+            'DBLP_JOBS_PATH': os.path.join(self._tmp.name, 'jobs.sqlite3'),
+            'HTTP_PROXY': '',
+            'HTTPS_PROXY': '',
+            **env,
+        }
+        self.workers = workers
+        self._proc: Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> 'AppProcess':
+        command = [sys.executable, '-m', 'uvicorn', 'app:app', '--port', str(self.port), '--log-level', 'warning']
+        if self.workers > 1:
+            command += ['--workers', str(self.workers)]
+        self._proc = subprocess.Popen(command, cwd=ROOT, env=self._env)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self._proc.poll() is not None:
+                raise RuntimeError('服务启动失败')
+            try:
+                urllib.request.urlopen(self.url + '/api/check-dblp', timeout=1).read()
+                return self
+            except OSError:
+                time.sleep(0.1)
+        raise RuntimeError('等待服务启动超时')
+
+    def __exit__(self, *exc):
+        self._proc.terminate()
+        try:
+            self._proc.wait(10)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+        self._tmp.cleanup()
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.keywords = 0
+        self.results = 0
+        self.fallbacks = 0
+        self.failures = 0
+
+    async def search(self, client: httpx.AsyncClient, keywords: List[str], max_results: int):
+        started = time.perf_counter()
+        try:
+            r = await client.post('/api/search', json={'keywords': keywords, 'max_results': max_results})
+            ok = r.status_code == 200
+            if ok:
+                body = r.json()
+                self.results += body.get('total', 0)
+                self.fallbacks += sum(1 for p in body.get('results', []) if p.get('fallback'))
+        except httpx.HTTPError:
+            ok = False
+        self.latencies.append(time.perf_counter() - started)
+        self.keywords += len(keywords)
+        if not ok:
+            self.failures += 1
+
+
+async def scenario_small(client: httpx.AsyncClient, rec: Recorder, args: argparse.Namespace):
+    titles = iter(make_titles(args.batches * 3, args.seed))
+    rng = random.Random(args.seed)
+    batches = [[next(titles) for _ in range(rng.randint(1, 3))] for _ in range(args.batches)]
+    queue = iter(batches)
+
+    async def client_loop():
+        for batch in queue:
+            await rec.search(client, batch, args.max_results)
+
+    await asyncio.gather(*(client_loop() for _ in range(args.clients)))
+
+
+async def scenario_huge(client: httpx.AsyncClient, rec: Recorder, args: argparse.Namespace):
+    for round_ in range(args.rounds):
+        await rec.search(client, make_titles(args.huge, args.seed + round_), args.max_results)
+
+
+async def scenario_duplicates(client: httpx.AsyncClient, rec: Recorder, args: argparse.Namespace):
+    for round_ in range(args.rounds):
+        batch = make_titles(5, args.seed + round_)
+        await asyncio.gather(*(rec.search(client, batch, args.max_results) for _ in range(args.clients)))
+
+
+async def scenario_rate_limited(client: httpx.AsyncClient, rec: Recorder, args: argparse.Namespace):
+    await rec.search(client, make_titles(60, args.seed), args.max_results)
+
+
+SCENARIOS: Dict[str, Callable[[httpx.AsyncClient, Recorder, argparse.Namespace], Awaitable[None]]] = {
+    'small': scenario_small,
+    'huge': scenario_huge,
+    'duplicates': scenario_duplicates,
+    'rate_limited': scenario_rate_limited,
+}
+# 这些场景使用接近生产的限速，而不是 --rate
+_LIMITED = ('rate_limited',)
+
+
+async def _drive(app_url: str, name: str, args: argparse.Namespace) -> Recorder:
+    rec = Recorder()
+    limits = httpx.Limits(max_connections=args.clients * 2)
+    async with httpx.AsyncClient(base_url=app_url, limits=limits, timeout=args.timeout) as client:
+        await SCENARIOS[name](client, rec, args)
+    return rec
+
+
+def run_scenario(name: str, args: argparse.Namespace) -> dict:
+    latencies = [float(v) for v in args.mirrors.split(',')] if args.mirrors else [args.latency]
+    fakes = []
+    for latency in latencies:
+        fake = fake_dblp.from_arguments(args)
+        fake.latency = latency
+        fakes.append(fake)
+    servers = [fake_dblp.serve(fake) for fake in fakes]
+    rate = args.limited_rate if name in _LIMITED else args.rate
+    env = {'DBLP_RATE': str(rate), 'DBLP_BURST': str(max(1, int(rate * 2)))}
+    if args.mirrors:
+        env['DBLP_MIRRORS'] = ','.join(fake.base_url for fake in fakes)
+    redis_server = None
+    if args.backend == 'sqlite':
+        env['DBLP_SHARED_RATELIMIT'] = '1'
+    elif args.backend == 'redis':
+        redis_server = fake_redis.serve(fake_redis.FakeRedis())
+        env['DBLP_REDIS_URL'] = redis_server.fake.base_url
+    try:
+        with AppProcess(fakes[0].base_url, env, args.workers) as app:
+            for fake in fakes:
+                fake.reset()
+            started = time.perf_counter()
+            rec = asyncio.run(_drive(app.url, name, args))
+            elapsed = time.perf_counter() - started
+    finally:
+        for server in servers:
+            server.shutdown()
+        if redis_server is not None:
+            redis_server.shutdown()
+    by_mirror = {fake.base_url: fake.stats() for fake in fakes}
+    upstream = {}
+    for stats in by_mirror.values():
+        for kind, count in stats.items():
+            upstream[kind] = upstream.get(kind, 0) + count
+    return {
+        'scenario': name,
+        'requests': len(rec.latencies),
+        'failures': rec.failures,
+        'keywords': rec.keywords,
+        'results': rec.results,
+        'fallbacks': rec.fallbacks,
+        'elapsed_s': round(elapsed, 3),
+        'p50_ms': round(percentile(rec.latencies, 50) * 1000, 1),
+        'p95_ms': round(percentile(rec.latencies, 95) * 1000, 1),
+        'p99_ms': round(percentile(rec.latencies, 99) * 1000, 1),
+        'requests_per_s': round(len(rec.latencies) / elapsed, 2),
+        'keywords_per_s': round(rec.keywords / elapsed, 2),
+        'upstream': upstream,
+        'upstream_by_mirror': {url: sum(stats.values()) for url, stats in by_mirror.items()},
+        'upstream_requests': sum(upstream.values()),
+        'upstream_per_s': round(sum(upstream.values()) / elapsed, 2),
+    }
+
+
+def _print_table(reports: List[dict]):
+    columns = ('scenario', 'requests', 'failures', 'fallbacks', 'keywords', 'p50_ms', 'p95_ms', 'p99_ms',
+               'requests_per_s', 'keywords_per_s', 'upstream_requests', 'upstream_per_s')
+    widths = [max(len(c), *(len(str(r[c])) for r in reports)) for c in columns]
+    print('  '.join(c.rjust(w) for c, w in zip(columns, widths)))
+    for r in reports:
+        print('  '.join(str(r[c]).rjust(w) for c, w in zip(columns, widths)))
+
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description='DBLP BibTeX 服务离线基准测试')
+    ap.add_argument('--scenarios', default=','.join(SCENARIOS), help='逗号分隔：' + ', '.join(SCENARIOS))
+    ap.add_argument('--clients', type=int, default=8, help='并发客户端数')
+    ap.add_argument('--batches', type=int, default=200, help='small 场景的请求数')
+    ap.add_argument('--huge', type=int, default=1000, help='huge 场景单个请求的关键词数')
+    ap.add_argument('--rounds', type=int, default=3, help='huge / duplicates 场景的轮数')
+    ap.add_argument('--max-results', type=int, default=1)
+    ap.add_argument('--rate', type=float, default=1000.0,
+                    help='服务的 DBLP_RATE；默认足够大，使结果反映抓取流水线而不是限速')
+    ap.add_argument('--limited-rate', type=float, default=3.0, help='rate_limited 场景的 DBLP_RATE')
+    ap.add_argument('--fail-on-fallback', action='store_true', help='出现本地生成的简易条目时以非零状态退出')
+    ap.add_argument('--timeout', type=float, default=600.0, help='单个请求的超时（秒）')
+    ap.add_argument('--workers', type=int, default=1, help='服务的 uvicorn worker 数')
+    ap.add_argument('--backend', choices=('local', 'sqlite', 'redis'), default='local',
+                    help='多 worker 共享缓存与限速预算的后端')
+    ap.add_argument('--mirrors', help='逗号分隔的各镜像延迟（秒），每项启动一个模拟服务；覆盖 --latency')
+    ap.add_argument('--json', help='把完整结果写入该文件')
+    fake_dblp.add_arguments(ap)
+    args = ap.parse_args(argv)
+
+    reports = []
+    for name in args.scenarios.split(','):
+        name = name.strip()
+        if name not in SCENARIOS:
+            ap.error(f'未知场景: {name}')
+        reports.append(run_scenario(name, args))
+    _print_table(reports)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'reports': reports}, f, ensure_ascii=False, indent=2)
+    if args.fail_on_fallback and any(r['fallbacks'] for r in reports):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,296 @@
+"""BibTeX 解析与导出规范化。
+
+DBLP 返回的 BibTeX 原先作为不透明文本直接拼接导出。这里在导出前逐条解析：统一引用键与字段排版，
+检测同一导出中的引用键冲突，并在完整条目（DBLP 返回的）到达后替换此前生成的简易条目。
+
+解析器只用预编译的正则逐条扫描与产出，不构造语法树；``BibExport`` 只保留已输出条目的
+引用键与标识（标题 + 年份），简易条目在导出结束前暂存，内存占用与条目正文大小无关。
+"""
+import re
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from fuzzy import normalize_title
+
+# 原样保留、不参与规范化的条目类型
+RAW_TYPES = ('comment', 'preamble', 'string')
+# DBLP 的排版：字段名左对齐到 12 列，作者与编者每人一行
+FIELD_WIDTH = 12
+_NAME_SEPARATOR = ' and\n' + ' ' * (FIELD_WIDTH + 6)
+_FIELD_PREFIXES: Dict[str, str] = {}
+
+_NAME_FIELDS = ('author', 'editor')
+
+_ENTRY_RE = re.compile(r'@[ \t]*([A-Za-z]+)[ \t\r\n]*([{(])')
+# 引用键到第一个逗号为止（含空格等非法字符的键由 normalize_key 修正）
+_KEY_RE = re.compile(r'\s*([^,{}()=]*?)\s*(?:,|(?=[})]))')
+# 常见情形（值均为花括号、嵌套不超过三层、无拼接）整条条目由一个正则匹配，字段由 findall 取出，
+# 不在 Python 中逐字段循环；其余情形逐字段扫描。
+# 花括号按“展开循环”写法逐层嵌套：每个字符只能由一个分支匹配，不依赖占有量词（Python 3.11+）也不会回溯爆炸
+_BRACED3 = r'\{[^{}]*\}'
+_BRACED2 = r'\{[^{}]*(?:' + _BRACED3 + r'[^{}]*)*\}'
+_BRACED = r'\{[^{}]*(?:' + _BRACED2 + r'[^{}]*)*\}'
+_FAST_FIELD_RE = re.compile(r'[\s,]*([A-Za-z][\w\-:.+]*)\s*=\s*(' + _BRACED + r')')
+_FAST_ENTRY_RE = re.compile(r'@[ \t]*([A-Za-z]+)\s*\{\s*([^,{}()=\s]+)\s*,'
+                            r'((?:[\s,]*[A-Za-z][\w\-:.+]*\s*=\s*' + _BRACED + r')*)[\s,]*\}')
+_FIELD_RE = re.compile(r'[\s,]*([A-Za-z][\w\-:.+]*)\s*=\s*')
+_CLOSE_RE = re.compile(r'[\s,]*([})])')
+_BARE_RE = re.compile(r'[\w\-.:+/]+')
+_CONCAT_RE = re.compile(r'\s*#\s*')
+_BRACE_RE = re.compile(r'[{}]')
+_QUOTE_RE = re.compile(r'["{}]')
+_SPACE_RE = re.compile(r'\s+')
+_NON_WORD_RE = re.compile(r'[^0-9a-z]+')
+# BibTeX 引用键中不能出现的字符
+_KEY_INVALID_RE = re.compile(r'[\s,{}()"#%~\\\'=]+')
+
+
+class Entry(NamedTuple):
+    type: str
+    key: str
+    # (字段名, 值表达式)：值保留外层花括号，字符串拼接写作 ``a # b``
+    fields: List[Tuple[str, str]]
+    # 无法解析或不需规范化的条目保留原文
+    raw: Optional[str] = None
+
+    def get(self, name: str) -> Optional[str]:
+        """字段的文本内容（去掉一层外层花括号）。"""
+        for field, value in self.fields:
+            if field == name:
+                return value[1:-1] if value.startswith('{') and value.endswith('}') else value
+        return None
+
+
+def _match_brace(text: str, start: int) -> int:
+    """``start`` 处的 ``{`` 对应的 ``}`` 之后的位置；BibTeX 对转义的花括号同样计数。"""
+    depth = 0
+    for m in _BRACE_RE.finditer(text, start):
+        if m.group() == '{':
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return m.end()
+    raise ValueError('花括号不匹配')
+
+
+def _match_quote(text: str, start: int) -> int:
+    """``start`` 处的 ``"`` 对应的结束引号之后的位置；花括号内的引号不算结束。"""
+    depth = 0
+    for m in _QUOTE_RE.finditer(text, start + 1):
+        c = m.group()
+        if c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+        elif depth == 0:
+            return m.end()
+    raise ValueError('引号不匹配')
+
+
+def _read_value(text: str, pos: int) -> Tuple[str, int]:
+    parts = []
+    while True:
+        c = text[pos:pos + 1]
+        if c == '{':
+            end = _match_brace(text, pos)
+            parts.append(text[pos:end])
+        elif c == '"':
+            end = _match_quote(text, pos)
+            parts.append('{' + text[pos + 1:end - 1] + '}')
+        else:
+            m = _BARE_RE.match(text, pos)
+            if m is None:
+                raise ValueError(f'位置 {pos} 处缺少字段值')
+            end = m.end()
+            parts.append(m.group())
+        m = _CONCAT_RE.match(text, end)
+        if m is None:
+            return ' # '.join(parts), end
+        pos = m.end()
+
+
+def _parse_entry(text: str, m: 're.Match') -> Tuple[Entry, int]:
+    kind = m.group(1).lower()
+    closing = '}' if m.group(2) == '{' else ')'
+    if kind in RAW_TYPES:
+        end = _match_brace(text, m.end() - 1) if closing == '}' else text.index(')', m.end()) + 1
+        return Entry(kind, '', [], text[m.start():end]), end
+    km = _KEY_RE.match(text, m.end())
+    key, pos = km.group(1), km.end()
+    fields = []
+    while True:
+        cm = _CLOSE_RE.match(text, pos)
+        if cm is not None:
+            if cm.group(1) != closing:
+                raise ValueError('条目结束符不匹配')
+            return Entry(kind, key, fields), cm.end()
+        fm = _FIELD_RE.match(text, pos)
+        if fm is None:
+            raise ValueError(f'位置 {pos} 处缺少字段名')
+        value, pos = _read_value(text, fm.end())
+        fields.append((fm.group(1).lower(), value))
+
+
+def parse(text: str) -> Iterator[Entry]:
+    """逐条解析 BibTeX 文本；``@`` 之外的内容忽略，无法解析的条目以原文产出（``raw``）。"""
+    pos = 0
+    while True:
+        m = _ENTRY_RE.search(text, pos)
+        if m is None:
+            return
+        fast = _FAST_ENTRY_RE.match(text, m.start())
+        if fast is not None and fast.group(1).lower() not in RAW_TYPES:
+            pos = fast.end()
+            fields = _FAST_FIELD_RE.findall(text, fast.start(3), fast.end(3))
+            yield Entry(fast.group(1).lower(), fast.group(2), [(name.lower(), value) for name, value in fields])
+            continue
+        try:
+            entry, pos = _parse_entry(text, m)
+        except ValueError:
+            following = _ENTRY_RE.search(text, m.end())
+            pos = following.start() if following else len(text)
+            entry = Entry(m.group(1).lower(), '', [], text[m.start():pos].rstrip())
+        yield entry
+
+
+def normalize_key(key: str) -> str:
+    return _KEY_INVALID_RE.sub('_', key.strip()).strip('_')
+
+
+def _format_value(name: str, value: str) -> str:
+    if name in _NAME_FIELDS:
+        value = value.replace(_NAME_SEPARATOR, ' and ')
+    # 多数条目已是规范排版，先用子串判断跳过正则替换
+    if '\n' in value or '  ' in value or '\t' in value or '\r' in value:
+        value = _SPACE_RE.sub(' ', value)
+    if name in _NAME_FIELDS:
+        value = value.replace(' and ', _NAME_SEPARATOR)
+    return value
+
+
+def _field_prefix(name: str) -> str:
+    prefix = _FIELD_PREFIXES.get(name)
+    if prefix is None:
+        prefix = _FIELD_PREFIXES[name] = f'  {name:<{FIELD_WIDTH}} = '
+    return prefix
+
+
+def format_entry(entry: Entry) -> str:
+    """按 DBLP 的排版输出：类型与字段名小写，字段名对齐，值中的连续空白合并。"""
+    if entry.raw is not None:
+        return entry.raw.rstrip() + '\n'
+    if not entry.fields:
+        return f'@{entry.type}{{{entry.key},\n}}\n'
+    body = ',\n'.join(_field_prefix(name) + _format_value(name, value) for name, value in entry.fields)
+    return f'@{entry.type}{{{entry.key},\n{body}\n}}\n'
+
+
+def _normalize(text: str) -> str:
+    # 不含 LaTeX 命令的 ASCII 文本无需完整的 normalize_title（去重音、Unicode 分解）
+    if text.isascii() and '\\' not in text:
+        return _NON_WORD_RE.sub(' ', text.lower()).strip()
+    return normalize_title(text)
+
+
+def _identity(entry: Entry) -> Tuple[str, str]:
+    title = _normalize(entry.get('title') or '')
+    if not title:
+        # 没有标题的条目只与内容完全相同的条目视为同一记录
+        return '', repr(entry.fields)
+    return title, _normalize(entry.get('year') or '')
+
+
+def _richness(entry: Entry) -> Tuple[bool, int]:
+    # DBLP 返回的条目优先，其次字段更多的
+    return entry.key.startswith('DBLP:'), len(entry.fields)
+
+
+class BibExport:
+    """导出一组 BibTeX 的规范化：逐条 ``add`` 返回可立即写出的文本，最后 ``finish`` 返回暂存的条目。
+
+    - 引用键统一为合法字符；不同记录使用同一引用键时，后出现的改名为 ``key_2``、``key_3``……
+      并记录在 ``renamed``；同一记录（标题与年份相同、引用键相同）只写出一次。
+    - 非 DBLP 的条目（DBLP 不可用时生成的简易条目）暂存到结束：其间到达同一标题与年份的 DBLP 条目时，
+      以 DBLP 条目为准并补上简易条目独有的字段；DBLP 条目已写出时直接丢弃简易条目。
+    """
+
+    def __init__(self):
+        self._keys: Dict[str, Tuple[str, str]] = {}
+        self._written: Set[Tuple[str, str]] = set()
+        # (原引用键, 标识)：已写出的记录，改名后的重复条目同样能识别
+        self._seen: Set[Tuple[str, Tuple[str, str]]] = set()
+        self._pending: Dict[Tuple[str, str], Entry] = {}
+        self.renamed: List[Tuple[str, str]] = []
+        self.duplicates = 0
+        self.merged = 0
+        self.invalid = 0
+
+    def _emit(self, entry: Entry, identity: Tuple[str, str]) -> Optional[str]:
+        key = normalize_key(entry.key) or 'entry'
+        if (key, identity) in self._seen:
+            self.duplicates += 1
+            return None
+        self._seen.add((key, identity))
+        if key in self._keys:
+            n = 2
+            while f'{key}_{n}' in self._keys:
+                n += 1
+            self.renamed.append((key, f'{key}_{n}'))
+            key = f'{key}_{n}'
+        self._keys[key] = identity
+        if identity[0]:
+            self._written.add(identity)
+        return format_entry(entry._replace(key=key))
+
+    def add(self, text: str) -> List[str]:
+        out = []
+        for entry in parse(text):
+            if entry.raw is not None:
+                if entry.type not in RAW_TYPES:
+                    self.invalid += 1
+                out.append(format_entry(entry))
+                continue
+            identity = _identity(entry)
+            pending = self._pending.get(identity) if identity[0] else None
+            if not entry.key.startswith('DBLP:') and identity[0]:
+                if identity in self._written or (pending is not None and _richness(pending) >= _richness(entry)):
+                    self.merged += 1
+                    continue
+                if pending is not None:
+                    self.merged += 1
+                self._pending[identity] = entry
+                continue
+            if pending is not None:
+                del self._pending[identity]
+                self.merged += 1
+                present = {name for name, _ in entry.fields}
+                entry = entry._replace(fields=entry.fields + [f for f in pending.fields if f[0] not in present])
+            text = self._emit(entry, identity)
+            if text is not None:
+                out.append(text)
+        return out
+
+    def finish(self) -> List[str]:
+        """写出暂存的条目；有引用键被改名时附一条 ``@comment`` 说明，便于据此修改 ``\\cite``。"""
+        out = []
+        for identity, entry in self._pending.items():
+            text = self._emit(entry, identity)
+            if text is not None:
+                out.append(text)
+        self._pending.clear()
+        if self.renamed:
+            renamed = ',\n  '.join(f'{old} -> {new}' for old, new in self.renamed)
+            out.append(f'@comment{{Citation keys renamed to avoid collisions:\n  {renamed}\n}}\n')
+        return out
+
+    def stats(self) -> dict:
+        return {'keys': len(self._keys), 'duplicates': self.duplicates, 'merged': self.merged,
+                'invalid': self.invalid, 'renamed': len(self.renamed)}
+
+
+def normalize_export(texts: Iterable[str], export: Optional[BibExport] = None) -> Iterator[str]:
+    """逐条规范化一组 BibTeX 文本；传入 ``export`` 可在结束后读取其统计。"""
+    export = export if export is not None else BibExport()
+    for text in texts:
+        yield from export.add(text)
+    yield from export.finish()
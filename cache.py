@@ -0,0 +1,411 @@
+"""DBLP 响应的缓存。
+
+``DiskCache`` 基于 SQLite，按命名空间（如 ``search``、``bib``）存放 JSON 可序列化的值，
+每个命名空间有独立 TTL；总大小超过上限时按最近访问时间（LRU）淘汰。条目可同时保存上游响应的
+来源 URL 与校验信息（``ETag`` / ``Last-Modified``），过期后据此发出条件请求，内容未变时只需刷新时间。
+
+``RedisCache`` 接口相同，条目放在 Redis（或兼容的服务）中，供多台主机上的 worker 共用。
+
+``MemoryCache`` 是挡在其前面的进程内 LRU，同时合并并发的相同请求；条目按命名空间过期。
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterator, NamedTuple, Optional, Tuple
+
+
+class Transient(NamedTuple):
+    """loader 的返回值包装：照常交给调用方（包括合并进来的并发请求），但不写入 ``MemoryCache``。
+
+    用于上游不可用时回退的过期值，恢复后下一次请求仍会重新获取。
+    """
+    value: Any
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    fresh: bool
+    source: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+class DiskCache:
+    # 每写入这么多次检查一次总大小，避免每次写入都做 SUM
+    EVICT_CHECK_INTERVAL = 200
+
+    def __init__(self, path: str, ttls: Dict[str, float], max_bytes: int):
+        self.path = path
+        self.ttls = dict(ttls)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            ' namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,'
+            ' size INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL,'
+            ' PRIMARY KEY (namespace, key))'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+        # 旧版本创建的缓存文件没有校验信息列，按需补上
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(entries)')}
+        for column in ('source', 'etag', 'last_modified'):
+            if column not in columns:
+                try:
+                    self._conn.execute(f'ALTER TABLE entries ADD COLUMN {column} TEXT')
+                except sqlite3.OperationalError:
+                    # 多个 worker 同时启动时，其他进程可能已经加上了该列
+                    pass
+
+    def _fresh(self, namespace: str, created: float, now: float) -> bool:
+        ttl = self.ttls.get(namespace)
+        return ttl is None or now - created <= ttl
+
+    def get(self, namespace: str, key: str, allow_stale: bool = False) -> Optional[Any]:
+        """返回未过期的缓存值，未命中或已过期时返回 None。
+
+        ``allow_stale=True`` 时也返回已过期（尚未被淘汰）的值，用于上游不可用时的回退。
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, created FROM entries WHERE namespace = ? AND key = ?',
+                (namespace, key),
+            ).fetchone()
+            if row is None or not (allow_stale or self._fresh(namespace, row[1], now)):
+                self._misses[namespace] = self._misses.get(namespace, 0) + 1
+                return None
+            self._conn.execute(
+                'UPDATE entries SET accessed = ? WHERE namespace = ? AND key = ?',
+                (now, namespace, key),
+            )
+            self._hits[namespace] = self._hits.get(namespace, 0) + 1
+        return json.loads(row[0])
+
+    def lookup(self, namespace: str, key: str) -> Optional[CacheEntry]:
+        """返回条目及其是否仍在有效期内；过期条目也返回，供条件请求与上游不可用时回退。"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, created, source, etag, last_modified FROM entries WHERE namespace = ? AND key = ?',
+                (namespace, key),
+            ).fetchone()
+            fresh = row is not None and self._fresh(namespace, row[1], now)
+            if not fresh:
+                self._misses[namespace] = self._misses.get(namespace, 0) + 1
+                if row is None:
+                    return None
+            else:
+                self._hits[namespace] = self._hits.get(namespace, 0) + 1
+            self._conn.execute(
+                'UPDATE entries SET accessed = ? WHERE namespace = ? AND key = ?',
+                (now, namespace, key),
+            )
+        return CacheEntry(json.loads(row[0]), fresh, row[2], row[3], row[4])
+
+    def touch(self, namespace: str, key: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """上游确认内容未变（304）：重新计算有效期，并更新上游给出的新校验信息。"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'UPDATE entries SET created = ?, accessed = ?, etag = COALESCE(?, etag),'
+                ' last_modified = COALESCE(?, last_modified) WHERE namespace = ? AND key = ?',
+                (now, now, etag, last_modified, namespace, key),
+            )
+
+    def set(self, namespace: str, key: str, value: Any, source: Optional[str] = None,
+            etag: Optional[str] = None, last_modified: Optional[str] = None):
+        data = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO entries'
+                ' (namespace, key, value, size, created, accessed, source, etag, last_modified)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (namespace, key, data, len(data), now, now, source, etag, last_modified),
+            )
+            self._writes += 1
+            if self._writes % self.EVICT_CHECK_INTERVAL == 0:
+                self._evict()
+
+    def _evict(self):
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # 淘汰到上限的 90%，留出余量，避免紧接着再次触发
+        excess = total - int(self.max_bytes * 0.9)
+        freed = 0
+        doomed = []
+        for namespace, key, size in self._conn.execute(
+            'SELECT namespace, key, size FROM entries ORDER BY accessed'
+        ):
+            doomed.append((namespace, key))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany('DELETE FROM entries WHERE namespace = ? AND key = ?', doomed)
+
+    def iter_values(self, namespace: str, batch: int = 1000) -> Iterator[Any]:
+        """遍历某个命名空间的全部值（含已过期条目），不更新访问时间。"""
+        last = ''
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    'SELECT key, value FROM entries WHERE namespace = ? AND key > ? ORDER BY key LIMIT ?',
+                    (namespace, last, batch),
+                ).fetchall()
+            if not rows:
+                return
+            for _, value in rows:
+                yield json.loads(value)
+            last = rows[-1][0]
+
+    def purge(self, namespace: Optional[str] = None, expired_only: bool = False) -> int:
+        """删除缓存条目，返回删除数量。"""
+        now = time.time()
+        with self._lock:
+            namespaces = [namespace] if namespace else [
+                r[0] for r in self._conn.execute('SELECT DISTINCT namespace FROM entries')
+            ]
+            removed = 0
+            for ns in namespaces:
+                ttl = self.ttls.get(ns)
+                if expired_only:
+                    if ttl is None:
+                        continue
+                    cur = self._conn.execute(
+                        'DELETE FROM entries WHERE namespace = ? AND created < ?', (ns, now - ttl)
+                    )
+                else:
+                    cur = self._conn.execute('DELETE FROM entries WHERE namespace = ?', (ns,))
+                removed += cur.rowcount
+            return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT namespace, COUNT(*), COALESCE(SUM(size), 0) FROM entries GROUP BY namespace'
+            ).fetchall()
+            namespaces = {}
+            for ns, count, size in rows:
+                namespaces[ns] = {'entries': count, 'bytes': size}
+            for ns in set(self.ttls) | set(self._hits) | set(self._misses):
+                namespaces.setdefault(ns, {'entries': 0, 'bytes': 0})
+            for ns, info in namespaces.items():
+                info['ttl'] = self.ttls.get(ns)
+                info['hits'] = self._hits.get(ns, 0)
+                info['misses'] = self._misses.get(ns, 0)
+            return {
+                'path': self.path,
+                'max_bytes': self.max_bytes,
+                'bytes': sum(info['bytes'] for info in namespaces.values()),
+                'namespaces': namespaces,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisCache:
+    """与 ``DiskCache`` 接口相同的共享缓存；``client`` 为 ``redis.Redis`` 实例（需安装 redis 包）。
+
+    每个条目是一个 hash（value / created / source / etag / last_modified）。过期条目再保留
+    ``stale_grace`` 秒供上游不可用时回退，之后由 Redis 自动删除；总大小由 Redis 的 ``maxmemory`` 策略控制。
+    """
+    # 统计条目数与大小需要遍历全部键，结果缓存这么多秒
+    STATS_INTERVAL = 60.0
+
+    def __init__(self, client, ttls: Dict[str, float], prefix: str = 'dblp:',
+                 stale_grace: float = 7 * 24 * 3600):
+        self.client = client
+        self.ttls = dict(ttls)
+        self.prefix = prefix
+        self.stale_grace = stale_grace
+        conn = client.connection_pool.connection_kwargs
+        self.path = f"redis://{conn.get('host', 'localhost')}:{conn.get('port', 6379)}/{conn.get('db', 0)}"
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+        self._sizes: Dict[str, dict] = {}
+        self._sizes_at = 0.0
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f'{self.prefix}cache:{namespace}:{key}'
+
+    def _fresh(self, namespace: str, created: float, now: float) -> bool:
+        ttl = self.ttls.get(namespace)
+        return ttl is None or now - created <= ttl
+
+    def _expire(self, pipe, namespace: str, name: str):
+        ttl = self.ttls.get(namespace)
+        if ttl is not None:
+            pipe.expire(name, int(ttl + self.stale_grace))
+
+    def _count(self, namespace: str, hit: bool):
+        counter = self._hits if hit else self._misses
+        counter[namespace] = counter.get(namespace, 0) + 1
+
+    def lookup(self, namespace: str, key: str) -> Optional[CacheEntry]:
+        row = self.client.hgetall(self._key(namespace, key))
+        if not row:
+            self._count(namespace, False)
+            return None
+        row = {k.decode(): v.decode('utf-8') for k, v in row.items()}
+        fresh = self._fresh(namespace, float(row['created']), time.time())
+        self._count(namespace, fresh)
+        return CacheEntry(json.loads(row['value']), fresh, row.get('source') or None,
+                          row.get('etag') or None, row.get('last_modified') or None)
+
+    def get(self, namespace: str, key: str, allow_stale: bool = False) -> Optional[Any]:
+        entry = self.lookup(namespace, key)
+        if entry is None or not (allow_stale or entry.fresh):
+            return None
+        return entry.value
+
+    def touch(self, namespace: str, key: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        name = self._key(namespace, key)
+        fields = {'created': repr(time.time())}
+        if etag:
+            fields['etag'] = etag
+        if last_modified:
+            fields['last_modified'] = last_modified
+        pipe = self.client.pipeline()
+        pipe.hset(name, mapping=fields)
+        self._expire(pipe, namespace, name)
+        pipe.execute()
+
+    def set(self, namespace: str, key: str, value: Any, source: Optional[str] = None,
+            etag: Optional[str] = None, last_modified: Optional[str] = None):
+        name = self._key(namespace, key)
+        pipe = self.client.pipeline()
+        pipe.delete(name)
+        pipe.hset(name, mapping={
+            'value': json.dumps(value, ensure_ascii=False), 'created': repr(time.time()),
+            'source': source or '', 'etag': etag or '', 'last_modified': last_modified or '',
+        })
+        self._expire(pipe, namespace, name)
+        pipe.execute()
+
+    def _scan(self, namespace: Optional[str]) -> Iterator[bytes]:
+        pattern = self._key(namespace, '*') if namespace else f'{self.prefix}cache:*'
+        return self.client.scan_iter(match=pattern, count=1000)
+
+    def iter_values(self, namespace: str, batch: int = 1000) -> Iterator[Any]:
+        """遍历某个命名空间的全部值（含已过期条目）。"""
+        for name in self._scan(namespace):
+            value = self.client.hget(name, 'value')
+            if value is not None:
+                yield json.loads(value)
+
+    def purge(self, namespace: Optional[str] = None, expired_only: bool = False) -> int:
+        now = time.time()
+        removed = 0
+        for name in self._scan(namespace):
+            if expired_only:
+                ns = name.decode()[len(self.prefix) + len('cache:'):].split(':', 1)[0]
+                created = self.client.hget(name, 'created')
+                if created is None or self._fresh(ns, float(created), now):
+                    continue
+            removed += self.client.delete(name)
+        return removed
+
+    def stats(self) -> dict:
+        now = time.time()
+        if now - self._sizes_at > self.STATS_INTERVAL:
+            sizes: Dict[str, dict] = {}
+            for name in self._scan(None):
+                ns = name.decode()[len(self.prefix) + len('cache:'):].split(':', 1)[0]
+                info = sizes.setdefault(ns, {'entries': 0, 'bytes': 0})
+                info['entries'] += 1
+                info['bytes'] += self.client.hstrlen(name, 'value')
+            self._sizes, self._sizes_at = sizes, now
+        namespaces = {ns: dict(info) for ns, info in self._sizes.items()}
+        for ns in set(self.ttls) | set(self._hits) | set(self._misses):
+            namespaces.setdefault(ns, {'entries': 0, 'bytes': 0})
+        for ns, info in namespaces.items():
+            info['ttl'] = self.ttls.get(ns)
+            info['hits'] = self._hits.get(ns, 0)
+            info['misses'] = self._misses.get(ns, 0)
+        return {
+            'path': self.path,
+            'max_bytes': None,
+            'bytes': sum(info['bytes'] for info in namespaces.values()),
+            'namespaces': namespaces,
+        }
+
+    def close(self):
+        self.client.close()
+
+
+class MemoryCache:
+    """有界的进程内 LRU，并对进行中的相同请求做 single-flight 合并。
+
+    同一个 key 同时只会有一个 loader 在运行，其他调用方等待同一结果；
+    loader 返回 None、``Transient`` 或抛出异常时不写入缓存。
+    key 为元组时第一项是命名空间，条目在 ``ttls`` 中该命名空间的秒数后过期（未配置的不过期），
+    过期后重新调用 loader，由其决定沿用下层缓存还是向上游重新验证。
+    """
+
+    def __init__(self, maxsize: int, ttls: Optional[Dict[str, float]] = None):
+        self.maxsize = maxsize
+        self.ttls = dict(ttls or {})
+        # key -> (过期时间（monotonic），值)
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        item = self._data.get(key)
+        if item is not None:
+            if item[0] > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return item[1]
+            del self._data[key]
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(loader())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._loaded(key, t))
+        else:
+            self.coalesced += 1
+        # shield：某个调用方被取消（如客户端断开）不会中断其他人共享的请求
+        value = await asyncio.shield(task)
+        return value.value if isinstance(value, Transient) else value
+
+    def _loaded(self, key: Hashable, task: asyncio.Future):
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        value = task.result()
+        if value is not None and not isinstance(value, Transient) and self.maxsize > 0:
+            namespace = key[0] if isinstance(key, tuple) and key else None
+            ttl = self.ttls.get(namespace)
+            self._data[key] = (time.monotonic() + ttl if ttl is not None else float('inf'), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            'entries': len(self._data),
+            'maxsize': self.maxsize,
+            'inflight': len(self._inflight),
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+        }
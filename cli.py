@@ -0,0 +1,208 @@
+"""命令行批量解析：把标题列表或 LaTeX ``.aux`` 转换为 ``.bib``，无需启动网页服务。
+
+    python cli.py titles.txt -o refs.bib
+    python cli.py paper.aux -o refs.bib
+    cat titles.txt | python cli.py - > refs.bib
+
+标题文件每行一个标题，空行与 ``#`` 开头的行忽略。``.aux`` 中 ``DBLP:`` 开头的引用键（DBLP 导出的
+BibTeX 默认使用这种键）直接按 key 获取，不经过搜索；其他引用键无法对应到 DBLP 记录，只给出提示。
+多个 worker 并发解析（总请求速率仍受 ``DBLP_RATE`` 限制），每条结果就绪后立即按输入顺序写出。
+缓存、限速等配置与网页服务相同，均来自环境变量；抓取引擎在解析参数之后才导入，``--help`` 不受其影响。
+"""
+import argparse
+import asyncio
+import logging
+import os
+import re
+import sys
+from typing import Callable, Dict, Iterable, List, Optional, TextIO, Tuple
+
+from bibtex import BibExport
+from offline import BIB_STYLES
+
+# (类型, 值)：类型为 title（按标题搜索）或 key（按 DBLP 记录 key 获取）
+Item = Tuple[str, str]
+
+_CITATION_RE = re.compile(r'\\citation\{([^}]*)\}')
+# biblatex 写入 \abx@aux@cite{key}，新版本为 \abx@aux@cite{refsection}{key}
+_ABX_CITE_RE = re.compile(r'\\abx@aux@cite\{(?:[^}]*\}\{)?([^}]*)\}')
+_INPUT_RE = re.compile(r'\\@input\{([^}]*)\}')
+
+
+def read_titles(lines: Iterable[str]) -> List[Item]:
+    items = []
+    for line in lines:
+        title = line.strip()
+        if title and not title.startswith('#'):
+            items.append(('title', title))
+    return items
+
+
+def read_aux(path: str, text: str, warn: Callable[[str], None]) -> List[Item]:
+    """按出现顺序收集 ``.aux`` 中的引用键，``\\@input`` 引入的子文件（``\\include`` 的章节）一并读取。"""
+    keys: Dict[str, None] = {}
+
+    def collect(path: str, text: str):
+        for line in text.splitlines():
+            for m in _CITATION_RE.finditer(line):
+                keys.update((k.strip(), None) for k in m.group(1).split(','))
+            for m in _ABX_CITE_RE.finditer(line):
+                keys[m.group(1).strip()] = None
+            for m in _INPUT_RE.finditer(line):
+                child = os.path.join(os.path.dirname(path), m.group(1))
+                try:
+                    with open(child, encoding='utf-8', errors='replace') as f:
+                        collect(child, f.read())
+                except OSError:
+                    warn(f'无法读取 {child}')
+
+    collect(path, text)
+    items = []
+    for key in keys:
+        if not key or key == '*':
+            continue
+        if key.startswith('DBLP:'):
+            items.append(('key', key))
+        else:
+            warn(f'跳过非 DBLP 引用键: {key}')
+    return items
+
+
+async def _resolve(item: Item, max_results: int, style: str) -> List[Tuple[Optional[str], str]]:
+    """返回 ``(DBLP key, BibTeX)`` 列表。"""
+    import engine
+
+    kind, value = item
+    if kind == 'key':
+        text = await engine.fetch_bibtex_by_key(value, style)
+        return [(value[len('DBLP:'):], text)] if text else []
+    return [(p.get('key'), p['bibtex']) for p in await engine.search_dblp(value, max_results, style=style)]
+
+
+async def resolve_all(items: List[Item], out: TextIO, workers: int, max_results: int,
+                      ordered: bool = True, progress: Optional[Callable[[int, Item, int], None]] = None,
+                      style: str = 'standard') -> int:
+    """并发解析全部条目并流式写出，返回未找到的条目数。
+
+    多个标题命中同一 DBLP 记录时只写出一次；写出前经 ``BibExport`` 规范化，不同记录的引用键冲突时改名，
+    DBLP 暂时不可用时生成的简易条目延后到最后写出，其间取得同一论文的 DBLP 条目时以后者为准。
+    crossref 格式下被引用的会议录记录在全部条目之后写出，每个只写一次。
+    """
+    import engine
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for entry in enumerate(items):
+        queue.put_nowait(entry)
+    finished: Dict[int, list] = {}
+    written = set()
+    exported: List[dict] = []
+    export = BibExport()
+    next_index = 0
+    missing = 0
+
+    def write(entries: List[Tuple[Optional[str], str]]):
+        for key, text in entries:
+            if key:
+                if key in written:
+                    continue
+                written.add(key)
+            for normalized in export.add(text):
+                out.write(normalized + '\n')
+            if style == 'crossref':
+                exported.append({'key': key, 'bibtex': text})
+        out.flush()
+
+    def flush():
+        nonlocal next_index
+        while next_index in finished:
+            write(finished.pop(next_index))
+            next_index += 1
+
+    async def worker():
+        nonlocal missing
+        while not queue.empty():
+            index, item = queue.get_nowait()
+            entries = await _resolve(item, max_results, style)
+            if not entries:
+                missing += 1
+            if progress is not None:
+                progress(index, item, len(entries))
+            if ordered:
+                finished[index] = entries
+                flush()
+            else:
+                write(entries)
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(max(1, workers))))
+        if exported:
+            write([(None, text) for text in await engine.crossref_parents(exported)])
+        for normalized in export.finish():
+            out.write(normalized + '\n')
+        for old, new in export.renamed:
+            logging.getLogger('cli').warning('引用键冲突，已改名: %s -> %s', old, new)
+    finally:
+        await engine.aclose()
+    return missing
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description='把标题列表或 LaTeX .aux 转换为 DBLP BibTeX')
+    ap.add_argument('input', nargs='?', default='-', help='标题文件或 .aux 文件，- 表示标准输入（默认）')
+    ap.add_argument('-o', '--output', help='输出的 .bib 文件（默认标准输出）')
+    ap.add_argument('--aux', action='store_true', help='按 .aux 解析输入（文件名以 .aux 结尾时自动启用）')
+    ap.add_argument('-j', '--jobs', type=int, default=4, help='并发 worker 数（默认 4）')
+    ap.add_argument('-n', '--max-results', type=int, default=1, help='每个标题取前几条结果（默认 1）')
+    ap.add_argument('--unordered', action='store_true', help='按完成顺序而不是输入顺序写出')
+    ap.add_argument('--style', choices=BIB_STYLES, default='standard',
+                    help='DBLP BibTeX 格式：condensed、standard（默认）或 crossref（会议录记录只输出一次）')
+    ap.add_argument('--cache', help='缓存文件路径，空字符串禁用（默认同 DBLP_CACHE_PATH）')
+    ap.add_argument('--rate', type=float, help='每秒请求数上限（默认同 DBLP_RATE）')
+    ap.add_argument('-q', '--quiet', action='store_true', help='只输出错误')
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.ERROR if args.quiet else logging.WARNING, format='%(message)s')
+    log = logging.getLogger('cli')
+
+    if args.input == '-':
+        text, path = sys.stdin.read(), ''
+    else:
+        with open(args.input, encoding='utf-8', errors='replace') as f:
+            text, path = f.read(), args.input
+    if args.aux or path.endswith('.aux'):
+        items = read_aux(path, text, log.warning)
+    else:
+        items = read_titles(text.splitlines())
+    if not items:
+        log.error('输入中没有可解析的标题或 DBLP 引用键')
+        return 1
+
+    # 引擎在导入时读取配置，命令行参数须在导入前写入环境变量
+    if args.cache is not None:
+        os.environ['DBLP_CACHE_PATH'] = args.cache
+    if args.rate is not None:
+        os.environ['DBLP_RATE'] = str(args.rate)
+        os.environ.setdefault('DBLP_BURST', str(max(1, int(args.rate * 2))))
+
+    def progress(index: int, item: Item, found: int):
+        if not found:
+            log.warning('[%d/%d] 未找到: %s', index + 1, len(items), item[1])
+
+    if args.output:
+        out = open(args.output, 'w', encoding='utf-8')
+    else:
+        sys.stdout.reconfigure(encoding='utf-8')
+        out = sys.stdout
+    try:
+        missing = asyncio.run(resolve_all(items, out, args.jobs, args.max_results,
+                                          ordered=not args.unordered, progress=progress, style=args.style))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    if not args.quiet:
+        print(f'完成: {len(items) - missing}/{len(items)} 条已解析', file=sys.stderr)
+    return 1 if missing else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
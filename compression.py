@@ -0,0 +1,168 @@
+"""HTTP 响应压缩：按 ``Accept-Encoding`` 协商 br（安装了 ``brotli`` 包时）或 gzip。
+
+``CompressionMiddleware`` 是纯 ASGI 中间件，只压缩文本类响应（JSON、NDJSON、BibTeX、HTML 等）：
+
+- 一次性返回的响应整体压缩，小于 ``minimum_size`` 的不压缩；
+- 流式响应逐块压缩；NDJSON 每块之后同步刷新，客户端仍能逐条收到事件；
+- 已带 ``Content-Encoding`` 的响应（预压缩的静态资源、``?compress=true`` 的下载）原样通过；
+- 压缩后强 ETag 改为弱 ETag，``If-None-Match`` 比较时忽略 ``W/`` 前缀，304 仍然有效。
+"""
+import gzip
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 服务端偏好顺序：br 压缩率更高
+ENCODINGS: Tuple[str, ...] = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/x-ndjson', 'application/x-bibtex',
+                      'application/javascript', 'image/svg+xml')
+# 这些类型逐块刷新，保证流式事件、逐条写出的 BibTeX 及时到达（刷新保留压缩字典，压缩率损失很小）
+_FLUSH_TYPES = ('application/x-ndjson', 'text/event-stream', 'application/x-bibtex')
+
+
+def negotiate(accept_encoding: Optional[str], available: Sequence[str] = ENCODINGS) -> Optional[str]:
+    """从 ``available`` 中选出客户端可接受且 q 值最高的编码，同分时按 ``available`` 的顺序；都不可接受时返回 None。"""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.partition(';')
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key.lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name.strip().lower()] = q
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """一次性压缩；gzip 的 mtime 固定为 0，相同内容得到相同结果。``level`` 为 gzip 级别或 brotli quality。"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=11 if level is None else level)
+    return gzip.compress(data, 9 if level is None else level, mtime=0)
+
+
+def is_compressible(media_type: str) -> bool:
+    return media_type.lower().startswith(COMPRESSIBLE_TYPES)
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._br = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, flush: bool) -> bytes:
+        if self.encoding == 'br':
+            out = self._br.process(data)
+            return out + self._br.flush() if flush else out
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self) -> bytes:
+        if self.encoding == 'br':
+            return self._br.finish()
+        return self._zlib.flush()
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 512, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        accept = _header(scope['headers'], b'accept-encoding')
+        encoding = negotiate(accept.decode('latin-1')) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[dict] = None
+        compressor: Optional[_StreamCompressor] = None
+        passthrough = False
+        flush = False
+
+        async def wrapped_send(message):
+            nonlocal start, compressor, passthrough, flush
+            if message['type'] == 'http.response.start':
+                headers = list(message.get('headers', []))
+                media_type = (_header(headers, b'content-type') or b'').decode('latin-1')
+                if (message['status'] in (204, 304) or _header(headers, b'content-encoding') is not None
+                        or not is_compressible(media_type)):
+                    passthrough = True
+                    await send(message)
+                    return
+                flush = media_type.lower().startswith(_FLUSH_TYPES)
+                # 等到第一块正文才能判断是否值得压缩
+                start = {**message, 'headers': headers}
+                return
+            if passthrough or message['type'] != 'http.response.body':
+                await send(message)
+                return
+            body = message.get('body', b'')
+            more = message.get('more_body', False)
+            if start is not None:
+                headers = start['headers']
+                if not more and len(body) < self.minimum_size:
+                    await send(start)
+                    start = None
+                    passthrough = True
+                    await send(message)
+                    return
+                headers[:] = [(k, v) for k, v in headers if k.lower() != b'content-length']
+                headers.append((b'content-encoding', encoding.encode()))
+                vary = _header(headers, b'vary')
+                if vary is None:
+                    headers.append((b'vary', b'Accept-Encoding'))
+                elif b'accept-encoding' not in vary.lower():
+                    headers[:] = [(k, v) for k, v in headers if k.lower() != b'vary']
+                    headers.append((b'vary', vary + b', Accept-Encoding'))
+                etag = _header(headers, b'etag')
+                if etag is not None and not etag.startswith(b'W/'):
+                    headers[:] = [(k, v) for k, v in headers if k.lower() != b'etag']
+                    headers.append((b'etag', b'W/' + etag))
+                if not more:
+                    body = compress(body, encoding, self.brotli_quality if encoding == 'br' else self.gzip_level)
+                    headers.append((b'content-length', str(len(body)).encode()))
+                    await send(start)
+                    start = None
+                    await send({'type': 'http.response.body', 'body': body})
+                    return
+                compressor = _StreamCompressor(encoding, self.gzip_level, self.brotli_quality)
+                await send(start)
+                start = None
+            out = compressor.compress(body, flush) if body else b''
+            if not more:
+                out += compressor.finish()
+            if out or not more:
+                await send({'type': 'http.response.body', 'body': out, 'more_body': more})
+
+        await self.app(scope, receive, wrapped_send)
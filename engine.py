@@ -0,0 +1,887 @@
+"""DBLP 抓取引擎：搜索、BibTeX 获取及其依赖的缓存、限速、熔断与指标。
+
+不依赖 FastAPI / pydantic，网页服务（``app.py``）与命令行工具（``cli.py``）共用同一套流水线。
+配置均来自环境变量，在导入时读取。
+"""
+import asyncio
+import base64
+import json
+import logging
+import os
+import re
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlencode
+
+import httpx
+
+from bibtex import Entry, format_entry
+from cache import CacheEntry, DiskCache, MemoryCache, RedisCache, Transient
+from fuzzy import FuzzyIndex, normalize_query
+from health import CircuitBreaker, CircuitOpenError, HealthProber
+from metrics import Callback, Counter, Gauge, Histogram, per_scrape
+from mirrors import Mirror, MirrorPool
+from offline import BIB_STYLES, OfflineIndex
+from ratelimit import RateLimiter, RedisBudget, SharedRateLimiter, SqliteBudget, parse_retry_after
+from resolver import BibResolver
+
+logger = logging.getLogger(__name__)
+
+HTTP_PROXY = os.environ.get('HTTP_PROXY', '') # 例如: 'http://127.0.0.1:7890'
+HTTPS_PROXY = os.environ.get('HTTPS_PROXY', '') # 例如: 'https://127.0.0.1:7890'
+PROXIES = None
+if HTTP_PROXY or HTTPS_PROXY:
+    PROXIES = {}
+    if HTTP_PROXY:
+        PROXIES['http'] = HTTP_PROXY
+    if HTTPS_PROXY:
+        PROXIES['https'] = HTTPS_PROXY
+
+# 离线模式：设置转储路径后，搜索与 BibTeX 均由本地索引提供，不再访问 dblp.org
+DBLP_OFFLINE_DUMP = os.environ.get('DBLP_OFFLINE_DUMP', '') # 例如: '/data/dblp.xml.gz'
+DBLP_OFFLINE_INDEX = os.environ.get('DBLP_OFFLINE_INDEX', 'dblp_offline.sqlite3')
+DBLP_OFFLINE_REFRESH = float(os.environ.get('DBLP_OFFLINE_REFRESH', '3600'))
+offline_index: Optional[OfflineIndex] = OfflineIndex(DBLP_OFFLINE_INDEX) if DBLP_OFFLINE_DUMP else None
+
+# DBLP 地址：可指向镜像或本地的模拟服务（见 bench/）
+DBLP_BASE_URL = os.environ.get('DBLP_BASE_URL', 'https://dblp.org').rstrip('/')
+# 多个镜像（逗号分隔）：按各镜像的延迟与错误率选择，失败时改用下一个；未设置时只使用 DBLP_BASE_URL
+DBLP_MIRRORS = [u.strip() for u in os.environ.get('DBLP_MIRRORS', '').split(',') if u.strip()] or [DBLP_BASE_URL]
+DBLP_MIRROR_COOLDOWN = float(os.environ.get('DBLP_MIRROR_COOLDOWN', '30'))
+# 官方 DBLP 主机：请求 URL（包括搜索结果中的记录 URL）以这些地址开头时同样改写为所选镜像
+DBLP_HOSTS = ('https://dblp.org', 'https://dblp.uni-trier.de', 'https://dblp.dagstuhl.de')
+mirror_pool = MirrorPool(DBLP_MIRRORS, DBLP_HOSTS + (DBLP_BASE_URL,), cooldown=DBLP_MIRROR_COOLDOWN)
+
+# 连接池配置：所有 DBLP 请求复用同一个 AsyncClient（keep-alive）
+DBLP_MAX_CONNECTIONS = int(os.environ.get('DBLP_MAX_CONNECTIONS', '20'))
+DBLP_MAX_KEEPALIVE = int(os.environ.get('DBLP_MAX_KEEPALIVE', '10'))
+DBLP_KEEPALIVE_EXPIRY = float(os.environ.get('DBLP_KEEPALIVE_EXPIRY', '30'))
+DBLP_POOL_TIMEOUT = float(os.environ.get('DBLP_POOL_TIMEOUT', '60'))
+HEADERS = {'User-Agent': 'Mozilla/5.0'}
+
+# 持久化缓存：DBLP_CACHE_PATH 置空可禁用
+DBLP_CACHE_PATH = os.environ.get('DBLP_CACHE_PATH', 'dblp_cache.sqlite3')
+DBLP_CACHE_SEARCH_TTL = float(os.environ.get('DBLP_CACHE_SEARCH_TTL', str(7 * 24 * 3600)))
+DBLP_CACHE_BIB_TTL = float(os.environ.get('DBLP_CACHE_BIB_TTL', str(30 * 24 * 3600)))
+DBLP_CACHE_MAX_MB = float(os.environ.get('DBLP_CACHE_MAX_MB', '256'))
+DBLP_RESULTSET_TTL = float(os.environ.get('DBLP_RESULTSET_TTL', str(24 * 3600)))
+DBLP_MEMORY_CACHE_SIZE = int(os.environ.get('DBLP_MEMORY_CACHE_SIZE', '2048'))
+# 进程内条目的有效期不超过对应命名空间的 TTL 与该值中较小者，之后重新读取磁盘缓存（必要时向上游验证）
+DBLP_MEMORY_CACHE_TTL = float(os.environ.get('DBLP_MEMORY_CACHE_TTL', '3600'))
+
+# 模糊标题索引：本地置信度达到阈值时不再请求 DBLP
+DBLP_FUZZY_THRESHOLD = float(os.environ.get('DBLP_FUZZY_THRESHOLD', '0.9'))
+DBLP_FUZZY_MAX_RECORDS = int(os.environ.get('DBLP_FUZZY_MAX_RECORDS', '200000'))
+fuzzy_index = FuzzyIndex(DBLP_FUZZY_MAX_RECORDS)
+
+# 进程内 LRU 挡在磁盘缓存之前，同时合并并发的相同请求
+memory_cache = MemoryCache(DBLP_MEMORY_CACHE_SIZE, ttls={
+    'search': min(DBLP_CACHE_SEARCH_TTL, DBLP_MEMORY_CACHE_TTL),
+    'page': min(DBLP_CACHE_SEARCH_TTL, DBLP_MEMORY_CACHE_TTL),
+    'bib': min(DBLP_CACHE_BIB_TTL, DBLP_MEMORY_CACHE_TTL),
+})
+
+# 多 worker / 多主机部署时的共享后端：设置 DBLP_REDIS_URL 后，响应缓存与出站限速预算都放在 Redis
+# （或兼容的服务）中；否则缓存为 SQLite 文件（WAL，同一主机上的进程可共用），
+# DBLP_SHARED_RATELIMIT=1 时限速预算也放在 SQLite 中（DBLP_RATELIMIT_PATH，默认与缓存同一文件）
+DBLP_REDIS_URL = os.environ.get('DBLP_REDIS_URL', '') # 例如: 'redis://127.0.0.1:6379/0'
+DBLP_REDIS_PREFIX = os.environ.get('DBLP_REDIS_PREFIX', 'dblp:')
+DBLP_SHARED_RATELIMIT = os.environ.get('DBLP_SHARED_RATELIMIT', '') not in ('', '0', 'false')
+DBLP_RATELIMIT_PATH = os.environ.get('DBLP_RATELIMIT_PATH', DBLP_CACHE_PATH or 'dblp_ratelimit.sqlite3')
+
+def _redis_client():
+    try:
+        import redis
+    except ImportError:
+        raise RuntimeError('DBLP_REDIS_URL 需要 redis 包：pip install redis') from None
+    return redis.Redis.from_url(DBLP_REDIS_URL, socket_timeout=5, socket_connect_timeout=5)
+
+redis_client = _redis_client() if DBLP_REDIS_URL else None
+
+cache: Optional[Union[DiskCache, RedisCache]] = None
+if redis_client is not None:
+    cache = RedisCache(
+        redis_client,
+        ttls={'search': DBLP_CACHE_SEARCH_TTL, 'page': DBLP_CACHE_SEARCH_TTL, 'bib': DBLP_CACHE_BIB_TTL,
+              'resultset': DBLP_RESULTSET_TTL},
+        prefix=DBLP_REDIS_PREFIX,
+    )
+elif DBLP_CACHE_PATH:
+    cache = DiskCache(
+        DBLP_CACHE_PATH,
+        ttls={'search': DBLP_CACHE_SEARCH_TTL, 'page': DBLP_CACHE_SEARCH_TTL, 'bib': DBLP_CACHE_BIB_TTL,
+              'resultset': DBLP_RESULTSET_TTL},
+        max_bytes=int(DBLP_CACHE_MAX_MB * 1024 * 1024),
+    )
+
+
+# 全局限速：所有出站 DBLP 请求共享令牌桶
+DBLP_RATE = float(os.environ.get('DBLP_RATE', '3'))
+DBLP_BURST = int(os.environ.get('DBLP_BURST', '6'))
+DBLP_MAX_RETRIES = int(os.environ.get('DBLP_MAX_RETRIES', '3'))
+if redis_client is not None:
+    # 固定窗口长度取配置的突发量对应的时长，所有 worker 使用相同的窗口边界
+    rate_limiter: RateLimiter = SharedRateLimiter(
+        RedisBudget(redis_client, DBLP_REDIS_PREFIX, DBLP_BURST / DBLP_RATE), DBLP_RATE, DBLP_BURST)
+elif DBLP_SHARED_RATELIMIT:
+    rate_limiter = SharedRateLimiter(SqliteBudget(DBLP_RATELIMIT_PATH), DBLP_RATE, DBLP_BURST)
+else:
+    rate_limiter = RateLimiter(DBLP_RATE, DBLP_BURST)
+
+# BibTeX URL 解析：按各 URL 形式的历史表现排序，慢请求发起对冲，整条记录有统一截止时间
+DBLP_BIB_TIMEOUT = float(os.environ.get('DBLP_BIB_TIMEOUT', '8'))
+DBLP_BIB_DEADLINE = float(os.environ.get('DBLP_BIB_DEADLINE', '12'))
+DBLP_BIB_HEDGE_DELAY = float(os.environ.get('DBLP_BIB_HEDGE_DELAY', '2'))
+# 限速器有排队时不再对冲，避免对冲请求挤占预算
+bib_resolver = BibResolver(DBLP_BIB_DEADLINE, DBLP_BIB_HEDGE_DELAY,
+                           can_hedge=lambda: rate_limiter.waiting == 0,
+                           on_attempt=lambda name, outcome, elapsed:
+                               BIB_VARIANT_SECONDS.labels(name, outcome).observe(elapsed))
+
+# 后台健康探测与熔断：DBLP 不可用时上游请求立即失败并回退到缓存
+DBLP_PROBE_PATH = '/search/publ/api?q=test&h=1&format=json'
+DBLP_PROBE_INTERVAL = float(os.environ.get('DBLP_PROBE_INTERVAL', '30'))
+DBLP_PROBE_TIMEOUT = float(os.environ.get('DBLP_PROBE_TIMEOUT', '5'))
+DBLP_BREAKER_THRESHOLD = int(os.environ.get('DBLP_BREAKER_THRESHOLD', '5'))
+DBLP_BREAKER_RESET = float(os.environ.get('DBLP_BREAKER_RESET', '30'))
+breaker = CircuitBreaker(DBLP_BREAKER_THRESHOLD, DBLP_BREAKER_RESET)
+
+# 指标：GET /metrics 以 Prometheus 文本格式导出
+SEARCH_SECONDS = Histogram('dblp_search_seconds', '单个关键词搜索（含全部 BibTeX）的耗时', ['outcome'])
+SEARCH_FAILURES = Counter('dblp_search_failures_total', '关键词搜索失败次数', ['error'])
+SEARCHES_INFLIGHT = Gauge('dblp_searches_inflight', '进行中的关键词搜索数')
+BIBTEX_SECONDS = Histogram('dblp_bibtex_seconds', '单条记录取得 BibTeX 的耗时（fallback 为改用简易生成）', ['source'])
+BIB_VARIANT_SECONDS = Histogram('dblp_bib_variant_seconds', '各 BibTeX URL 形式单次请求的耗时', ['variant', 'outcome'])
+UPSTREAM_SECONDS = Histogram('dblp_upstream_request_seconds', '单次 DBLP 请求的耗时（不含限速排队）', ['kind'])
+UPSTREAM_RESPONSES = Counter('dblp_upstream_responses_total', 'DBLP 响应状态码计数', ['kind', 'code'])
+UPSTREAM_ERRORS = Counter('dblp_upstream_errors_total', 'DBLP 请求超时、网络错误与熔断拒绝次数', ['kind', 'error'])
+UPSTREAM_REVALIDATIONS = Counter('dblp_upstream_revalidations_total',
+                                 '过期缓存条目的条件请求结果（not_modified 为沿用缓存内容）', ['kind', 'result'])
+UPSTREAM_INFLIGHT = Gauge('dblp_upstream_inflight', '进行中的 DBLP 请求数', ['kind'])
+MIRROR_FAILOVERS = Counter('dblp_mirror_failovers_total', '请求失败后改用下一个镜像的次数', ['kind'])
+
+def error_kind(e: BaseException) -> str:
+    if isinstance(e, CircuitOpenError):
+        return 'circuit_open'
+    if isinstance(e, httpx.TimeoutException):
+        return 'timeout'
+    if isinstance(e, httpx.TransportError):
+        return 'network'
+    if isinstance(e, httpx.HTTPError):
+        return 'http'
+    return 'internal'
+
+def _raise_for_upstream(r: httpx.Response):
+    """把 DBLP 的非 200 响应（重试后仍为 429、5xx 等）作为失败抛出，而不是当作“没有结果”。"""
+    raise httpx.HTTPStatusError(f'DBLP 返回 {r.status_code}', request=r.request, response=r)
+
+# 磁盘缓存统计需要查询数据库：每次抓取只查询一次，三个指标共用
+_disk_cache_snapshot = per_scrape(lambda: cache.stats()['namespaces'] if cache is not None else {})
+
+def _disk_cache_stats(field: str) -> dict:
+    return {(ns,): info[field] for ns, info in _disk_cache_snapshot().items()}
+
+# 缓存、限速器等组件自带统计，抓取时读取
+Callback('dblp_cache_hits_total', '磁盘缓存命中次数', 'counter', lambda: _disk_cache_stats('hits'), ['namespace'])
+Callback('dblp_cache_misses_total', '磁盘缓存未命中次数', 'counter', lambda: _disk_cache_stats('misses'), ['namespace'])
+Callback('dblp_cache_bytes', '磁盘缓存各命名空间占用字节数', 'gauge', lambda: _disk_cache_stats('bytes'), ['namespace'])
+Callback('dblp_memory_cache_lookups_total', '进程内缓存查找次数（coalesced 为合并到进行中的相同请求）', 'counter',
+         lambda: {(r,): memory_cache.stats()[r] for r in ('hits', 'misses', 'coalesced')}, ['result'])
+Callback('dblp_fuzzy_lookups_total', '模糊标题索引查找次数（confident 为达到阈值、免去 DBLP 请求）', 'counter',
+         lambda: {('all',): fuzzy_index.lookups, ('confident',): fuzzy_index.confident,
+                  ('skipped',): fuzzy_index.skipped}, ['result'])
+Callback('dblp_ratelimit_rate', '自适应限速器当前速率（请求/秒）', 'gauge', lambda: {(): rate_limiter.rate})
+Callback('dblp_ratelimit_queue_depth', '等待限速令牌的请求数', 'gauge', lambda: {(): rate_limiter.waiting})
+Callback('dblp_circuit_open', '熔断器是否处于断开或半开状态', 'gauge',
+         lambda: {(): float(breaker.state != CircuitBreaker.CLOSED)})
+Callback('dblp_mirror_latency_seconds', '各镜像的滚动平均延迟（含后台探测）', 'gauge',
+         lambda: {(m.base_url,): m.latency for m in mirror_pool.mirrors if m.latency is not None}, ['mirror'])
+Callback('dblp_mirror_requests_total', '各镜像的请求数（含后台探测）', 'counter',
+         lambda: {k: v for m in mirror_pool.mirrors
+                  for k, v in (((m.base_url, 'ok'), m.requests - m.errors), ((m.base_url, 'error'), m.errors))},
+         ['mirror', 'outcome'])
+
+_client: Optional[httpx.AsyncClient] = None
+
+def get_client() -> httpx.AsyncClient:
+    """返回进程内共享的 AsyncClient，首次调用时按配置创建。"""
+    global _client
+    if _client is None or _client.is_closed:
+        limits = httpx.Limits(
+            max_connections=DBLP_MAX_CONNECTIONS,
+            max_keepalive_connections=DBLP_MAX_KEEPALIVE,
+            keepalive_expiry=DBLP_KEEPALIVE_EXPIRY,
+        )
+        mounts = None
+        if PROXIES:
+            mounts = {f'{scheme}://': httpx.AsyncHTTPTransport(proxy=proxy, limits=limits)
+                      for scheme, proxy in PROXIES.items()}
+        _client = httpx.AsyncClient(limits=limits, mounts=mounts, headers=HEADERS, follow_redirects=True)
+    return _client
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+async def refresh_offline_index():
+    """后台构建离线索引，并定期检查是否放入了更新的转储。"""
+    while True:
+        try:
+            stats = await asyncio.to_thread(offline_index.refresh, DBLP_OFFLINE_DUMP)
+            if stats.get('updated'):
+                logger.info('离线索引已刷新: %s', stats)
+                memory_cache.clear()
+        except Exception:
+            logger.exception('离线索引刷新失败')
+        await asyncio.sleep(DBLP_OFFLINE_REFRESH)
+
+def warm_fuzzy_index():
+    """启动时用磁盘缓存中已解析过的搜索结果填充模糊索引。"""
+    if cache is None:
+        return
+    for hits in cache.iter_values('search'):
+        fuzzy_index.add_many(h.get('info', {}) for h in hits)
+
+def _timeout(seconds: float) -> httpx.Timeout:
+    # 等待连接池空位不计入单次请求超时，避免批量并发时误判超时
+    return httpx.Timeout(seconds, pool=DBLP_POOL_TIMEOUT)
+
+async def _dblp_get(url: str, timeout: float, kind: str, headers: Optional[dict] = None,
+                    on_sent: Optional[Callable[[], None]] = None) -> httpx.Response:
+    """经熔断器与全局限速器发出 GET；遇到 429/503 时退避后重试，其他失败时改用下一个镜像。
+
+    熔断器断开时抛出 ``CircuitOpenError``；全部镜像都超时、连接错误或返回 5xx 时计为熔断失败。
+    ``on_sent`` 在每次取得限速令牌、请求即将发出时调用。
+    """
+    if not breaker.allow():
+        UPSTREAM_ERRORS.labels(kind, 'circuit_open').inc()
+        raise CircuitOpenError('DBLP 暂时不可用，熔断期间暂停请求')
+    try:
+        r = await _mirror_get(url, timeout, kind, headers, on_sent)
+    except httpx.HTTPError as e:
+        UPSTREAM_ERRORS.labels(kind, error_kind(e)).inc()
+        breaker.record_failure()
+        raise
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+    if r.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return r
+
+async def _mirror_get(url: str, timeout: float, kind: str, headers: Optional[dict],
+                      on_sent: Optional[Callable[[], None]]) -> httpx.Response:
+    """按健康度依次尝试各镜像：网络错误、超时与 5xx 时改用下一个，最后一个镜像的结果原样返回或抛出。
+
+    某个镜像返回 429/503 时只让该镜像退避并立即改用下一个；只有最后一个镜像仍然限流时，
+    才在原地退避重试并降低全局速率。
+    """
+    path = mirror_pool.path(url)
+    targets = [(m, m.base_url + path) for m in mirror_pool.ranked()] if path is not None else [(None, url)]
+    for i, (mirror, target) in enumerate(targets):
+        last = i == len(targets) - 1
+        try:
+            r, elapsed = await _get_with_retries(target, timeout, kind, headers, on_sent, retry=last)
+        except httpx.HTTPError as e:
+            if mirror is None:
+                raise
+            mirror_pool.record(mirror, 0.0, False)
+            if last:
+                raise
+            logger.debug('镜像 %s 请求失败，改用下一个: %r', mirror.base_url, e)
+        else:
+            if mirror is None:
+                return r
+            if r.status_code in (429, 503) and not last:
+                mirror_pool.throttle(mirror, parse_retry_after(r.headers.get('Retry-After')))
+            else:
+                mirror_pool.record(mirror, elapsed, r.status_code < 500)
+                if r.status_code < 500 or last:
+                    return r
+            logger.debug('镜像 %s 返回 %d，改用下一个', mirror.base_url, r.status_code)
+        mirror_pool.failovers += 1
+        MIRROR_FAILOVERS.labels(kind).inc()
+
+async def _get_with_retries(url: str, timeout: float, kind: str, headers: Optional[dict],
+                            on_sent: Optional[Callable[[], None]], retry: bool = True) -> Tuple[httpx.Response, float]:
+    """返回响应与最后一次请求的耗时（不含限速排队，供镜像排序使用）。
+
+    ``retry`` 为假时 429/503 原样返回，由调用方改用其他镜像，不触发全局退避。
+    """
+    for attempt in range(DBLP_MAX_RETRIES + 1 if retry else 1):
+        await rate_limiter.acquire()
+        if on_sent is not None:
+            on_sent()
+        started = time.perf_counter()
+        with UPSTREAM_INFLIGHT.labels(kind).track(), UPSTREAM_SECONDS.labels(kind).time():
+            r = await get_client().get(url, headers=headers, timeout=_timeout(timeout))
+        UPSTREAM_RESPONSES.labels(kind, r.status_code).inc()
+        if r.status_code not in (429, 503):
+            rate_limiter.on_success()
+            break
+        if not retry:
+            break
+        rate_limiter.on_throttled(parse_retry_after(r.headers.get('Retry-After')))
+    return r, time.perf_counter() - started
+
+_probes: set = set()
+
+async def _probe_mirror(mirror: Mirror) -> bool:
+    started = time.perf_counter()
+    try:
+        r = await get_client().get(mirror.base_url + DBLP_PROBE_PATH, timeout=_timeout(DBLP_PROBE_TIMEOUT))
+        ok = r.status_code == 200
+    except httpx.HTTPError:
+        ok = False
+    mirror_pool.record(mirror, time.perf_counter() - started, ok)
+    return ok
+
+async def _probe_dblp() -> bool:
+    # 探测请求不经过限速器与熔断器：它本身就是熔断器恢复的依据。
+    # 同时探测全部镜像，任一可达即返回；其余镜像的探测在后台完成，只用于更新其延迟与错误率
+    tasks = [asyncio.create_task(_probe_mirror(m)) for m in mirror_pool.mirrors]
+    for task in tasks:
+        _probes.add(task)
+        task.add_done_callback(_probes.discard)
+    for done in asyncio.as_completed(tasks):
+        if await done:
+            return True
+    return False
+
+prober = HealthProber(_probe_dblp, DBLP_PROBE_INTERVAL, breaker)
+
+_KEY_BASE_RE = re.compile(r'[^a-zA-Z0-9]+')
+
+def generate_bibtex_simple(title: str, authors: List[str], year: Optional[str], url: Optional[str]) -> str:
+    key_base = _KEY_BASE_RE.sub('_', (title or 'entry').lower()).strip('_')
+    key_year = year if year and str(year).isdigit() else 'noyear'
+    # 标题外加一层花括号保留大小写；作者之间用 and 分隔（不能整体加花括号，否则会被当成一个作者）
+    fields = [('title', f'{{{{{title}}}}}'), ('author', '{' + (' and '.join(a for a in authors if a) or 'Unknown') + '}')]
+    if year:
+        fields.append(('year', f'{{{year}}}'))
+    if url:
+        fields.append(('url', f'{{{url}}}'))
+    return format_entry(Entry('article', f'{key_base[:40]}_{key_year}', fields))
+
+def _dblp_authors(info_authors) -> List[str]:
+    names = []
+    if isinstance(info_authors, dict) and 'author' in info_authors:
+        authors = info_authors['author']
+        if isinstance(authors, list):
+            for a in authors:
+                t = a.get('text') if isinstance(a, dict) else str(a)
+                if t:
+                    names.append(t)
+        elif isinstance(authors, dict):
+            t = authors.get('text')
+            if t:
+                names.append(t)
+        else:
+            t = str(authors)
+            if t:
+                names.append(t)
+    return names
+
+# DBLP .bib 接口的格式（BIB_STYLES）：condensed 只含核心字段，standard 并入会议录信息，
+# crossref 以 crossref 字段引用会议录记录，导出时每个会议录只输出一次
+DEFAULT_BIB_STYLE = 'standard'
+_ENTRY_START_RE = re.compile(r'^@', re.M)
+_ENTRY_KEY_RE = re.compile(r'@\w+\s*\{\s*(?:DBLP:)?([^,\s]+)\s*,')
+_CROSSREF_FIELD_RE = re.compile(r'^\s*crossref\s*=\s*\{(?:DBLP:)?([^}]+)\}', re.M | re.I)
+
+def _styled_url(url: str, style: str) -> str:
+    if style == DEFAULT_BIB_STYLE:
+        return url
+    return f"{url}{'&' if '?' in url else '?'}param={BIB_STYLES.index(style)}"
+
+def _bib_cache_key(key: str, style: str) -> str:
+    # standard 格式沿用原有的缓存 key，其余格式分开缓存
+    return key if style == DEFAULT_BIB_STYLE else f'{key}\n{style}'
+
+def crossref_key(bibtex: str) -> Optional[str]:
+    """条目 ``crossref`` 字段引用的 DBLP 记录 key（不带 ``DBLP:`` 前缀）。"""
+    m = _CROSSREF_FIELD_RE.search(bibtex)
+    return m.group(1).strip() if m else None
+
+# 磁盘缓存（SQLite）与 Redis 的调用都是阻塞 I/O，放到线程中执行，不阻塞事件循环
+async def _cache_lookup(namespace: str, key: str) -> Optional[CacheEntry]:
+    return await asyncio.to_thread(cache.lookup, namespace, key) if cache is not None else None
+
+async def _cache_set(namespace: str, key: str, value, **validators):
+    if cache is not None:
+        await asyncio.to_thread(cache.set, namespace, key, value, **validators)
+
+async def _own_entry(text: str) -> str:
+    """crossref 格式的响应在条目之后附有父记录：只保留条目本身，父记录按 standard 格式写入缓存。"""
+    starts = [m.start() for m in _ENTRY_START_RE.finditer(text)]
+    if len(starts) < 2:
+        return text
+    for start, end in zip(starts[1:], starts[2:] + [len(text)]):
+        parent = text[start:end].strip() + '\n'
+        m = _ENTRY_KEY_RE.match(parent)
+        # 父记录的 standard 格式与 crossref 响应中附带的相同，已缓存时不覆盖（保留其校验信息）
+        if m and offline_index is None and await _cache_lookup('bib', m.group(1)) is None:
+            await _cache_set('bib', m.group(1), parent)
+    return text[:starts[1]].rstrip() + '\n'
+
+async def _fetch_bibtex_from_info(info: dict, style: str = DEFAULT_BIB_STYLE) -> Optional[str]:
+    k = info.get('key')
+    if not k:
+        text = await _load_bibtex(info, style)
+        return text.value if isinstance(text, Transient) else text
+    return await memory_cache.get_or_load(('bib', k, style), lambda: _load_bibtex(info, style))
+
+async def _load_bibtex(info: dict, style: str = DEFAULT_BIB_STYLE) -> Union[str, Transient, None]:
+    text = await _load_bibtex_text(info, style)
+    if style != 'crossref':
+        return text
+    if isinstance(text, Transient):
+        return Transient(await _own_entry(text.value))
+    return await _own_entry(text) if text else text
+
+async def _load_bibtex_text(info: dict, style: str) -> Union[str, Transient, None]:
+    urls = []
+    u = info.get('url')
+    k = info.get('key')
+    if offline_index is not None:
+        # FTS5 查询与渲染在线程中执行，大索引上也不阻塞事件循环
+        return await asyncio.to_thread(offline_index.bibtex, k, style) if k else None
+    cache_key = _bib_cache_key(k, style) if k else None
+    entry = await _cache_lookup('bib', cache_key) if k else None
+    if entry is not None and entry.fresh:
+        return entry.value
+    if breaker.blocking():
+        return _fallback(entry)
+    if entry is not None and entry.source and (entry.etag or entry.last_modified):
+        text = await _revalidate_bibtex(cache_key, entry)
+        if text is not None:
+            return text
+    if u:
+        urls.append(('url.bib', u + '.bib' if not u.endswith('.bib') else u))
+        urls.append(('url?view=bibtex', u + '?view=bibtex'))
+    if k:
+        urls.append(('rec/bibtex/key.bib', f'{DBLP_BASE_URL}/rec/bibtex/{k}.bib'))
+        urls.append(('rec/key.bib', f'{DBLP_BASE_URL}/rec/{k}.bib'))
+    seen = set()
+    candidates = []
+    for name, url in urls:
+        url = _styled_url(url, style)
+        if url not in seen:
+            seen.add(url)
+            candidates.append((name, url))
+    r = await bib_resolver.resolve(candidates, _fetch_bib_url)
+    if r is None:
+        return _fallback(entry)
+    if k:
+        await _cache_set('bib', cache_key, r.text, **_validators(r))
+    return r.text
+
+def _fallback(entry: Optional[CacheEntry]) -> Optional[Transient]:
+    """上游不可用时回退到已过期但尚未淘汰的缓存条目；回退值不写入进程内缓存，恢复后重新获取。"""
+    return Transient(entry.value) if entry is not None else None
+
+def _validators(r: httpx.Response) -> dict:
+    return {'source': str(r.url), 'etag': r.headers.get('ETag'), 'last_modified': r.headers.get('Last-Modified')}
+
+def _conditional_headers(entry: Optional[CacheEntry]) -> Optional[dict]:
+    """过期条目带有校验信息时，构造条件请求头；内容未变时 DBLP 返回 304，不再传输正文。"""
+    if entry is None:
+        return None
+    headers = {}
+    if entry.etag:
+        headers['If-None-Match'] = entry.etag
+    if entry.last_modified:
+        headers['If-Modified-Since'] = entry.last_modified
+    return headers or None
+
+async def _not_modified(namespace: str, key: str, entry: CacheEntry, r: httpx.Response, kind: str):
+    UPSTREAM_REVALIDATIONS.labels(kind, 'not_modified').inc()
+    await asyncio.to_thread(cache.touch, namespace, key, r.headers.get('ETag'), r.headers.get('Last-Modified'))
+    return entry.value
+
+async def _revalidate_bibtex(key: str, entry: CacheEntry) -> Optional[str]:
+    """向上次取得该条目的 URL 发出条件请求；失败时返回 None，由调用方按常规流程重新获取。"""
+    try:
+        r = await _dblp_get(entry.source, DBLP_BIB_TIMEOUT, 'bib', _conditional_headers(entry))
+    except (CircuitOpenError, httpx.HTTPError) as e:
+        logger.debug('BibTeX 条件请求失败 %s: %r', entry.source, e)
+        return None
+    if r.status_code == 304:
+        return await _not_modified('bib', key, entry, r, 'bib')
+    if r.status_code == 200 and r.text.strip().startswith('@'):
+        UPSTREAM_REVALIDATIONS.labels('bib', 'modified').inc()
+        await _cache_set('bib', key, r.text, **_validators(r))
+        return r.text
+    return None
+
+async def _fetch_bib_url(url: str, on_sent: Callable[[], None]) -> Optional[httpx.Response]:
+    r = await _dblp_get(url, DBLP_BIB_TIMEOUT, 'bib', on_sent=on_sent)
+    if r.status_code == 200 and r.text.strip().startswith('@'):
+        return r
+    return None
+
+async def paper_from_hit(hit: dict, with_bibtex: bool = True, style: str = DEFAULT_BIB_STYLE) -> dict:
+    """由搜索 hit 生成论文条目；``with_bibtex`` 为假时只保留搜索结果自带的元数据，不发出额外请求。
+
+    ``style`` 为 crossref 时条目另带 ``crossref``（被引用的会议录记录 key），导出时据此附上父记录。
+    """
+    info = hit.get('info', {})
+    title = info.get('title', 'N/A')
+    authors = _dblp_authors(info.get('authors'))
+    year = str(info.get('year')) if info.get('year') else None
+    paper = {'title': title, 'authors': authors, 'year': year}
+    for field in ('key', 'venue', 'doi', 'url'):
+        if info.get(field):
+            paper[field] = info[field]
+    if 'score' in hit:
+        paper['confidence'] = hit['score']
+    if hit.get('shortcut'):
+        # 不在 format_paper 的输出中，只供 next_cursor 使用
+        paper['shortcut'] = True
+    if with_bibtex:
+        started = time.perf_counter()
+        bibtex = await _fetch_bibtex_from_info(info, style)
+        if bibtex:
+            BIBTEX_SECONDS.labels('dblp').observe(time.perf_counter() - started)
+            if style == 'crossref' and crossref_key(bibtex):
+                paper['crossref'] = crossref_key(bibtex)
+        else:
+            bibtex = generate_bibtex_simple(title, authors, year, info.get('url'))
+            BIBTEX_SECONDS.labels('fallback').observe(time.perf_counter() - started)
+            # 未能从 DBLP 取得 BibTeX，改用本地生成的简易条目：标记出来，供客户端提示与重试
+            paper['fallback'] = True
+        paper['bibtex'] = bibtex
+    return paper
+
+def _query_key(query: str) -> str:
+    # 去掉 LaTeX 转义、标点（C++、C#、.NET 中的符号除外）与大小写差异后作为缓存键；发给 DBLP 的仍是原始查询（只折叠空白），
+    # 非拉丁文字与 $、| 等运算符原样保留
+    return normalize_query(query) or ' '.join(query.split()).casefold()
+
+def next_cursor(query: str, hits: List[dict], num_results: int) -> Optional[str]:
+    """关键词首页之后的翻页游标：首页已满时从下一页继续；首页由模糊索引直接给出时从 DBLP 的第一页开始
+    （客户端按 key 去掉已显示的记录）；没有更多结果时返回 None。``hits`` 也可以是由其生成的论文条目。"""
+    if hits and hits[0].get('shortcut'):
+        return encode_cursor(query, 0, num_results)
+    if len(hits) >= num_results:
+        return encode_cursor(query, num_results, num_results)
+    return None
+
+def _scored_hits(matches) -> List[dict]:
+    return [{'info': info, 'score': round(score, 3)} for score, info in matches]
+
+async def search_hits(query: str, num_results: int) -> Optional[List[dict]]:
+    """调用 DBLP 搜索接口，返回原始 hit 列表；请求失败时返回 None。"""
+    matches = fuzzy_index.match(query, DBLP_FUZZY_THRESHOLD, num_results)
+    if matches:
+        # 本地匹配不知道 DBLP 上的结果总数，标记出来，由 next_cursor 从 DBLP 的第一页继续
+        return [{**hit, 'shortcut': True} for hit in _scored_hits(matches)]
+    key = _query_key(query)
+    query = ' '.join(query.split())
+    return await memory_cache.get_or_load(('search', key, num_results),
+                                          lambda: _load_search_hits(query, key, num_results))
+
+async def _load_search_hits(query: str, key: str, num_results: int) -> Union[List[dict], Transient, None]:
+    if offline_index is not None:
+        # 多取一些全文检索候选，再按标题相似度重排
+        candidates = await asyncio.to_thread(offline_index.search, query, max(num_results, 20))
+        return _scored_hits(fuzzy_index.rerank(query, [h['info'] for h in candidates])[:num_results])
+    cache_key = f'{key}\n{num_results}'
+    entry = await _cache_lookup('search', cache_key)
+    if entry is not None and entry.fresh:
+        fuzzy_index.add_many(h.get('info', {}) for h in entry.value)
+        return entry.value
+    params = {'q': query, 'h': num_results, 'f': 0, 'format': 'json'}
+    url = f'{DBLP_BASE_URL}/search/publ/api?' + urlencode(params)
+    try:
+        r = await _dblp_get(url, 30, 'search', _conditional_headers(entry))
+    except (CircuitOpenError, httpx.HTTPError):
+        if entry is None:
+            raise
+        return _fallback(entry)
+    if r.status_code == 304 and entry is not None:
+        return await _not_modified('search', cache_key, entry, r, 'search')
+    if r.status_code != 200:
+        if entry is None:
+            _raise_for_upstream(r)
+        return _fallback(entry)
+    if entry is not None:
+        UPSTREAM_REVALIDATIONS.labels('search', 'modified').inc()
+    data = r.json()
+    hits = data.get('result', {}).get('hits', {}).get('hit', [])
+    if isinstance(hits, dict):
+        hits = [hits]
+    await _cache_set('search', cache_key, hits, **_validators(r))
+    fuzzy_index.add_many(h.get('info', {}) for h in hits)
+    return hits
+
+async def search_keyword(query: str, num_results: int = 10, with_bibtex: bool = True,
+                         style: str = DEFAULT_BIB_STYLE) -> List[dict]:
+    """搜索单个关键词；DBLP 请求失败时记录日志与指标后重新抛出，调用方据此区分“没有结果”与“失败”。"""
+    results = []
+    outcome = 'empty'
+    started = time.perf_counter()
+    with SEARCHES_INFLIGHT.track():
+        try:
+            hits = await search_hits(query, num_results)
+            if hits is None:
+                raise httpx.HTTPError('DBLP 搜索请求失败')
+            if hits:
+                # 各条结果的 BibTeX 并发获取，gather 保持原有顺序
+                results = list(await asyncio.gather(*(paper_from_hit(h, with_bibtex, style)
+                                                      for h in hits[:num_results])))
+                outcome = 'ok'
+        except Exception as e:
+            outcome = 'error'
+            SEARCH_FAILURES.labels(error_kind(e)).inc()
+            logger.warning('搜索 %r 失败: %r', query, e)
+            raise
+        finally:
+            SEARCH_SECONDS.labels(outcome).observe(time.perf_counter() - started)
+    return results
+
+async def search_dblp(query: str, num_results: int = 10, with_bibtex: bool = True,
+                      style: str = DEFAULT_BIB_STYLE) -> List[dict]:
+    """搜索单个关键词；失败时返回空列表（日志与指标由 ``search_keyword`` 记录），不影响同批其他关键词。"""
+    try:
+        return await search_keyword(query, num_results, with_bibtex, style)
+    except Exception:
+        return []
+
+# 分页搜索：基于 DBLP 搜索接口的 f（偏移）/ h（条数）参数，单页最多 1000 条（DBLP 的上限）
+DBLP_PAGE_MAX_SIZE = 1000
+# 返回一页后在后台预取下一页，置 0 关闭
+DBLP_PAGE_PREFETCH = os.environ.get('DBLP_PAGE_PREFETCH', '1') not in ('', '0', 'false')
+_prefetches: set = set()
+
+def encode_cursor(query: str, offset: int, size: int) -> str:
+    """游标即 ``(查询, 偏移, 每页条数)`` 的 URL 安全编码，服务端不保存状态。"""
+    raw = json.dumps([query, offset, size], ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Optional[Tuple[str, int, int]]:
+    """解析游标，格式不合法时返回 None。"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        query, offset, size = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not (isinstance(query, str) and isinstance(offset, int) and isinstance(size, int)):
+        return None
+    if offset < 0 or not 1 <= size <= DBLP_PAGE_MAX_SIZE:
+        return None
+    return query, offset, size
+
+async def search_page(query: str, offset: int, size: int) -> Optional[dict]:
+    """取得一页搜索结果 ``{'hits': [...], 'total': 命中总数}``；请求失败时返回 None。
+
+    每页按 ``(查询, 偏移, 条数)`` 缓存，翻回已看过的页不再请求 DBLP。
+    """
+    key = _query_key(query)
+    query = ' '.join(query.split())
+    return await memory_cache.get_or_load(('page', key, offset, size),
+                                          lambda: _load_search_page(query, key, offset, size))
+
+async def _load_search_page(query: str, key: str, offset: int, size: int) -> Union[dict, Transient, None]:
+    if offline_index is not None:
+        # 本地全文检索没有总数，多取一条用于判断是否还有下一页
+        hits = await asyncio.to_thread(offline_index.search, query, offset + size + 1)
+        return {'hits': hits[offset:offset + size], 'total': len(hits)}
+    cache_key = f'{key}\n{offset}\n{size}'
+    entry = await _cache_lookup('page', cache_key)
+    if entry is not None and entry.fresh:
+        return entry.value
+    params = {'q': query, 'h': size, 'f': offset, 'format': 'json'}
+    url = f'{DBLP_BASE_URL}/search/publ/api?' + urlencode(params)
+    try:
+        r = await _dblp_get(url, 30, 'search', _conditional_headers(entry))
+    except (CircuitOpenError, httpx.HTTPError):
+        if entry is None:
+            raise
+        return _fallback(entry)
+    if r.status_code == 304 and entry is not None:
+        return await _not_modified('page', cache_key, entry, r, 'search')
+    if r.status_code != 200:
+        if entry is None:
+            _raise_for_upstream(r)
+        return _fallback(entry)
+    if entry is not None:
+        UPSTREAM_REVALIDATIONS.labels('search', 'modified').inc()
+    found = r.json().get('result', {}).get('hits', {})
+    hits = found.get('hit', [])
+    if isinstance(hits, dict):
+        hits = [hits]
+    try:
+        total = int(found.get('@total', len(hits)))
+    except (TypeError, ValueError):
+        total = offset + len(hits)
+    page = {'hits': hits, 'total': total}
+    await _cache_set('page', cache_key, page, **_validators(r))
+    fuzzy_index.add_many(h.get('info', {}) for h in hits)
+    return page
+
+def prefetch_page(query: str, offset: int, size: int):
+    """在后台预取一页；限速器有排队或熔断期间跳过，避免预取挤占正常请求。"""
+    if not DBLP_PAGE_PREFETCH or rate_limiter.waiting or breaker.blocking():
+        return
+
+    async def run():
+        try:
+            await search_page(query, offset, size)
+        except Exception as e:
+            logger.debug('预取 %r（偏移 %d）失败: %r', query, offset, e)
+
+    task = asyncio.ensure_future(run())
+    # 保留引用，防止任务在完成前被回收
+    _prefetches.add(task)
+    task.add_done_callback(_prefetches.discard)
+
+def format_paper(paper: dict) -> dict:
+    result = {
+        'title': paper.get('title', 'N/A'),
+        'authors': ', '.join(paper.get('authors', [])) if paper.get('authors') else 'N/A',
+        'year': str(paper.get('year', 'N/A')),
+    }
+    # 只返回元数据的搜索没有 bibtex 字段
+    for field in ('bibtex', 'fallback', 'key', 'venue', 'doi', 'url', 'confidence', 'merged', 'crossref'):
+        if field in paper:
+            result[field] = paper[field]
+    return result
+
+CORR_PREFIX = 'journals/corr/'
+# 预印本与正式版本的标题相似度下限；比模糊匹配阈值更严，避免把 Part I / Part II 之类合并
+PREPRINT_MERGE_SIMILARITY = 0.97
+_HOMONYM_SUFFIX_RE = re.compile(r' \d{4}$')
+
+def _first_author_surname(info: dict) -> str:
+    names = _dblp_authors(info.get('authors'))
+    if not names:
+        return ''
+    return _HOMONYM_SUFFIX_RE.sub('', names[0]).split()[-1].casefold()
+
+def _published_version(info: dict) -> Optional[dict]:
+    """在模糊索引中查找 CoRR 预印本对应的正式发表版本（标题几乎相同且第一作者一致）。"""
+    surname = _first_author_surname(info)
+    for score, other in fuzzy_index.lookup(info.get('title') or '', limit=4):
+        key = other.get('key') or ''
+        if (score >= PREPRINT_MERGE_SIMILARITY and key and not key.startswith(CORR_PREFIX)
+                and _first_author_surname(other) == surname):
+            return other
+    return None
+
+class BatchPlan:
+    """同一批关键词的 hit 按 DBLP key 去重，每条记录只获取一次 BibTeX。
+
+    ``merge_corr`` 为真时，CoRR 预印本若能找到正式发表版本，则并入后者（记录在 ``merged`` 中）。
+    """
+
+    def __init__(self, merge_corr: bool = False):
+        self.merge_corr = merge_corr
+        self.hits: List[dict] = []
+        self.merged: Dict[int, List[str]] = {}
+        self._slots: Dict[str, int] = {}
+
+    def add(self, hits: List[dict]) -> List[Tuple[int, bool]]:
+        """登记一个关键词的 hit，返回每个 hit 对应的 ``(结果序号, 是否首次出现)``。"""
+        claimed = []
+        for hit in hits:
+            info = hit.get('info', {})
+            key = info.get('key')
+            preprint = None
+            if self.merge_corr and key and key.startswith(CORR_PREFIX):
+                published = _published_version(info)
+                if published is not None:
+                    preprint, key = key, published['key']
+                    hit = {**hit, 'info': published}
+            slot = self._slots.get(key) if key else None
+            first = slot is None
+            if first:
+                slot = len(self.hits)
+                self.hits.append(hit)
+                if key:
+                    self._slots[key] = slot
+            if preprint and preprint not in self.merged.get(slot, []):
+                self.merged.setdefault(slot, []).append(preprint)
+            claimed.append((slot, first))
+        return claimed
+
+async def _keyword_hits(query: str, num_results: int) -> Tuple[List[dict], Optional[str]]:
+    try:
+        hits = await search_hits(query, num_results)
+        if hits is None:
+            raise httpx.HTTPError('DBLP 搜索请求失败')
+        return hits[:num_results], None
+    except Exception as e:
+        SEARCH_FAILURES.labels(error_kind(e)).inc()
+        logger.warning('搜索 %r 失败: %r', query, e)
+        return [], error_kind(e)
+
+async def search_batch(keywords: List[str], num_results: int, merge_corr: bool = False,
+                       with_bibtex: bool = True, style: str = DEFAULT_BIB_STYLE) -> Tuple[List[dict], List[dict]]:
+    """批量搜索：先取得全部关键词的 hit 并按 DBLP key 去重，再为每条记录获取一次 BibTeX。
+
+    返回 ``(论文列表, 关键词映射)``；映射中每项为 ``{'keyword', 'results': [论文序号...]}``，
+    搜索失败的关键词另带 ``error``。
+    """
+    plan = BatchPlan(merge_corr)
+    found = await asyncio.gather(*(_keyword_hits(k, num_results) for k in keywords))
+    mapping = []
+    for keyword, (hits, error) in zip(keywords, found):
+        entry = {'keyword': keyword, 'results': list(dict.fromkeys(slot for slot, _ in plan.add(hits)))}
+        cursor = next_cursor(keyword, hits, num_results)
+        if error:
+            entry['error'] = error
+        elif cursor is not None:
+            entry['next_cursor'] = cursor
+        mapping.append(entry)
+    papers = list(await asyncio.gather(*(paper_from_hit(h, with_bibtex, style) for h in plan.hits)))
+    for slot, preprints in plan.merged.items():
+        papers[slot]['merged'] = preprints
+    return papers, mapping
+
+_DBLP_KEY_RE = re.compile(r'[\w+\-.]+(/[\w+\-.]+)+')
+
+def is_dblp_key(key: str) -> bool:
+    """DBLP 记录 key 形如 ``conf/nips/VaswaniSPUJGKP17``；拒绝 ``..`` 等会改变请求路径的输入。"""
+    if key.startswith('DBLP:'):
+        key = key[len('DBLP:'):]
+    return bool(_DBLP_KEY_RE.fullmatch(key)) and '..' not in key
+
+async def fetch_bibtex_by_key(key: str, style: str = DEFAULT_BIB_STYLE) -> Optional[str]:
+    """按 DBLP 记录 key（可带 ``DBLP:`` 前缀，如 ``.aux`` 中的引用键）直接获取 BibTeX。"""
+    if not is_dblp_key(key):
+        return None
+    if key.startswith('DBLP:'):
+        key = key[len('DBLP:'):]
+    return await _fetch_bibtex_from_info({'key': key}, style)
+
+async def crossref_parents(entries: Iterable[dict]) -> List[str]:
+    """导出 crossref 格式的条目时需附上的父记录（standard 格式）：每个父记录只获取并输出一次。
+
+    条目的 ``crossref`` 字段缺失时从其 BibTeX 中解析；父记录本身已在导出条目中时跳过。
+    """
+    exported, parents = set(), {}
+    for entry in entries:
+        if entry.get('key'):
+            exported.add(entry['key'])
+        parent = entry.get('crossref') or crossref_key(entry.get('bibtex') or '')
+        if parent:
+            parents[parent] = None
+    keys = [k for k in parents if k not in exported]
+    texts = await asyncio.gather(*(fetch_bibtex_by_key(k) for k in keys))
+    return [t for t in texts if t]
+
+async def aclose():
+    """关闭共享连接与本地存储。"""
+    for task in list(_prefetches) + list(_probes):
+        task.cancel()
+    await close_client()
+    if cache is not None:
+        cache.close()
+    rate_limiter.close()
+    if offline_index is not None:
+        offline_index.close()
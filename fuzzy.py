@@ -0,0 +1,183 @@
+"""粘贴标题的模糊匹配。
+
+用户粘贴的标题常有大小写不一致、缺少副标题、拼写错误或残留 LaTeX 转义。
+``normalize_title`` 把标题归一化为只含小写字母数字（及 ``C++``、``C#``、``.NET`` 中有区分意义的符号）的
+词序列（``normalize_query`` 是用作搜索缓存键的较宽松版本）；``FuzzyIndex`` 在已解析过的
+记录上建立字符三元组（trigram）倒排索引，按 Dice 相似度给出带置信度的最佳匹配。
+"""
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# \"{u}、\'e、\c{c} 等重音命令只保留字母本身
+_LATEX_ACCENT_RE = re.compile(r'\\[`\'^"~=.uvHckrdb]\s*\{?\s*([A-Za-z])\s*\}?')
+_LATEX_SYMBOLS = {
+    'ss': 'ss', 'o': 'o', 'O': 'O', 'ae': 'ae', 'AE': 'AE', 'oe': 'oe', 'OE': 'OE',
+    'aa': 'a', 'AA': 'A', 'l': 'l', 'L': 'L', 'i': 'i', 'j': 'j',
+}
+_LATEX_SYMBOL_RE = re.compile(r'\\(ss|o|O|ae|AE|oe|OE|aa|AA|l|L|i|j)(?![A-Za-z])')
+# 其余命令（\emph、\textbf 等）去掉命令名，保留参数内容
+_LATEX_COMMAND_RE = re.compile(r'\\[A-Za-z]+\*?|\\.')
+# 有区分意义的符号不当作分隔：C++、C#、F#，以及词首的点（.NET）；词中和词尾的点（node.js、句末）仍是分隔
+_NON_WORD_RE = re.compile(r'(?:[^0-9a-z+#.]|(?<=[0-9a-z+#])\.|\.(?![0-9a-z]))+')
+# 查询中另外保留任意文字（希腊字母、中日韩文字等）与 DBLP 的运算符 $（精确词）和 |（或）
+_QUERY_SEPARATOR_RE = re.compile(r'(?:[^\w$|+#.]|(?<=[\w+#])\.|\.(?!\w))+')
+# 主标题与副标题之间的分隔：冒号、问号、感叹号或两侧有空格的破折号
+_SUBTITLE_RE = re.compile(r'[:?!]\s+|\s+[-\u2013\u2014]+\s+')
+
+
+def _fold(text: str) -> str:
+    """去掉 LaTeX 命令与重音并折叠大小写。"""
+    text = _LATEX_ACCENT_RE.sub(r'\1', text)
+    text = _LATEX_SYMBOL_RE.sub(lambda m: _LATEX_SYMBOLS[m.group(1)], text)
+    text = _LATEX_COMMAND_RE.sub(' ', text).replace('{', '').replace('}', '')
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+
+
+def normalize_title(text: str) -> str:
+    return _NON_WORD_RE.sub(' ', _fold(text)).strip()
+
+
+def normalize_query(text: str) -> str:
+    """搜索缓存键：与 ``normalize_title`` 相同，但不丢弃非拉丁文字与 DBLP 运算符，避免不同查询共用缓存。"""
+    return _QUERY_SEPARATOR_RE.sub(' ', _fold(text)).strip()
+
+
+def main_title(title: str) -> Optional[str]:
+    """副标题之前的主标题（已归一化）；没有副标题或主标题不足三个词时返回 None。"""
+    parts = _SUBTITLE_RE.split(title, 1)
+    if len(parts) < 2:
+        return None
+    main = normalize_title(parts[0])
+    return main if main.count(' ') >= 2 else None
+
+
+def _symbol_words(norm: str) -> Set[str]:
+    return {w for w in norm.split() if '+' in w or '#' in w or w.startswith('.')}
+
+
+def trigrams(norm: str) -> Set[str]:
+    padded = f'  {norm} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(query_norm: str, title_norm: str, query_grams: Optional[Set[str]] = None,
+               main_norm: Optional[str] = None) -> float:
+    """Dice 相似度；查询恰好是标题去掉副标题后的主标题（``main_norm``，见 ``main_title``）时视为高置信匹配。
+
+    只是标题开头几个词的查询（如 ``graph neural networks``）不算，仍按 Dice 相似度计分；
+    ``C++``、``C#``、``.NET`` 这类带符号的词不一致时不超过 0.5。
+    """
+    if not query_norm or not title_norm:
+        return 0.0
+    if query_norm == title_norm:
+        return 1.0
+    a = query_grams if query_grams is not None else trigrams(query_norm)
+    b = trigrams(title_norm)
+    score = 2.0 * len(a & b) / (len(a) + len(b))
+    if main_norm is not None and query_norm == main_norm:
+        score = max(score, 0.95)
+    if _symbol_words(query_norm) != _symbol_words(title_norm):
+        # C++ 与 C、C# 与 C 只差一两个字符，但不是同一主题：不作为可信匹配
+        score = min(score, 0.5)
+    return score
+
+
+class FuzzyIndex:
+    # 候选文档数上限：只对与最稀有 trigram 重叠最多的这些文档精确打分
+    MAX_CANDIDATES = 16
+    # 候选召回下限：相似度低于该值的文档允许被漏掉
+    MIN_SIMILARITY = 0.75
+    # 需要扫描的倒排项上限：最稀有的 trigram 也非常常见时，查询过于笼统，不可能给出可信匹配，
+    # 直接放弃，避免在词汇量小的大索引上长时间占用事件循环
+    MAX_SCAN = 20000
+
+    def __init__(self, max_records: int = 200000):
+        self.max_records = max_records
+        self._lock = threading.Lock()
+        self._titles: List[str] = []
+        self._mains: List[Optional[str]] = []
+        self._infos: List[dict] = []
+        self._by_key: Dict[str, int] = {}
+        self._postings: Dict[str, List[int]] = {}
+        self.lookups = 0
+        self.confident = 0
+        self.skipped = 0
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    def add(self, info: dict):
+        key = info.get('key')
+        norm = normalize_title(info.get('title') or '')
+        if not key or not norm:
+            return
+        with self._lock:
+            if key in self._by_key or len(self._titles) >= self.max_records:
+                return
+            doc = len(self._titles)
+            self._titles.append(norm)
+            self._mains.append(main_title(info.get('title') or ''))
+            self._infos.append(info)
+            self._by_key[key] = doc
+            for gram in trigrams(norm):
+                self._postings.setdefault(gram, []).append(doc)
+
+    def add_many(self, infos: Iterable[dict]):
+        for info in infos:
+            self.add(info)
+
+    def lookup(self, query: str, limit: int = 1) -> List[Tuple[float, dict]]:
+        """返回按相似度降序排列的 ``(score, info)`` 列表。"""
+        norm = normalize_title(query)
+        if not norm:
+            return []
+        grams = trigrams(norm)
+        with self._lock:
+            self.lookups += 1
+            # 前缀过滤：相似度不低于 MIN_SIMILARITY 的文档至少包含最稀有的这几个 trigram 之一
+            ranked = sorted(grams, key=lambda g: len(self._postings.get(g, ())))
+            probe = len(ranked) - math.ceil(len(ranked) * self.MIN_SIMILARITY) + 1
+            postings = [self._postings.get(g, ()) for g in ranked[:probe]]
+            if sum(map(len, postings)) > self.MAX_SCAN:
+                self.skipped += 1
+                return []
+            overlap = Counter(chain.from_iterable(postings))
+            candidates = overlap.most_common(self.MAX_CANDIDATES)
+            # 与最佳候选重叠数相差一半以上的文档不可能是高分匹配，跳过精确打分
+            floor = candidates[0][1] / 2 if candidates else 0
+            scored = [(similarity(norm, self._titles[d], grams, self._mains[d]), self._infos[d])
+                      for d, n in candidates if n >= floor]
+        scored.sort(key=lambda x: x[0], reverse=True)
+        return scored[:limit]
+
+    def match(self, query: str, threshold: float, limit: int = 1) -> List[Tuple[float, dict]]:
+        """只返回置信度达到 ``threshold`` 的匹配。"""
+        found = [m for m in self.lookup(query, limit) if m[0] >= threshold]
+        if found:
+            self.confident += 1
+        return found
+
+    def rerank(self, query: str, infos: Iterable[dict]) -> List[Tuple[float, dict]]:
+        """用同一相似度对外部候选（如离线索引的全文检索结果）重新排序。"""
+        norm = normalize_title(query)
+        grams = trigrams(norm)
+        scored = [(similarity(norm, normalize_title(i.get('title') or ''), grams, main_title(i.get('title') or '')), i)
+                  for i in infos]
+        scored.sort(key=lambda x: x[0], reverse=True)
+        return scored
+
+    def stats(self) -> dict:
+        return {
+            'records': len(self._titles),
+            'max_records': self.max_records,
+            'trigrams': len(self._postings),
+            'lookups': self.lookups,
+            'confident': self.confident,
+            'skipped': self.skipped,
+        }
@@ -0,0 +1,124 @@
+"""DBLP 可达性的后台探测与熔断。
+
+``HealthProber`` 定期探测 DBLP，在内存中保存最近的可达状态与滚动延迟，
+``/api/check-dblp`` 直接读取而不再发起实时请求。``CircuitBreaker`` 在连续失败后断开，
+断开期间的上游请求立即失败（由调用方回退到缓存），冷却后放行一个试探请求。
+"""
+import asyncio
+import statistics
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+
+class CircuitOpenError(Exception):
+    """熔断器断开期间拒绝发出上游请求。"""
+
+
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._trial = False
+
+    def blocking(self) -> bool:
+        """断开且尚未到冷却时间时返回 True；只查看状态，不占用试探名额。"""
+        return self.state == self.OPEN and time.monotonic() < self.opened_at + self.reset_timeout
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() < self.opened_at + self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._trial = False
+        # 半开状态只放行一个试探请求
+        if self._trial:
+            return False
+        self._trial = True
+        return True
+
+    def release(self):
+        """试探请求被取消而没有结果时归还试探名额。"""
+        self._trial = False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trial = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.trips += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._trial = False
+
+    def stats(self) -> dict:
+        return {'state': self.state, 'failures': self.failures, 'trips': self.trips}
+
+
+class HealthProber:
+    def __init__(self, probe: Callable[[], Awaitable[bool]], interval: float,
+                 breaker: CircuitBreaker, window: int = 20):
+        self.probe = probe
+        self.interval = interval
+        self.breaker = breaker
+        self.reachable: Optional[bool] = None
+        self.checked_at: Optional[float] = None
+        self._latencies: deque = deque(maxlen=window)
+        self._ready = asyncio.Event()
+
+    async def probe_once(self) -> bool:
+        started = time.monotonic()
+        try:
+            ok = await self.probe()
+        except Exception:
+            ok = False
+        if ok:
+            self._latencies.append(time.monotonic() - started)
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        self.reachable = ok
+        self.checked_at = time.time()
+        self._ready.set()
+        return ok
+
+    async def run(self):
+        while True:
+            await self.probe_once()
+            await asyncio.sleep(self.interval)
+
+    async def wait_ready(self, timeout: float):
+        """等待首次探测完成（最多 ``timeout`` 秒）。"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def snapshot(self) -> dict:
+        latency = None
+        if self._latencies:
+            latency = {
+                'last_ms': round(self._latencies[-1] * 1000),
+                'median_ms': round(statistics.median(self._latencies) * 1000),
+                'mean_ms': round(statistics.fmean(self._latencies) * 1000),
+            }
+        return {
+            'reachable': bool(self.reachable),
+            'checked_at': self.checked_at,
+            'latency': latency,
+            'circuit': self.breaker.stats(),
+        }
@@ -0,0 +1,270 @@
+"""大批量标题的异步批处理任务。
+
+提交关键词列表后立即返回任务 ID，由有界的 worker 池逐条处理。任务与每个条目的状态持久化在
+SQLite 中：服务重启后，未完成的条目会继续处理，已完成的结果不会丢失。
+
+多个进程可以共用同一个数据库：领取条目时写入领取者与租约到期时间，处理期间定期续约；只有租约
+已过期（领取它的进程已退出或卡死）的条目才会被其他进程重新领取，正常处理中的条目不会被重复处理。
+数据库操作都是阻塞调用，worker 在线程中执行它们；``submit``、``status`` 等供调用方同样放到线程中执行。
+"""
+import asyncio
+import json
+import logging
+import os
+import secrets
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+Worker = Callable[[str, int], Awaitable[List[dict]]]
+
+
+class JobManager:
+    # 没有新任务通知时，空闲 worker 兜底轮询数据库的间隔（秒）
+    IDLE_POLL = 5.0
+    # 条目租约时长（秒）；处理期间每 LEASE / 3 秒续约一次
+    LEASE = 60.0
+
+    def __init__(self, path: str, worker: Worker, workers: int):
+        self.path = path
+        self.worker = worker
+        self.workers = workers
+        # 领取者标识：同一主机上的多个进程、同一进程中的多个实例互不相同
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}'
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            ' id TEXT PRIMARY KEY, status TEXT NOT NULL, max_results INTEGER NOT NULL,'
+            ' total INTEGER NOT NULL, created REAL NOT NULL, updated REAL NOT NULL)'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS items ('
+            ' job_id TEXT NOT NULL, idx INTEGER NOT NULL, keyword TEXT NOT NULL,'
+            ' status TEXT NOT NULL, results TEXT, error TEXT, updated REAL NOT NULL,'
+            ' owner TEXT, lease_until REAL, PRIMARY KEY (job_id, idx))'
+        )
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(items)')}
+        # 旧版本创建的数据库没有租约列；其中处理中的条目租约为空，视为已过期
+        if 'owner' not in columns:
+            self._conn.execute('ALTER TABLE items ADD COLUMN owner TEXT')
+        if 'lease_until' not in columns:
+            self._conn.execute('ALTER TABLE items ADD COLUMN lease_until REAL')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS items_status ON items (status)')
+
+    @contextmanager
+    def _transaction(self, mode: str = '') -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute(f'BEGIN {mode}')
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def _execute(self, sql: str, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def submit(self, keywords: List[str], max_results: int) -> str:
+        job_id = secrets.token_urlsafe(12)
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                'INSERT INTO jobs (id, status, max_results, total, created, updated) VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, 'pending', max_results, len(keywords), now, now),
+            )
+            conn.executemany(
+                'INSERT INTO items (job_id, idx, keyword, status, updated) VALUES (?, ?, ?, ?, ?)',
+                [(job_id, i, k, 'pending', now) for i, k in enumerate(keywords)],
+            )
+        self._wake()
+        return job_id
+
+    def _wake(self):
+        # 可能在线程中调用（见模块说明）：asyncio.Event 只能在事件循环线程中设置
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def start(self):
+        """启动 worker 池与续约任务；被中断的条目在其租约过期后由任意进程重新领取。"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._renew_leases()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # 正常退出时立即交还处理中的条目，不必等租约过期
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE items SET status = 'pending', owner = NULL, lease_until = NULL"
+            " WHERE owner = ? AND status = 'running'", (self.owner,),
+        )
+
+    async def _renew_leases(self):
+        while True:
+            await asyncio.sleep(self.LEASE / 3)
+            try:
+                await asyncio.to_thread(
+                    self._execute,
+                    "UPDATE items SET lease_until = ? WHERE owner = ? AND status = 'running'",
+                    (time.time() + self.LEASE, self.owner),
+                )
+            except sqlite3.Error as e:
+                logger.warning('批处理条目续约失败: %r', e)
+
+    def _claim(self) -> Optional[tuple]:
+        # 先提交的任务先处理；租约过期的处理中条目（领取者已退出）同样可以领取。
+        # BEGIN IMMEDIATE 保证多个进程共用数据库时同一条目只被领取一次
+        now = time.time()
+        with self._transaction('IMMEDIATE') as conn:
+            row = conn.execute(
+                "SELECT i.job_id, i.idx, i.keyword, j.max_results FROM items i JOIN jobs j ON j.id = i.job_id"
+                " WHERE i.status = 'pending'"
+                " OR (i.status = 'running' AND (i.lease_until IS NULL OR i.lease_until < ?))"
+                " ORDER BY j.created, i.idx LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE items SET status = 'running', owner = ?, lease_until = ?, updated = ?"
+                    " WHERE job_id = ? AND idx = ?",
+                    (self.owner, now + self.LEASE, now, row[0], row[1]),
+                )
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', updated = ? WHERE id = ? AND status = 'pending'",
+                    (now, row[0]),
+                )
+        return row
+
+    def _finish(self, job_id: str, idx: int, results: Optional[List[dict]], error: Optional[str]):
+        now = time.time()
+        with self._transaction() as conn:
+            # 租约已被其他进程接手时，以接手者的结果为准
+            conn.execute(
+                'UPDATE items SET status = ?, results = ?, error = ?, owner = NULL, lease_until = NULL, updated = ?'
+                " WHERE job_id = ? AND idx = ? AND status = 'running' AND owner = ?",
+                ('error' if error else 'done', json.dumps(results or [], ensure_ascii=False),
+                 error, now, job_id, idx, self.owner),
+            )
+            left = conn.execute(
+                "SELECT COUNT(*) FROM items WHERE job_id = ? AND status IN ('pending', 'running')", (job_id,)
+            ).fetchone()[0]
+            if left == 0:
+                conn.execute(
+                    "UPDATE jobs SET status = 'done', updated = ? WHERE id = ? AND status = 'running'",
+                    (now, job_id),
+                )
+
+    async def _run(self):
+        while True:
+            try:
+                item = await asyncio.to_thread(self._claim)
+            except sqlite3.Error as e:
+                # 数据库被其他进程长时间锁住等：稍后重试，不让 worker 退出
+                logger.warning('领取批处理条目失败: %r', e)
+                item = None
+            if item is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.IDLE_POLL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            job_id, idx, keyword, max_results = item
+            try:
+                results = await self.worker(keyword, max_results)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception('批处理条目失败: %s', keyword)
+                await asyncio.to_thread(self._finish, job_id, idx, None, str(e) or type(e).__name__)
+            else:
+                await asyncio.to_thread(self._finish, job_id, idx, results, None)
+
+    def status(self, job_id: str) -> Optional[dict]:
+        rows = self._execute('SELECT status, max_results, total, created, updated FROM jobs WHERE id = ?', (job_id,))
+        if not rows:
+            return None
+        status, max_results, total, created, updated = rows[0]
+        counts = {s: n for s, n in self._execute(
+            'SELECT status, COUNT(*) FROM items WHERE job_id = ? GROUP BY status', (job_id,))}
+        found = self._execute(
+            "SELECT COALESCE(SUM(json_array_length(results)), 0) FROM items WHERE job_id = ? AND status = 'done'",
+            (job_id,),
+        )[0][0]
+        finished = counts.get('done', 0) + counts.get('error', 0)
+        return {
+            'job_id': job_id,
+            'status': status,
+            'max_results': max_results,
+            'total': total,
+            'finished': finished,
+            'progress': round(finished / total, 4) if total else 1.0,
+            'items': counts,
+            'results': found,
+            'created': created,
+            'updated': updated,
+        }
+
+    def results(self, job_id: str, offset: int = 0, limit: int = 100) -> List[dict]:
+        """按关键词顺序返回已完成条目（含部分完成的任务）。"""
+        rows = self._execute(
+            "SELECT idx, keyword, status, results, error FROM items"
+            " WHERE job_id = ? AND status IN ('done', 'error') ORDER BY idx LIMIT ? OFFSET ?",
+            (job_id, limit, offset),
+        )
+        return [
+            {'index': idx, 'keyword': keyword, 'status': status,
+             'results': json.loads(results) if results else [], 'error': error}
+            for idx, keyword, status, results, error in rows
+        ]
+
+    def cancel(self, job_id: str) -> bool:
+        now = time.time()
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = 'cancelled', updated = ? WHERE id = ? AND status IN ('pending', 'running')",
+                (now, job_id),
+            )
+            conn.execute(
+                "UPDATE items SET status = 'cancelled', updated = ? WHERE job_id = ? AND status = 'pending'",
+                (now, job_id),
+            )
+        return cur.rowcount > 0
+
+    def retry(self, job_id: str) -> int:
+        """把失败的条目重新排队并唤醒 worker，返回重新排队的条目数。"""
+        now = time.time()
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM jobs WHERE id = ? AND status != 'cancelled'", (job_id,)).fetchone() is None:
+                return 0
+            cur = conn.execute(
+                "UPDATE items SET status = 'pending', error = NULL, owner = NULL, lease_until = NULL, updated = ?"
+                " WHERE job_id = ? AND status = 'error'",
+                (now, job_id),
+            )
+            if cur.rowcount > 0:
+                conn.execute("UPDATE jobs SET status = 'running', updated = ? WHERE id = ?", (now, job_id))
+        if cur.rowcount > 0:
+            self._wake()
+        return cur.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,99 @@
+"""DBLP 镜像的选择与故障转移。
+
+DBLP 有多个官方镜像，内容相同、只是主机不同。``MirrorPool`` 记录每个镜像的滚动延迟（EWMA）与错误率，
+按健康度给出尝试顺序：引擎把请求 URL 的主机部分改写为排在最前的镜像，网络错误、超时或 5xx 时
+立即改用下一个镜像，同一批请求中途也能切换。连续失败的镜像冷却一段时间（逐次加倍）后才重新优先使用，
+冷却期间仍可作为最后的备选。返回 429/503 的镜像立即按 ``Retry-After`` 单独冷却，不影响其他镜像。
+"""
+import time
+from typing import List, Optional, Sequence
+
+# 错误率对排序的影响：有效延迟 = 延迟 × (1 + ERROR_PENALTY × 错误率)
+ERROR_PENALTY = 4.0
+
+
+class Mirror:
+    def __init__(self, base_url: str, index: int):
+        self.base_url = base_url
+        self.index = index
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.failures = 0
+        self.down_until = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    def score(self) -> tuple:
+        # 尚未测得延迟的镜像排在已测得的之后，其中出过错的靠后，其余按配置顺序
+        if self.latency is None:
+            return 1, self.error_rate, self.index
+        return 0, self.latency * (1 + ERROR_PENALTY * self.error_rate)
+
+
+class MirrorPool:
+    def __init__(self, base_urls: Sequence[str], aliases: Sequence[str] = (), alpha: float = 0.3,
+                 cooldown: float = 30.0, max_cooldown: float = 600.0, failure_threshold: int = 2):
+        self.mirrors = [Mirror(u.rstrip('/'), i) for i, u in enumerate(base_urls)]
+        # 可改写为镜像的 URL 前缀：各镜像本身，以及搜索结果中出现的其他 DBLP 主机
+        self._prefixes = sorted({m.base_url for m in self.mirrors} | {a.rstrip('/') for a in aliases},
+                                key=len, reverse=True)
+        self.alpha = alpha
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.failure_threshold = failure_threshold
+        self.failovers = 0
+
+    def path(self, url: str) -> Optional[str]:
+        """``url`` 去掉镜像主机后的部分；不属于任何镜像的 URL 返回 None（按原样请求，不做故障转移）。"""
+        for prefix in self._prefixes:
+            if url.startswith(prefix) and url[len(prefix):len(prefix) + 1] in ('', '/', '?'):
+                return url[len(prefix):]
+        return None
+
+    def ranked(self) -> List[Mirror]:
+        """按健康度排列的镜像：未冷却的按有效延迟，冷却中的按恢复时间排在最后。"""
+        now = time.monotonic()
+        ready = sorted((m for m in self.mirrors if m.down_until <= now), key=Mirror.score)
+        cooling = sorted((m for m in self.mirrors if m.down_until > now), key=lambda m: m.down_until)
+        return ready + cooling
+
+    def record(self, mirror: Mirror, elapsed: float, ok: bool):
+        mirror.requests += 1
+        mirror.error_rate += self.alpha * ((0.0 if ok else 1.0) - mirror.error_rate)
+        if ok:
+            if mirror.latency is None:
+                mirror.latency = elapsed
+            else:
+                mirror.latency += self.alpha * (elapsed - mirror.latency)
+            mirror.failures = 0
+            mirror.down_until = 0.0
+            return
+        mirror.errors += 1
+        mirror.failures += 1
+        if mirror.failures >= self.failure_threshold:
+            backoff = self.cooldown * 2 ** (mirror.failures - self.failure_threshold)
+            mirror.down_until = time.monotonic() + min(self.max_cooldown, backoff)
+
+    def throttle(self, mirror: Mirror, retry_after: Optional[float] = None):
+        """镜像返回 429/503：计为一次失败并立即冷却，时长取 ``Retry-After``，缺省按冷却时间逐次加倍。"""
+        now = time.monotonic()
+        mirror.requests += 1
+        mirror.errors += 1
+        mirror.error_rate += self.alpha * (1.0 - mirror.error_rate)
+        if mirror.down_until > now:
+            # 冷却开始前已发出的并发请求陆续返回，不再延长冷却
+            return
+        mirror.failures += 1
+        backoff = retry_after if retry_after is not None else self.cooldown * 2 ** (mirror.failures - 1)
+        mirror.down_until = now + min(self.max_cooldown, backoff)
+
+    def stats(self) -> List[dict]:
+        now = time.monotonic()
+        return [{
+            'base_url': m.base_url,
+            'latency_ms': round(m.latency * 1000) if m.latency is not None else None,
+            'error_rate': round(m.error_rate, 3),
+            'requests': m.requests,
+            'errors': m.errors,
+            'cooldown_s': round(max(0.0, m.down_until - now), 1),
+        } for m in self.ranked()]
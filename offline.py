@@ -0,0 +1,387 @@
+"""基于 DBLP XML 转储（``dblp.xml.gz``）的离线索引。
+
+转储以流式方式解析（ElementTree 的 target 回调，不构建整棵树），内存占用与转储大小无关；
+记录写入 SQLite，标题建 FTS5 全文索引。放入更新的转储后再次 ``refresh`` 只会改写
+``mdate`` 变化的记录，并删除新转储中已不存在的记录。
+
+命令行用法::
+
+    python offline.py build dblp.xml.gz --index dblp_offline.sqlite3
+    python offline.py search "attention is all you need" --index dblp_offline.sqlite3
+"""
+import argparse
+import gzip
+import html.entities
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+import xml.etree.ElementTree as ET
+from typing import Callable, List, Optional
+
+RECORD_TAGS = {'article', 'inproceedings', 'proceedings', 'book', 'incollection',
+               'phdthesis', 'mastersthesis'}
+FIELD_TAGS = {'author', 'editor', 'title', 'booktitle', 'journal', 'volume', 'number', 'pages',
+              'year', 'publisher', 'series', 'school', 'isbn', 'ee', 'crossref'}
+# 与 DBLP 搜索接口返回的 type 字段保持一致
+HIT_TYPES = {
+    'article': 'Journal Articles',
+    'inproceedings': 'Conference and Workshop Papers',
+    'proceedings': 'Editorship',
+    'book': 'Books and Theses',
+    'incollection': 'Parts in Books or Collections',
+    'phdthesis': 'Books and Theses',
+    'mastersthesis': 'Books and Theses',
+}
+# DBLP .bib 接口的三种格式，序号即 ``param`` 参数的取值
+BIB_STYLES = ('condensed', 'standard', 'crossref')
+# condensed 格式只保留的字段
+_CONDENSED_FIELDS = {'author', 'title', 'booktitle', 'journal', 'volume', 'number', 'pages', 'year'}
+CHUNK_SIZE = 1 << 20
+BATCH_SIZE = 5000
+
+_WORD_RE = re.compile(r'\w+')
+_HOMONYM_RE = re.compile(r' \d{4}$')
+
+
+class _DumpHandler:
+    """ElementTree 解析 target：每解析完一条记录回调一次 ``on_record``。"""
+
+    def __init__(self, on_record: Callable[[dict], None]):
+        self.on_record = on_record
+        self._record: Optional[dict] = None
+        self._field: Optional[str] = None
+        self._buf: List[str] = []
+
+    def start(self, tag, attrib):
+        if self._record is None:
+            if tag in RECORD_TAGS:
+                self._record = {'type': tag, 'key': attrib.get('key'), 'mdate': attrib.get('mdate', ''),
+                                'fields': {}}
+        elif self._field is None and tag in FIELD_TAGS:
+            self._field = tag
+            self._buf = []
+
+    def data(self, text):
+        if self._field is not None:
+            self._buf.append(text)
+
+    def end(self, tag):
+        if self._record is None:
+            return
+        if tag == self._field:
+            value = ' '.join(''.join(self._buf).split())
+            self._record['fields'].setdefault(tag, []).append(value)
+            self._field = None
+        elif tag == self._record['type'] and self._field is None:
+            record, self._record = self._record, None
+            if record['key']:
+                self.on_record(record)
+
+    def close(self):
+        return None
+
+
+def iter_dump(path: str, on_record: Callable[[dict], None]):
+    """流式解析转储文件（``.xml`` 或 ``.xml.gz``），逐条回调记录。"""
+    parser = ET.XMLParser(target=_DumpHandler(on_record))
+    # dblp.xml 依赖 dblp.dtd 中的 HTML 实体（&uuml; 等），这里直接提供映射
+    parser.entity.update({name: chr(cp) for name, cp in html.entities.name2codepoint.items()})
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            parser.feed(chunk)
+    parser.close()
+
+
+def _first(fields: dict, name: str) -> Optional[str]:
+    values = fields.get(name)
+    return values[0] if values else None
+
+
+def _doi(fields: dict) -> Optional[str]:
+    for ee in fields.get('ee', []):
+        if ee.startswith('https://doi.org/'):
+            return ee[len('https://doi.org/'):]
+    return None
+
+
+class OfflineIndex:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS records ('
+            ' id INTEGER PRIMARY KEY, key TEXT NOT NULL UNIQUE, type TEXT NOT NULL,'
+            ' mdate TEXT NOT NULL, title TEXT NOT NULL, fields TEXT NOT NULL,'
+            ' generation INTEGER NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS records_generation ON records (generation)')
+        conn.execute('CREATE VIRTUAL TABLE IF NOT EXISTS titles'
+                     ' USING fts5(title, tokenize="unicode61 remove_diacritics 2")')
+        conn.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)')
+        return conn
+
+    def _meta(self, conn: sqlite3.Connection, name: str) -> Optional[str]:
+        row = conn.execute('SELECT value FROM meta WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else None
+
+    def refresh(self, dump_path: str, force: bool = False) -> dict:
+        """转储有更新时增量刷新索引，返回本次统计；转储未变化则直接返回。"""
+        st = os.stat(dump_path)
+        signature = f'{os.path.abspath(dump_path)}:{st.st_size}:{int(st.st_mtime)}'
+        conn = self._connect()
+        try:
+            if not force and self._meta(conn, 'dump') == signature:
+                return {'updated': False}
+            generation = int(self._meta(conn, 'generation') or 0) + 1
+            stats = {'updated': True, 'records': 0, 'inserted': 0, 'changed': 0, 'removed': 0}
+            started = time.time()
+            batch: List[dict] = []
+
+            def flush():
+                conn.execute('BEGIN')
+                for rec in batch:
+                    self._upsert(conn, rec, generation, stats)
+                conn.execute('COMMIT')
+                batch.clear()
+
+            def on_record(rec: dict):
+                batch.append(rec)
+                if len(batch) >= BATCH_SIZE:
+                    flush()
+
+            iter_dump(dump_path, on_record)
+            flush()
+            conn.execute('BEGIN')
+            stale = [r[0] for r in conn.execute('SELECT id FROM records WHERE generation < ?', (generation,))]
+            conn.executemany('DELETE FROM titles WHERE rowid = ?', [(i,) for i in stale])
+            conn.executemany('DELETE FROM records WHERE id = ?', [(i,) for i in stale])
+            stats['removed'] = len(stale)
+            for name, value in (('dump', signature), ('generation', str(generation)),
+                                ('built_at', str(int(time.time())))):
+                conn.execute('INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)', (name, value))
+            conn.execute('COMMIT')
+            stats['seconds'] = round(time.time() - started, 2)
+            return stats
+        finally:
+            conn.close()
+
+    def _upsert(self, conn: sqlite3.Connection, rec: dict, generation: int, stats: dict):
+        stats['records'] += 1
+        row = conn.execute('SELECT id, mdate FROM records WHERE key = ?', (rec['key'],)).fetchone()
+        if row is not None and row[1] == rec['mdate']:
+            conn.execute('UPDATE records SET generation = ? WHERE id = ?', (generation, row[0]))
+            return
+        fields = rec['fields']
+        title = _first(fields, 'title') or ''
+        values = (rec['type'], rec['mdate'], title, json.dumps(fields, ensure_ascii=False), generation)
+        if row is None:
+            cur = conn.execute(
+                'INSERT INTO records (key, type, mdate, title, fields, generation) VALUES (?, ?, ?, ?, ?, ?)',
+                (rec['key'],) + values,
+            )
+            conn.execute('INSERT INTO titles (rowid, title) VALUES (?, ?)', (cur.lastrowid, title))
+            stats['inserted'] += 1
+        else:
+            conn.execute(
+                'UPDATE records SET type = ?, mdate = ?, title = ?, fields = ?, generation = ? WHERE id = ?',
+                values + (row[0],),
+            )
+            conn.execute('DELETE FROM titles WHERE rowid = ?', (row[0],))
+            conn.execute('INSERT INTO titles (rowid, title) VALUES (?, ?)', (row[0], title))
+            stats['changed'] += 1
+
+    def ready(self) -> bool:
+        with self._lock:
+            return self._meta(self._conn, 'generation') is not None
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+
+    def search(self, query: str, num_results: int = 10) -> List[dict]:
+        """按标题全文检索，返回与 DBLP 搜索接口格式一致的 hit 列表。"""
+        words = _WORD_RE.findall(query)
+        if not words:
+            return []
+        terms = ['"' + w.replace('"', '') + '"' for w in words]
+        sql = ('SELECT r.key, r.type, r.fields FROM titles JOIN records r ON r.id = titles.rowid'
+               ' WHERE titles MATCH ? ORDER BY bm25(titles) LIMIT ?')
+        with self._lock:
+            rows = self._conn.execute(sql, (' '.join(terms), num_results)).fetchall()
+            if not rows:
+                # 全部词命中不到时退化为任意词匹配，按相关度排序
+                rows = self._conn.execute(sql, (' OR '.join(terms), num_results)).fetchall()
+        return [{'info': _hit_info(key, rtype, json.loads(fields))} for key, rtype, fields in rows]
+
+    def record(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute('SELECT type, fields FROM records WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        return {'key': key, 'type': row[0], 'fields': json.loads(row[1])}
+
+    def bibtex(self, key: str, style: str = 'standard') -> Optional[str]:
+        rec = self.record(key)
+        return render_dblp_bib(rec, style, self.record) if rec else None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _hit_info(key: str, rtype: str, fields: dict) -> dict:
+    info = {
+        'authors': {'author': [{'text': a} for a in fields.get('author', [])]},
+        'title': _first(fields, 'title') or '',
+        'venue': _first(fields, 'journal') or _first(fields, 'booktitle'),
+        'year': _first(fields, 'year'),
+        'type': 'Informal and Other Publications' if key.startswith('journals/corr/') else HIT_TYPES.get(rtype),
+        'key': key,
+        'url': f'https://dblp.org/rec/{key}',
+    }
+    for name in ('volume', 'number', 'pages'):
+        if fields.get(name):
+            info[name] = fields[name][0]
+    doi = _doi(fields)
+    if doi:
+        info['doi'] = doi
+    if fields.get('ee'):
+        info['ee'] = fields['ee'][0]
+    return {k: v for k, v in info.items() if v is not None}
+
+
+# 组合附加符号 -> LaTeX 重音命令，用于生成与 DBLP 一致的转义（如 ü -> {\"{u}}）
+_ACCENTS = {
+    '\u0300': '`', '\u0301': "'", '\u0302': '^', '\u0303': '~', '\u0304': '=', '\u0306': 'u',
+    '\u0307': '.', '\u0308': '"', '\u030a': 'r', '\u030b': 'H', '\u030c': 'v', '\u0327': 'c',
+    '\u0328': 'k',
+}
+_SPECIAL = {
+    'ß': r'{\ss}', 'ø': r'{\o}', 'Ø': r'{\O}', 'æ': r'{\ae}', 'Æ': r'{\AE}', 'œ': r'{\oe}',
+    'Œ': r'{\OE}', 'ł': r'{\l}', 'Ł': r'{\L}', 'ı': r'{\i}', '&': r'{\&}', '%': r'{\%}',
+    '$': r'{\$}', '#': r'{\#}', '_': r'{\_}',
+}
+
+
+def latex_escape(text: str) -> str:
+    out = []
+    for ch in text:
+        if ch in _SPECIAL:
+            out.append(_SPECIAL[ch])
+        elif ord(ch) < 128:
+            out.append(ch)
+        else:
+            decomposed = unicodedata.normalize('NFD', ch)
+            base, marks = decomposed[0], decomposed[1:]
+            if len(marks) == 1 and marks in _ACCENTS and ord(base) < 128:
+                out.append('{\\%s{%s}}' % (_ACCENTS[marks], base))
+            else:
+                out.append(ch)
+    return ''.join(out)
+
+
+def _strip_period(title: str) -> str:
+    return title[:-1] if title.endswith('.') and not title.endswith('...') else title
+
+
+def render_bibtex(rec: dict, style: str = 'standard', parent: Optional[dict] = None) -> str:
+    """按 DBLP 的某种格式渲染一条记录的 BibTeX。
+
+    standard 格式把 ``parent``（``crossref`` 指向的会议录或丛书记录）的编者、完整书名与出版信息
+    并入条目；crossref 格式只写 ``crossref`` 字段，由父记录单独给出；condensed 格式只保留核心字段。
+    """
+    key, fields = rec['key'], rec['fields']
+    inline = parent['fields'] if parent is not None and style == 'standard' else {}
+    entries = []
+
+    def add(name: str, value: Optional[str]):
+        if value and (style != 'condensed' or name in _CONDENSED_FIELDS):
+            entries.append((name, value))
+
+    def first(name: str) -> Optional[str]:
+        return _first(fields, name) or _first(inline, name)
+
+    for role in ('author', 'editor'):
+        names = [latex_escape(_HOMONYM_RE.sub('', n)) for n in fields.get(role) or inline.get(role, [])]
+        if names:
+            add(role, ' and\n                  '.join(names))
+    add('title', latex_escape(_strip_period(_first(fields, 'title') or '')))
+    booktitle = _strip_period(_first(inline, 'title') or '') or _first(fields, 'booktitle')
+    add('booktitle', latex_escape(booktitle or ''))
+    add('journal', latex_escape(_first(fields, 'journal') or ''))
+    add('series', latex_escape(first('series') or ''))
+    add('volume', first('volume'))
+    add('number', _first(fields, 'number'))
+    add('pages', (_first(fields, 'pages') or '').replace('-', '--'))
+    add('publisher', latex_escape(first('publisher') or ''))
+    add('school', latex_escape(_first(fields, 'school') or ''))
+    add('year', _first(fields, 'year'))
+    add('isbn', first('isbn'))
+    add('url', _first(fields, 'ee'))
+    add('doi', _doi(fields))
+    volume = _first(fields, 'volume') or ''
+    if key.startswith('journals/corr/') and volume.startswith('abs/'):
+        add('eprinttype', 'arXiv')
+        add('eprint', volume[len('abs/'):])
+    if style == 'crossref' and _first(fields, 'crossref'):
+        add('crossref', 'DBLP:' + _first(fields, 'crossref'))
+    add('biburl', f'https://dblp.org/rec/{key}.bib')
+    add('bibsource', 'dblp computer science bibliography, https://dblp.org')
+    body = ',\n'.join(f'  {name:<12} = {{{value}}}' for name, value in entries)
+    return f'@{rec["type"]}{{DBLP:{key},\n{body}\n}}\n'
+
+
+def render_dblp_bib(rec: dict, style: str, lookup: Callable[[str], Optional[dict]]) -> str:
+    """与 DBLP ``.bib?param=`` 接口的输出一致：crossref 格式在条目之后附上父记录（standard 格式）。"""
+    parent_key = _first(rec['fields'], 'crossref')
+    parent = lookup(parent_key) if parent_key else None
+    text = render_bibtex(rec, style, parent)
+    if style == 'crossref' and parent is not None:
+        text += '\n' + render_bibtex(parent)
+    return text
+
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description='DBLP 离线索引')
+    ap.add_argument('--index', default=os.environ.get('DBLP_OFFLINE_INDEX', 'dblp_offline.sqlite3'))
+    sub = ap.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help='从转储构建或增量刷新索引')
+    build.add_argument('dump')
+    build.add_argument('--force', action='store_true', help='转储未变化也重新扫描')
+    search = sub.add_parser('search', help='在索引中检索标题')
+    search.add_argument('query')
+    search.add_argument('-n', type=int, default=5)
+    search.add_argument('--bibtex', action='store_true', help='输出 BibTeX')
+    search.add_argument('--style', choices=BIB_STYLES, default='standard', help='BibTeX 格式')
+    args = ap.parse_args(argv)
+
+    index = OfflineIndex(args.index)
+    if args.command == 'build':
+        print(json.dumps(index.refresh(args.dump, force=args.force), ensure_ascii=False))
+    else:
+        for hit in index.search(args.query, args.n):
+            info = hit['info']
+            if args.bibtex:
+                sys.stdout.write(index.bibtex(info['key'], args.style) + '\n')
+            else:
+                print(f"{info['key']}\t{info.get('year', '')}\t{info['title']}")
+    index.close()
+
+
+if __name__ == '__main__':
+    main()
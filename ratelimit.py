@@ -0,0 +1,268 @@
+"""出站 DBLP 请求的全局限速。
+
+所有请求（搜索与 ``.bib``）共享一个令牌桶；遇到 429/503 时按 ``Retry-After``
+或指数退避暂停，并将速率减半，之后每次成功请求逐步恢复到配置速率。
+
+多个 worker 进程（或多台主机）部署时，``SharedRateLimiter`` 把令牌桶放在共享后端中：
+``SqliteBudget``（同一主机，WAL 模式的 SQLite 文件）或 ``RedisBudget``（Redis 或兼容的服务），
+增加 worker 不会成倍增加对 DBLP 的请求。
+"""
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 ``Retry-After`` 头（秒数或 HTTP 日期），无法解析时返回 None。"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    def __init__(self, rate: float, burst: int, min_rate: float = 0.2, max_backoff: float = 60.0):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min(min_rate, rate)
+        self.max_backoff = max_backoff
+        self.waiting = 0
+        self.throttled = 0
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._strikes = 0
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _refill(self, now: float):
+        self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """等待直到拿到一个令牌；等待者按到达顺序（FIFO）放行。"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        self.waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    wait = await self._reserve()
+                    if wait <= 0:
+                        return
+                    await asyncio.sleep(wait)
+        finally:
+            self.waiting -= 1
+
+    async def _reserve(self) -> float:
+        return self._take()
+
+    def _take(self) -> float:
+        """尝试取走一个令牌：成功返回 0，否则返回需要等待的秒数。"""
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+        self._refill(now)
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def on_throttled(self, retry_after: Optional[float] = None):
+        """上游返回 429/503：暂停发送并降低速率。"""
+        self.throttled += 1
+        self._strikes += 1
+        if retry_after is None:
+            retry_after = min(self.max_backoff, 2.0 ** self._strikes)
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + retry_after)
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._tokens = 0.0
+        self._updated = now
+
+    def on_success(self):
+        self._strikes = 0
+        if self.rate < self.max_rate:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            'rate': round(self.rate, 3),
+            'max_rate': self.max_rate,
+            'burst': self.burst,
+            'queue_depth': self.waiting,
+            'throttled': self.throttled,
+            'paused_for': round(max(0.0, self._paused_until - now), 3),
+        }
+
+    def close(self):
+        pass
+
+
+class SqliteBudget:
+    """保存在 SQLite 中的令牌桶；WAL 模式下同一主机上的多个进程可共用同一个文件。
+
+    每次取令牌是一个 ``BEGIN IMMEDIATE`` 事务，跨进程原子；时间使用墙上时钟。
+    """
+
+    def __init__(self, path: str, name: str = 'dblp'):
+        self.path = path
+        self.name = name
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS ratelimit ('
+            ' name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, paused_until REAL NOT NULL)'
+        )
+
+    def take(self, rate: float, burst: int) -> float:
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute(
+                    'SELECT tokens, updated, paused_until FROM ratelimit WHERE name = ?', (self.name,)
+                ).fetchone()
+                tokens, updated, paused_until = row if row is not None else (float(burst), now, 0.0)
+                if now < paused_until:
+                    wait = paused_until - now
+                else:
+                    tokens = min(float(burst), tokens + max(0.0, now - updated) * rate)
+                    if tokens >= 1:
+                        tokens -= 1
+                        wait = 0.0
+                    else:
+                        wait = (1 - tokens) / rate
+                    updated = now
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO ratelimit (name, tokens, updated, paused_until) VALUES (?, ?, ?, ?)',
+                    (self.name, tokens, updated, paused_until),
+                )
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+        return wait
+
+    def pause(self, until: float):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO ratelimit (name, tokens, updated, paused_until) VALUES (?, 0, ?, ?)'
+                ' ON CONFLICT (name) DO UPDATE SET tokens = 0, updated = excluded.updated,'
+                ' paused_until = MAX(paused_until, excluded.paused_until)',
+                (self.name, now, until),
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisBudget:
+    """Redis 中按固定窗口计数的预算，只用到 GET / SET / INCR / PEXPIRE，任何兼容 Redis 协议的服务都可使用。
+
+    窗口长度固定为 ``window`` 秒（通常为 ``burst / rate``），每个窗口放行 ``rate * window`` 个请求；
+    窗口键由所有 worker 共用，过期后自动删除。
+    """
+
+    def __init__(self, client, prefix: str = 'dblp:', window: float = 2.0):
+        self.client = client
+        self.prefix = prefix
+        self.window = window
+
+    def take(self, rate: float, burst: int) -> float:
+        now = time.time()
+        paused = self.client.get(self.prefix + 'ratelimit:paused')
+        if paused is not None and float(paused) > now:
+            return float(paused) - now
+        slot = int(now // self.window)
+        key = f'{self.prefix}ratelimit:{slot}'
+        count = self.client.incr(key)
+        if count == 1:
+            self.client.pexpire(key, int(self.window * 2000) + 1000)
+        # 自适应降速后各 worker 按自己当前的速率计算窗口容量
+        if count <= max(1, round(rate * self.window)):
+            return 0.0
+        return (slot + 1) * self.window - now
+
+    def pause(self, until: float):
+        ttl = int(max(0.0, until - time.time()) * 1000) + 1
+        self.client.set(self.prefix + 'ratelimit:paused', repr(until), px=ttl)
+
+    def close(self):
+        pass
+
+
+class SharedRateLimiter(RateLimiter):
+    """令牌桶放在共享后端中，所有 worker 共用同一份出站预算。
+
+    自适应降速仍在各进程内进行；429/503 引起的暂停写入后端，所有 worker 同时暂停。
+    后端不可用时退回进程内令牌桶，不阻塞请求。后端调用（SQLite 事务、Redis 往返）在线程中执行，
+    不阻塞事件循环。
+    """
+
+    def __init__(self, budget, rate: float, burst: int, **kwargs):
+        super().__init__(rate, burst, **kwargs)
+        self.budget = budget
+        self.backend_errors = 0
+        self._pausing: set = set()
+
+    async def _reserve(self) -> float:
+        # 本进程刚被限流时不必询问后端
+        paused = self._paused_until - time.monotonic()
+        if paused > 0:
+            return paused
+        return await asyncio.to_thread(self._take)
+
+    def _take(self) -> float:
+        try:
+            return self.budget.take(self.rate, self.burst)
+        except Exception as e:
+            self.backend_errors += 1
+            logger.warning('共享限速后端不可用，改用进程内令牌桶: %r', e)
+            return super()._take()
+
+    def on_throttled(self, retry_after: Optional[float] = None):
+        super().on_throttled(retry_after)
+        until = time.time() + max(0.0, self._paused_until - time.monotonic())
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._pause_backend(until)
+            return
+        # 本进程已在内存中暂停，写入后端不必等待
+        task = loop.create_task(asyncio.to_thread(self._pause_backend, until))
+        self._pausing.add(task)
+        task.add_done_callback(self._pausing.discard)
+
+    def _pause_backend(self, until: float):
+        try:
+            self.budget.pause(until)
+        except Exception as e:
+            self.backend_errors += 1
+            logger.warning('共享限速后端不可用: %r', e)
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats['backend'] = type(self.budget).__name__
+        stats['backend_errors'] = self.backend_errors
+        return stats
+
+    def close(self):
+        self.budget.close()
@@ -0,0 +1,176 @@
+"""BibTeX URL 解析：按历史表现排序候选 URL，并对慢请求发起对冲请求。
+
+同一条记录的 ``.bib`` 可以从多种 URL 形式取得（``<url>.bib``、``<url>?view=bibtex``、
+``rec/bibtex/<key>.bib``、``rec/<key>.bib``）。``BibResolver`` 按 URL 形式记录成功率与延迟的
+指数滑动平均，优先尝试期望代价最低的形式；首个请求超过对冲延迟仍未返回时并发发出下一个，
+任一成功即取消其余请求，整条记录受统一的截止时间约束。截止时间与对冲计时从第一个请求真正发出
+（取得限速令牌）时开始，在限速器中排队的时间不计入。
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# fetch(url, sent)：请求真正发出时调用 sent()（可重复调用）；
+# 返回 None 表示该 URL 未取得结果，其他返回值（如 BibTeX 文本或响应对象）原样交给调用方
+Fetch = Callable[[str, Callable[[], None]], Awaitable[Optional[Any]]]
+# (形式名, 结果, 耗时秒)；结果为 ok / miss / error / cancelled
+Observer = Callable[[str, str, float], None]
+
+logger = logging.getLogger(__name__)
+
+
+class _PatternStats:
+    __slots__ = ('success', 'latency', 'attempts', 'wins')
+
+    def __init__(self, latency: float):
+        # 乐观初值：新形式先按 50% 成功率参与排序，避免永远轮不到
+        self.success = 0.5
+        self.latency = latency
+        self.attempts = 0
+        self.wins = 0
+
+    def cost(self) -> float:
+        return self.latency / max(self.success, 0.05)
+
+
+class BibResolver:
+    ALPHA = 0.2
+
+    def __init__(self, deadline: float, hedge_delay: float, min_hedge_delay: float = 0.25,
+                 can_hedge: Optional[Callable[[], bool]] = None, on_attempt: Optional[Observer] = None):
+        self.deadline = deadline
+        self.hedge_delay = hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.can_hedge = can_hedge or (lambda: True)
+        self.on_attempt = on_attempt or (lambda name, outcome, elapsed: None)
+        self.hedged = 0
+        self.deadline_exceeded = 0
+        self._stats: Dict[str, _PatternStats] = {}
+
+    def _pattern(self, name: str) -> _PatternStats:
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = _PatternStats(self.hedge_delay)
+        return stats
+
+    def _record(self, name: str, ok: bool, latency: float):
+        s = self._pattern(name)
+        s.attempts += 1
+        s.success += self.ALPHA * ((1.0 if ok else 0.0) - s.success)
+        if ok:
+            s.wins += 1
+            s.latency += self.ALPHA * (latency - s.latency)
+
+    def order(self, candidates: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        # sorted 是稳定排序，代价相同时保持调用方给出的默认顺序
+        return sorted(candidates, key=lambda c: self._pattern(c[0]).cost())
+
+    def _hedge_after(self, name: str) -> float:
+        # 首选形式通常的延迟的两倍仍未返回才对冲，且不超过配置上限
+        return min(self.hedge_delay, max(self.min_hedge_delay, 2 * self._pattern(name).latency))
+
+    async def _attempt(self, name: str, url: str, fetch: Fetch, on_sent: Callable[[], None]) -> Optional[Any]:
+        started = time.monotonic()
+        sent = False
+
+        def mark_sent():
+            # 延迟统计从请求发出时算起，不含排队
+            nonlocal started, sent
+            if not sent:
+                sent = True
+                started = time.monotonic()
+                on_sent()
+
+        try:
+            text = await fetch(url, mark_sent)
+        except asyncio.CancelledError:
+            # 被对冲请求抢先的慢请求：已耗时是其延迟的下界
+            elapsed = time.monotonic() - started
+            s = self._pattern(name)
+            s.latency = max(s.latency, elapsed)
+            self.on_attempt(name, 'cancelled', elapsed)
+            raise
+        except Exception as e:
+            logger.debug('BibTeX 请求失败 %s: %r', url, e)
+            text, outcome = None, 'error'
+        else:
+            outcome = 'ok' if text is not None else 'miss'
+        elapsed = time.monotonic() - started
+        self._record(name, text is not None, elapsed)
+        self.on_attempt(name, outcome, elapsed)
+        return text
+
+    async def resolve(self, candidates: List[Tuple[str, str]], fetch: Fetch) -> Optional[Any]:
+        """按顺序（必要时对冲）尝试 ``(形式名, URL)`` 候选，返回第一个成功的结果。"""
+        queue = self.order(candidates)
+        if not queue:
+            return None
+        loop = asyncio.get_running_loop()
+        deadline: Optional[float] = None
+        started = asyncio.Event()
+        pending = set()
+
+        def on_sent():
+            nonlocal deadline
+            if deadline is None:
+                deadline = loop.time() + self.deadline
+                started.set()
+
+        def launch():
+            name, url = queue.pop(0)
+            pending.add(asyncio.ensure_future(self._attempt(name, url, fetch, on_sent)))
+            return name
+
+        first = launch()
+        try:
+            while pending:
+                if deadline is None:
+                    # 还在限速器中排队：只等请求发出或结束，不计时
+                    waiter = asyncio.ensure_future(started.wait())
+                    try:
+                        done, _ = await asyncio.wait(pending | {waiter}, return_when=asyncio.FIRST_COMPLETED)
+                    finally:
+                        waiter.cancel()
+                    done.discard(waiter)
+                else:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        self.deadline_exceeded += 1
+                        return None
+                    hedge = queue and self.can_hedge()
+                    timeout = min(remaining, self._hedge_after(first)) if hedge else remaining
+                    done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                    if not done:
+                        if hedge:
+                            self.hedged += 1
+                            launch()
+                        continue
+                for task in done:
+                    pending.discard(task)
+                    if task.result() is not None:
+                        return task.result()
+                # 失败的请求立即由下一个候选接替
+                if queue and not pending:
+                    first = launch()
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            'deadline': self.deadline,
+            'hedge_delay': self.hedge_delay,
+            'hedged': self.hedged,
+            'deadline_exceeded': self.deadline_exceeded,
+            'patterns': {
+                name: {
+                    'success_rate': round(s.success, 3),
+                    'latency': round(s.latency, 3),
+                    'attempts': s.attempts,
+                    'wins': s.wins,
+                }
+                for name, s in self._stats.items()
+            },
+        }
@@ -0,0 +1,97 @@
+"""服务端保存的搜索结果集。
+
+搜索完成后结果按随机 ID 保存，下载时客户端只需提交 ID，无需回传全部 BibTeX。
+有磁盘缓存时存入其 ``resultset`` 命名空间（TTL 由缓存配置），否则保存在进程内。
+"""
+import logging
+import secrets
+import time
+import zlib
+from collections import OrderedDict
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, List, Optional, Union
+
+from bibtex import BibExport
+from cache import DiskCache, RedisCache
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = 'resultset'
+
+
+class ResultStore:
+    def __init__(self, cache: Optional[Union[DiskCache, RedisCache]], ttl: float, max_memory_sets: int = 256):
+        self.cache = cache
+        self.ttl = ttl
+        self.max_memory_sets = max_memory_sets
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def create(self, results: List[dict]) -> str:
+        result_set_id = secrets.token_urlsafe(12)
+        if self.cache is not None:
+            self.cache.set(NAMESPACE, result_set_id, results)
+        else:
+            self._memory[result_set_id] = (time.monotonic() + self.ttl, results)
+            while len(self._memory) > self.max_memory_sets:
+                self._memory.popitem(last=False)
+        return result_set_id
+
+    def get(self, result_set_id: str) -> Optional[List[dict]]:
+        if self.cache is not None:
+            return self.cache.get(NAMESPACE, result_set_id)
+        item = self._memory.get(result_set_id)
+        if item is None:
+            return None
+        expires, results = item
+        if time.monotonic() > expires:
+            del self._memory[result_set_id]
+            return None
+        return results
+
+    def purge_expired(self) -> int:
+        if self.cache is not None:
+            return self.cache.purge(NAMESPACE, expired_only=True)
+        now = time.monotonic()
+        expired = [k for k, (expires, _) in self._memory.items() if now > expires]
+        for k in expired:
+            del self._memory[k]
+        return len(expired)
+
+
+async def iter_bibtex(batches: AsyncIterable[Iterable[dict]],
+                      tail: Optional[Callable[[], Awaitable[Iterable[str]]]] = None) -> AsyncIterator[bytes]:
+    """产出规范化后的 ``.bib`` 内容（见 ``bibtex.BibExport``），条目之间空一行；每批条目到达后立即写出为一块。
+
+    ``tail`` 在全部条目写出后调用，返回附在末尾的文本：crossref 引用的父记录（BibTeX 要求被引用的记录
+    出现在引用者之后）、未能获取的条目说明等只有读完全部条目后才能确定的内容。
+    """
+    export = BibExport()
+    first = True
+
+    def encode(texts: List[str]) -> bytes:
+        nonlocal first
+        out = b''.join((b'' if first and i == 0 else b'\n') + text.encode('utf-8') for i, text in enumerate(texts))
+        first = first and not texts
+        return out
+
+    async for batch in batches:
+        chunk = encode([text for entry in batch for text in export.add(entry.get('bibtex') or '')])
+        if chunk:
+            yield chunk
+    texts = []
+    if tail is not None:
+        for text in await tail():
+            texts.extend(export.add(text))
+    texts.extend(export.finish())
+    chunk = encode(texts)
+    if chunk:
+        yield chunk
+    if export.renamed or export.invalid:
+        logger.warning('导出 BibTeX：%s', export.stats())
+
+
+async def gzip_stream(chunks: AsyncIterable[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        # 逐块刷新：每批条目就绪后立即发送，而不是攒满压缩缓冲区
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
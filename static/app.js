@@ -0,0 +1,350 @@
+let currentResults = [];
+let currentResultSetId = null;
+// 各关键词下一页的游标，点击“更多结果”时使用
+let moreCursors = {};
+
+window.addEventListener('DOMContentLoaded', checkAPIStatus);
+
+async function checkAPIStatus() {
+    try {
+        const response = await fetch('/api/check-dblp');
+        const data = await response.json();
+        const statusDiv = document.getElementById('apiStatus');
+
+        if (data.offline) {
+            statusDiv.className = data.reachable ? 'api-status ok' : 'api-status warning';
+            statusDiv.innerHTML = data.reachable
+                ? `<strong>✓ 离线模式：使用本地 DBLP 索引</strong>`
+                : `<strong>⚠ 离线模式：本地索引尚在构建中</strong><br>请稍后重试`;
+        } else if (data.reachable) {
+            statusDiv.className = 'api-status ok';
+            const latency = data.latency ? `（延迟约 ${data.latency.median_ms} ms）` : '';
+            statusDiv.innerHTML = `
+                <strong>✓ DBLP 可访问${latency}</strong>
+            `;
+        } else {
+            statusDiv.className = 'api-status warning';
+            statusDiv.innerHTML = `
+                <strong>⚠ 无法访问 DBLP</strong><br>
+                请检查网络连接后重试
+            `;
+        }
+    } catch (error) {
+        console.error('Failed to check API status:', error);
+    }
+}
+
+async function searchPapers() {
+    const keywordsText = document.getElementById('keywords').value;
+    const maxResults = parseInt(document.getElementById('maxResults').value);
+
+
+    const keywords = keywordsText.split('\n')
+        .map(k => k.trim())
+        .filter(k => k.length > 0);
+    if (keywords.length === 0) {
+        alert('请输入至少一个关键词或论文标题！');
+        return;
+    }
+
+
+
+    const resultsDiv = document.getElementById('results');
+    const searchBtn = document.getElementById('searchBtn');
+
+    searchBtn.disabled = true;
+    resultsDiv.innerHTML = `
+        <div class="loading">
+            <div class="spinner"></div>
+            <div>正在从 DBLP 获取数据...</div>
+            <small style="color: #999; margin-top: 10px; display: block;">
+                正在处理 ${keywords.length} 个关键词，每个最多 ${maxResults} 篇论文<br>
+                预计使用 ${keywords.length} 次搜索请求
+            </small>
+        </div>
+    `;
+
+    try {
+        const response = await fetch('/api/search/stream', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                keywords: keywords,
+                max_results: maxResults,
+                merge_corr: document.getElementById('mergeCorr').checked,
+                bibtex: false,
+                style: bibStyle()
+            })
+        });
+
+        if (!response.ok) {
+            const error = await response.json();
+            throw new Error(error.detail || '搜索失败');
+        }
+
+        currentResults = [];
+        currentResultSetId = null;
+        moreCursors = {};
+        document.getElementById('downloadBtn').disabled = true;
+        resultsDiv.innerHTML = `
+            <div class="results-section">
+                <div class="stats" id="streamStats">⏳ 已完成 0 / ${keywords.length} 个关键词</div>
+                <div id="streamErrors"></div>
+                <div id="resultList"></div>
+                <div id="moreResults" class="more-results"></div>
+            </div>
+        `;
+
+        // 逐行解析 NDJSON，结果到达即渲染
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let finished = null;
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            let newline;
+            while ((newline = buffer.indexOf('\n')) >= 0) {
+                const line = buffer.slice(0, newline).trim();
+                buffer = buffer.slice(newline + 1);
+                if (!line) continue;
+                const event = JSON.parse(line);
+                if (event.type === 'done') finished = event;
+                handleStreamEvent(event);
+            }
+        }
+
+        if (!finished) {
+            throw new Error('连接中断，已显示部分结果');
+        }
+        if (finished.total === 0) {
+            document.getElementById('resultList').innerHTML = `
+                <div class="error">
+                    <strong>未找到任何论文</strong><br><br>
+                    请检查关键词是否完整，或尝试不同的关键词。
+                </div>
+            `;
+        }
+
+        // 刷新API状态
+        setTimeout(checkAPIStatus, 1000);
+
+    } catch (error) {
+        const errorHtml = `
+            <div class="error">
+                <strong>❌ 搜索失败</strong><br><br>
+                ${error.message}<br><br>
+                <strong>可能的原因：</strong>
+                <ul style="margin-left: 20px; margin-top: 10px;">
+                    <li>网络连接问题</li>
+                    <li>关键词格式不正确</li>
+                    <li>DBLP 暂时不可用</li>
+                </ul>
+                <p style="margin-top: 10px;">DBLP 无需 API Key；请稍后重试。</p>
+            </div>
+        `;
+        const errorsDiv = document.getElementById('streamErrors');
+        if (errorsDiv) {
+            errorsDiv.insertAdjacentHTML('beforeend', errorHtml);
+        } else {
+            resultsDiv.innerHTML = errorHtml;
+        }
+    } finally {
+        searchBtn.disabled = false;
+    }
+}
+
+function handleStreamEvent(event) {
+    const stats = document.getElementById('streamStats');
+    if (event.type === 'progress') {
+        const icon = event.done === event.total ? '📊' : '⏳';
+        stats.textContent = `${icon} 已完成 ${event.done} / ${event.total} 个关键词，找到 ${currentResults.length} 篇论文`;
+    } else if (event.type === 'keyword') {
+        if (event.next_cursor) {
+            moreCursors[event.index] = event.next_cursor;
+            document.getElementById('moreResults').insertAdjacentHTML('beforeend', `
+                <button class="btn-secondary" id="more-${event.index}" onclick="loadMore(${event.index})">
+                    🔽 更多「${escapeHtml(event.keyword)}」的结果
+                </button>
+            `);
+        }
+    } else if (event.type === 'result') {
+        currentResults.push(event);
+        document.getElementById('resultList')
+            .insertAdjacentHTML('beforeend', renderResult(event, currentResults.length - 1));
+        document.getElementById('downloadBtn').disabled = false;
+    } else if (event.type === 'error') {
+        document.getElementById('streamErrors').insertAdjacentHTML('beforeend', `
+            <div class="error">
+                <strong>关键词搜索失败：</strong>${escapeHtml(event.keyword)}<br>
+                ${escapeHtml(event.detail)}
+            </div>
+        `);
+    } else if (event.type === 'done') {
+        currentResultSetId = event.result_set_id || null;
+        stats.textContent = `📊 找到 ${event.total} 篇论文，展开或勾选结果以获取 BibTeX`;
+    }
+}
+
+function renderResult(result, index) {
+    return `
+        <div class="result-item">
+            <div class="result-title">
+                ${index + 1}. ${escapeHtml(result.title)}
+            </div>
+            <div class="result-meta">
+                👤 作者: ${escapeHtml(result.authors)} |
+                📅 年份: ${escapeHtml(result.year)}
+                ${result.venue ? ` | 📚 ${escapeHtml(result.venue)}` : ''}
+                ${result.confidence !== undefined ? ` | 🎯 匹配度: ${Math.round(result.confidence * 100)}%` : ''}
+                ${result.fallback ? ' | ⚠️ 简易条目（未能从 DBLP 获取 BibTeX）' : ''}
+            </div>
+            <div class="result-actions">
+                <label><input type="checkbox" class="select-result" data-index="${index}" onchange="selectResult(${index})"> 选中</label>
+                <button class="btn-secondary" onclick="toggleBibtex(${index})">📄 BibTeX</button>
+            </div>
+            <div class="bibtex-code" id="bibtex-${index}" style="display: none;"></div>
+        </div>
+    `;
+}
+
+// 翻页：按游标取下一页，已显示过的记录（同一 key）不再重复添加
+async function loadMore(keywordIndex) {
+    const button = document.getElementById(`more-${keywordIndex}`);
+    button.disabled = true;
+    try {
+        const response = await fetch(`/api/search/page?cursor=${encodeURIComponent(moreCursors[keywordIndex])}`);
+        const page = await response.json();
+        if (!response.ok) throw new Error(page.detail || '获取更多结果失败');
+        const shown = new Set(currentResults.map(r => r.key).filter(k => k));
+        const list = document.getElementById('resultList');
+        page.results.filter(r => !r.key || !shown.has(r.key)).forEach(r => {
+            currentResults.push(r);
+            list.insertAdjacentHTML('beforeend', renderResult(r, currentResults.length - 1));
+        });
+        // 新增结果不在服务端结果集中，下载时改为按 key 列表下载
+        currentResultSetId = null;
+        if (page.next_cursor) {
+            moreCursors[keywordIndex] = page.next_cursor;
+            button.disabled = false;
+        } else {
+            button.remove();
+        }
+    } catch (error) {
+        button.disabled = false;
+        alert(error.message);
+    }
+}
+
+function bibStyle() {
+    return document.getElementById('bibStyle').value;
+}
+
+// 切换格式后已获取的 BibTeX 作废，展开或下载时按新格式重新获取
+function resetBibtex() {
+    currentResults.forEach((result, index) => {
+        result.bibtex = null;
+        result.crossref = null;
+        result.pending = null;
+        const box = document.getElementById(`bibtex-${index}`);
+        if (box) box.style.display = 'none';
+    });
+}
+
+// BibTeX 按需获取：展开或选中时才请求，结果缓存在 currentResults 中
+async function loadBibtex(index) {
+    const result = currentResults[index];
+    if (result.bibtex) return result.bibtex;
+    if (!result.key) return null;
+    if (!result.pending) {
+        const style = bibStyle();
+        const query = style === 'standard' ? '' : `?style=${style}`;
+        result.pending = fetch(`/api/bibtex/${encodeURI(result.key)}${query}`)
+            .then(response => response.ok ? response.json() : null)
+            .then(data => {
+                result.bibtex = data ? data.bibtex : null;
+                result.crossref = data ? data.crossref : null;
+                result.pending = null;
+                return result.bibtex;
+            });
+    }
+    return result.pending;
+}
+
+async function toggleBibtex(index) {
+    const box = document.getElementById(`bibtex-${index}`);
+    if (box.style.display !== 'none') {
+        box.style.display = 'none';
+        return;
+    }
+    box.style.display = 'block';
+    box.textContent = '正在获取 BibTeX...';
+    const bibtex = await loadBibtex(index);
+    box.textContent = bibtex || '未能获取该记录的 BibTeX';
+}
+
+function selectResult(index) {
+    loadBibtex(index);
+}
+
+function selectedIndexes() {
+    return Array.from(document.querySelectorAll('.select-result:checked'))
+        .map(box => parseInt(box.dataset.index));
+}
+
+async function downloadAll() {
+    if (currentResults.length === 0) {
+        alert('没有可下载的结果！');
+        return;
+    }
+    // 有选中的结果时只下载选中的，否则下载全部
+    const selected = selectedIndexes();
+    const indexes = selected.length > 0 ? selected : currentResults.map((_, i) => i);
+
+    try {
+        // BibTeX 由服务端补齐并直接流式返回：未选中时按结果集 ID 下载，否则（或结果集已过期时）按 key 列表下载
+        const style = bibStyle();
+        let response = null;
+        if (currentResultSetId && selected.length === 0) {
+            const query = style === 'standard' ? '' : `?style=${style}`;
+            response = await fetch(`/api/download/${encodeURIComponent(currentResultSetId)}${query}`);
+        }
+        if (!response || response.status === 404) {
+            const keys = indexes.map(i => currentResults[i].key).filter(k => k);
+            if (keys.length === 0) throw new Error('没有可下载的 BibTeX');
+            response = await fetch('/api/download/keys', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ keys: keys, style: style })
+            });
+        }
+
+        if (!response.ok) throw new Error('下载失败');
+
+        const blob = await response.blob();
+        const url = window.URL.createObjectURL(blob);
+        const a = document.createElement('a');
+        a.href = url;
+        a.download = 'references.bib';
+        document.body.appendChild(a);
+        a.click();
+        window.URL.revokeObjectURL(url);
+        document.body.removeChild(a);
+
+        // 未能获取 BibTeX 的条目由服务端在文件末尾的 @comment 中列出
+        const tail = (await blob.text()).match(/@comment\{BibTeX unavailable for (\d+) entries/);
+        const missing = tail ? parseInt(tail[1]) : 0;
+        alert(`成功下载 ${indexes.length - missing} 篇论文的 BibTeX 信息！` +
+              (missing > 0 ? `\n${missing} 篇未能获取 BibTeX，未写入文件。` : ''));
+
+    } catch (error) {
+        alert('下载失败: ' + error.message);
+    }
+}
+
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text;
+    return div.innerHTML;
+}
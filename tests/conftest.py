@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# 模块都在仓库根目录下（没有包结构）
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# engine / app 在导入时按环境变量创建磁盘缓存与任务数据库：测试中不使用磁盘缓存，任务数据库放到临时目录
+os.environ.setdefault('DBLP_CACHE_PATH', '')
+os.environ.setdefault('DBLP_JOBS_PATH', os.path.join(tempfile.mkdtemp(), 'jobs.sqlite3'))
@@ -0,0 +1,65 @@
+from bibtex import BibExport, format_entry, normalize_export, parse
+
+
+def _export(texts):
+    export = BibExport()
+    return ''.join(normalize_export(texts, export)), export
+
+
+def _entry(key, title, year='2020', kind='article'):
+    return f'@{kind}{{{key}, title = {{{title}}}, year = {{{year}}}}}'
+
+
+def test_duplicate_record_written_once():
+    text = _entry('DBLP:journals/x/A20', 'Same Paper')
+    out, export = _export([text, text])
+    assert out.count('@article{') == 1
+    assert export.duplicates == 1 and not export.renamed
+
+
+def test_colliding_keys_renamed_and_listed():
+    out, export = _export([
+        _entry('DBLP:k', 'One'), _entry('DBLP:k', 'Two'), _entry('DBLP:k', 'Three', '2021'),
+    ])
+    assert [e.key for e in parse(out) if e.raw is None] == ['DBLP:k', 'DBLP:k_2', 'DBLP:k_3']
+    assert export.renamed == [('DBLP:k', 'DBLP:k_2'), ('DBLP:k', 'DBLP:k_3')]
+    assert out.rstrip().endswith('@comment{Citation keys renamed to avoid collisions:\n'
+                                 '  DBLP:k -> DBLP:k_2,\n  DBLP:k -> DBLP:k_3\n}')
+
+
+def test_renamed_key_skips_existing_suffix():
+    out, export = _export([_entry('DBLP:k_2', 'First'), _entry('DBLP:k', 'Second'), _entry('DBLP:k', 'Third')])
+    assert [e.key for e in parse(out) if e.raw is None] == ['DBLP:k_2', 'DBLP:k', 'DBLP:k_3']
+    assert export.renamed == [('DBLP:k', 'DBLP:k_3')]
+
+
+def test_invalid_key_characters_normalized():
+    out, _ = _export(['@article{my key, title = {X}, year = {2020}}'])
+    assert out.startswith('@article{my_key,\n')
+
+
+def test_nested_braces_preserved():
+    title = '{The {A{B{C}D}} of {\\LaTeX{}}}'
+    deep = '{a{b{c{d{e}}}}}'
+    entries = list(parse(f'@article{{k, title = {title}, note = {deep}, year = 2020}}'))
+    assert entries[0].fields == [('title', title), ('note', deep), ('year', '2020')]
+    out = format_entry(entries[0])
+    assert f'title        = {title},\n' in out
+    assert f'note         = {deep},\n' in out
+
+
+def test_string_and_comment_blocks_kept_verbatim():
+    text = ('@string{nips = "NeurIPS"}\n'
+            '@comment{hello {world}}\n'
+            '@inproceedings{x, booktitle = nips # " 2020", title = {T}, year = {2020}}')
+    out, export = _export([text])
+    assert out.startswith('@string{nips = "NeurIPS"}\n@comment{hello {world}}\n@inproceedings{x,\n')
+    assert 'booktitle    = nips # { 2020},\n' in out
+    assert export.invalid == 0
+
+
+def test_entry_without_fields():
+    for text in ('@misc{empty,}', '@misc{empty}'):
+        (entry,) = parse(text)
+        assert entry.fields == []
+        assert format_entry(entry) == '@misc{empty,\n}\n'
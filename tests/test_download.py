@@ -0,0 +1,38 @@
+import asyncio
+
+import app
+
+
+def _bib(key):
+    return f'@inproceedings{{DBLP:{key},\n  title = {{Paper {key}}},\n  year = {{2020}}\n}}\n'
+
+
+def test_download_streams_in_order_with_bounded_window(monkeypatch):
+    delays = {'a/1': 0.15, 'a/2': 0.0, 'a/3': 0.05, 'a/4': 0.0, 'a/5': 0.0}
+    inflight, peak, started = 0, 0, []
+
+    async def fetch(key, style='standard'):
+        nonlocal inflight, peak
+        started.append(key)
+        inflight += 1
+        peak = max(peak, inflight)
+        await asyncio.sleep(delays[key])
+        inflight -= 1
+        return None if key == 'a/4' else _bib(key)
+
+    monkeypatch.setattr(app, 'fetch_bibtex_by_key', fetch)
+    monkeypatch.setattr(app, 'DBLP_DOWNLOAD_CONCURRENCY', 2)
+    entries = [{'key': 'a/0', 'bibtex': _bib('a/0')}] + [{'key': k} for k in delays]
+
+    async def run():
+        written, missing = [], []
+        batches = [[e['key'] for e in batch] async for batch in app._with_bibtex(entries, 'standard', written, missing)]
+        return batches, written, missing
+
+    batches, written, missing = asyncio.run(run())
+    assert peak == 2
+    assert [k for batch in batches for k in batch] == ['a/0', 'a/1', 'a/2', 'a/3', 'a/5']
+    # 已有 BibTeX 的条目不等待前面的获取，立即作为第一批写出
+    assert batches[0] == ['a/0']
+    assert [e['key'] for e in written] == ['a/0', 'a/1', 'a/2', 'a/3', 'a/5']
+    assert missing == ['a/4']
@@ -0,0 +1,71 @@
+import pytest
+
+from fuzzy import FuzzyIndex, main_title, normalize_query, normalize_title, similarity
+
+DISTINCT = [
+    ('C++ templates', 'C templates'),
+    ('C# generics', 'C generics'),
+    ('.NET', 'NET'),
+    ('F# type providers', 'F type providers'),
+]
+
+
+@pytest.mark.parametrize('a, b', DISTINCT)
+def test_significant_symbols_keep_queries_apart(a, b):
+    assert normalize_query(a) != normalize_query(b)
+    assert normalize_title(a) != normalize_title(b)
+
+
+@pytest.mark.parametrize('a, b', [
+    ('Attention is All you Need.', 'attention is all you need'),
+    ('C++  Templates', 'c++ templates'),
+    ('Über die {\\"u}ber', 'uber die uber'),
+    ('node.js', 'node js'),
+])
+def test_equivalent_queries_share_key(a, b):
+    assert normalize_query(a) == normalize_query(b)
+
+
+def test_query_keeps_non_latin_and_operators():
+    assert normalize_query('α-Synuclein $exact|other') == 'α synuclein $exact|other'
+    assert normalize_title('α-Synuclein') == 'synuclein'
+
+
+def _index(*titles):
+    index = FuzzyIndex()
+    for i, title in enumerate(titles):
+        index.add({'key': f'journals/x/{i}', 'title': title})
+    return index
+
+
+def test_symbol_words_are_not_a_confident_match():
+    index = _index('Modern C Design Patterns for Large Scale Embedded Systems.')
+    assert index.match('Modern C++ design patterns for large scale embedded systems', 0.9) == []
+    assert index.match('Modern C design patterns for large scale embedded systems', 0.9)
+
+
+def test_typos_and_case_still_match():
+    index = _index('Attention is All you Need.')
+    (score, info), = index.match('attention is all you ned', 0.9)
+    assert score >= 0.9 and info['key'] == 'journals/x/0'
+
+
+def test_prefix_is_not_confident_but_main_title_is():
+    title = 'Graph Neural Networks for Social Recommendation: A Survey.'
+    assert main_title(title) == 'graph neural networks for social recommendation'
+    index = _index(title)
+    assert index.match('graph neural networks', 0.9) == []
+    (score, _), = index.match('Graph Neural Networks for Social Recommendation', 0.9)
+    assert score == pytest.approx(0.95)
+
+
+def test_similarity_bounds():
+    assert similarity('', 'x') == 0.0
+    assert similarity('same title here', 'same title here') == 1.0
+
+
+def test_unspecific_query_skips_scan():
+    index = _index(*(f'deep learning model {i}' for i in range(50)))
+    index.MAX_SCAN = 10
+    assert index.lookup('deep learning model') == []
+    assert index.stats()['skipped'] == 1
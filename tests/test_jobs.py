@@ -0,0 +1,100 @@
+import asyncio
+import sqlite3
+import time
+
+from jobs import JobManager
+
+
+async def _echo(keyword, max_results):
+    await asyncio.sleep(0.05)
+    return [{'keyword': keyword}]
+
+
+def _wait_done(manager, job_id, timeout=5.0):
+    async def run():
+        manager.start()
+        deadline = time.monotonic() + timeout
+        while manager.status(job_id)['status'] != 'done' and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        await manager.stop()
+    asyncio.run(run())
+    return manager.status(job_id)
+
+
+def _set_lease(manager, job_id, owner, lease_until):
+    manager._execute(
+        "UPDATE items SET status = 'running', owner = ?, lease_until = ? WHERE job_id = ?",
+        (owner, lease_until, job_id),
+    )
+
+
+def test_shared_db_processes_each_item_once(tmp_path):
+    seen = []
+
+    async def work(keyword, max_results):
+        seen.append(keyword)
+        await asyncio.sleep(0.1)
+        return [{'keyword': keyword}]
+
+    path = str(tmp_path / 'jobs.sqlite3')
+    a, b = JobManager(path, work, 2), JobManager(path, work, 2)
+
+    async def run():
+        a.start()
+        job_id = await asyncio.to_thread(a.submit, [f'k{i}' for i in range(6)], 5)
+        await asyncio.sleep(0.05)
+        # 第二个进程启动时不能把第一个进程处理中的条目重新排队
+        b.start()
+        while a.status(job_id)['status'] != 'done':
+            await asyncio.sleep(0.05)
+        await a.stop()
+        await b.stop()
+        return job_id
+
+    try:
+        job_id = asyncio.run(run())
+        assert sorted(seen) == [f'k{i}' for i in range(6)]
+        assert [item['keyword'] for item in a.results(job_id)] == [f'k{i}' for i in range(6)]
+    finally:
+        a.close()
+        b.close()
+
+
+def test_stale_lease_is_reclaimed(tmp_path):
+    manager = JobManager(str(tmp_path / 'jobs.sqlite3'), _echo, 1)
+    try:
+        job_id = manager.submit(['x'], 5)
+        _set_lease(manager, job_id, 'crashed', time.time() - 1)
+        assert _wait_done(manager, job_id)['items'] == {'done': 1}
+    finally:
+        manager.close()
+
+
+def test_live_lease_is_left_alone(tmp_path):
+    manager = JobManager(str(tmp_path / 'jobs.sqlite3'), _echo, 1)
+    try:
+        job_id = manager.submit(['x'], 5)
+        _set_lease(manager, job_id, 'other', time.time() + 60)
+        assert _wait_done(manager, job_id, timeout=0.3)['items'] == {'running': 1}
+    finally:
+        manager.close()
+
+
+def test_legacy_db_without_lease_columns(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, max_results INTEGER NOT NULL,'
+                 ' total INTEGER NOT NULL, created REAL NOT NULL, updated REAL NOT NULL)')
+    conn.execute('CREATE TABLE items (job_id TEXT NOT NULL, idx INTEGER NOT NULL, keyword TEXT NOT NULL,'
+                 ' status TEXT NOT NULL, results TEXT, error TEXT, updated REAL NOT NULL,'
+                 ' PRIMARY KEY (job_id, idx))')
+    conn.execute("INSERT INTO jobs VALUES ('old', 'running', 5, 1, 0, 0)")
+    conn.execute("INSERT INTO items VALUES ('old', 0, 'x', 'running', NULL, NULL, 0)")
+    conn.commit()
+    conn.close()
+    manager = JobManager(path, _echo, 1)
+    try:
+        # 旧版本中断时留下的处理中条目没有租约，视为已过期
+        assert _wait_done(manager, 'old')['items'] == {'done': 1}
+    finally:
+        manager.close()
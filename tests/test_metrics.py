@@ -0,0 +1,22 @@
+from metrics import Callback, Registry, per_scrape
+
+
+def test_per_scrape_shares_one_call_per_render():
+    registry = Registry()
+    calls = []
+
+    def stats():
+        calls.append(1)
+        return {'a': {'hits': 3, 'misses': 1}}
+
+    snapshot = per_scrape(stats, registry)
+    for field in ('hits', 'misses'):
+        Callback(f'test_{field}_total', field, 'counter',
+                 lambda field=field: {(ns,): info[field] for ns, info in snapshot().items()},
+                 ['namespace'], registry=registry)
+    text = registry.render()
+    assert 'test_hits_total{namespace="a"} 3' in text
+    assert 'test_misses_total{namespace="a"} 1' in text
+    assert len(calls) == 1
+    registry.render()
+    assert len(calls) == 2
@@ -0,0 +1,62 @@
+import asyncio
+
+import httpx
+
+import engine
+from mirrors import MirrorPool
+
+M1, M2 = 'https://m1.test', 'https://m2.test'
+
+
+def test_throttle_cools_down_only_that_mirror():
+    pool = MirrorPool([M1, M2], cooldown=30)
+    first, second = pool.mirrors
+    pool.throttle(first, retry_after=5)
+    assert [m.base_url for m in pool.ranked()] == [M2, M1]
+    assert 4 < pool.stats()[1]['cooldown_s'] <= 5
+    assert second.down_until == 0.0
+
+
+def test_throttle_backoff_doubles_without_retry_after():
+    pool = MirrorPool([M1, M2], cooldown=10, max_cooldown=15)
+    mirror = pool.mirrors[0]
+    pool.throttle(mirror)
+    # 冷却中陆续返回的 429 不延长冷却
+    until = mirror.down_until
+    pool.throttle(mirror)
+    assert mirror.down_until == until and mirror.failures == 1
+    mirror.down_until = 0.0
+    pool.throttle(mirror)
+    assert mirror.failures == 2
+    assert 14 < pool.stats()[-1]['cooldown_s'] <= 15
+
+
+def test_mirror_get_fails_over_on_429(monkeypatch):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(str(request.url))
+        if request.url.host == 'm1.test':
+            return httpx.Response(429, headers={'Retry-After': '20'})
+        return httpx.Response(200, text='@misc{ok,}')
+
+    pool = MirrorPool([M1, M2])
+    monkeypatch.setattr(engine, 'mirror_pool', pool)
+
+    async def run():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(engine, '_client', client)
+        try:
+            return await engine._mirror_get(M1 + '/rec/x.bib', 5, 'bib', None, None)
+        finally:
+            await client.aclose()
+
+    rate = engine.rate_limiter.rate
+    r = asyncio.run(run())
+    assert r.status_code == 200
+    assert requests == [M1 + '/rec/x.bib', M2 + '/rec/x.bib']
+    # 只有被限流的镜像退避，全局速率不变
+    assert engine.rate_limiter.rate == rate
+    assert pool.failovers == 1
+    assert [m.base_url for m in pool.ranked()] == [M2, M1]
+    assert 19 < pool.stats()[1]['cooldown_s'] <= 20
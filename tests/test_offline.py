@@ -0,0 +1,86 @@
+import asyncio
+import os
+
+import pytest
+
+from conftest import ROOT
+from offline import OfflineIndex
+from results import iter_bibtex
+
+SAMPLE = os.path.join(ROOT, 'fixtures', 'dblp_sample.xml')
+PAPER = 'conf/nips/VaswaniSPUJGKP17'
+PARENT = 'conf/nips/2017'
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = OfflineIndex(str(tmp_path / 'offline.sqlite3'))
+    index.refresh(SAMPLE)
+    yield index
+    index.close()
+
+
+def test_build_from_sample(tmp_path):
+    index = OfflineIndex(str(tmp_path / 'offline.sqlite3'))
+    try:
+        assert not index.ready()
+        stats = index.refresh(SAMPLE)
+        assert stats['updated'] and stats['inserted'] == stats['records'] == index.count() == 6
+        assert index.ready()
+        # 转储未变化时不重新扫描；强制刷新时记录均未变化
+        assert index.refresh(SAMPLE) == {'updated': False}
+        stats = index.refresh(SAMPLE, force=True)
+        assert (stats['inserted'], stats['changed'], stats['removed']) == (0, 0, 0)
+    finally:
+        index.close()
+
+
+def test_search(index):
+    hits = index.search('attention is all you need', 5)
+    keys = [h['info']['key'] for h in hits]
+    assert PAPER in keys and 'journals/corr/VaswaniSPUJGKP17' in keys
+    info = hits[keys.index(PAPER)]['info']
+    assert info['year'] == '2017'
+    assert info['type'] == 'Conference and Workshop Papers'
+    assert info['authors']['author'][0]['text'] == 'Ashish Vaswani'
+    # 全部词命中不到时退化为任意词匹配
+    assert PAPER in [h['info']['key'] for h in index.search('attention xyzzy', 5)]
+    assert index.search('!!!') == []
+
+
+def test_bibtex_standard_inlines_parent(index):
+    text = index.bibtex(PAPER)
+    assert text.startswith('@inproceedings{DBLP:' + PAPER + ',\n')
+    assert 'Isabelle Guyon' in text
+    assert 'booktitle    = {Advances in Neural Information Processing Systems 30' in text
+    assert 'crossref' not in text
+    assert 'pages        = {5998--6008}' in text
+    assert index.bibtex('conf/nips/missing') is None
+
+
+def test_bibtex_crossref_appends_parent(index):
+    text = index.bibtex(PAPER, 'crossref')
+    child, parent = text.split('\n\n@')
+    assert 'crossref     = {DBLP:' + PARENT + '}' in child
+    assert 'Isabelle Guyon' not in child
+    assert parent.startswith('proceedings{DBLP:' + PARENT + ',')
+    assert 'Isabelle Guyon' in parent
+
+
+def test_export_with_crossref_parent(index):
+    text = index.bibtex(PAPER, 'crossref')
+    child = text.split('\n\n@')[0] + '\n'
+    entries = [{'key': PAPER, 'bibtex': child}]
+
+    async def export():
+        async def source():
+            yield entries
+
+        async def tail():
+            return [index.bibtex(PARENT)]
+        return b''.join([chunk async for chunk in iter_bibtex(source(), tail)]).decode('utf-8')
+
+    out = asyncio.run(export())
+    # 被引用的会议录记录写在引用者之后，且只出现一次
+    assert out.index('DBLP:' + PAPER) < out.index('@proceedings{DBLP:' + PARENT)
+    assert out.count('@proceedings{') == 1
@@ -0,0 +1,67 @@
+import asyncio
+
+from resolver import BibResolver
+
+CANDIDATES = [('url', 'u'), ('view', 'v'), ('rec', 'r')]
+
+
+def _fetcher(delays, queued=0.0, results=None):
+    """按 URL 给出延迟的假请求：先在“限速器”中排队 ``queued`` 秒，再调用 sent() 并等待对应延迟。"""
+    calls = []
+
+    async def fetch(url, sent):
+        calls.append(url)
+        await asyncio.sleep(queued)
+        sent()
+        await asyncio.sleep(delays[url])
+        return (results or {}).get(url, f'@misc{{{url},}}')
+    return fetch, calls
+
+
+def test_order_prefers_lowest_expected_cost():
+    resolver = BibResolver(deadline=5, hedge_delay=1)
+    # 代价相同时保持默认顺序
+    assert resolver.order(CANDIDATES) == CANDIDATES
+    for _ in range(5):
+        resolver._record('url', False, 0.5)
+        resolver._record('rec', True, 0.1)
+    assert [name for name, _ in resolver.order(CANDIDATES)] == ['rec', 'view', 'url']
+
+
+def test_failed_variant_falls_through_to_next():
+    resolver = BibResolver(deadline=5, hedge_delay=1)
+    fetch, calls = _fetcher({'u': 0, 'v': 0, 'r': 0}, results={'u': None})
+    assert asyncio.run(resolver.resolve(CANDIDATES, fetch)) == '@misc{v,}'
+    assert calls == ['u', 'v']
+    assert resolver.stats()['patterns']['url']['success_rate'] < 0.5
+
+
+def test_slow_variant_is_hedged():
+    resolver = BibResolver(deadline=5, hedge_delay=0.05, min_hedge_delay=0.05)
+    fetch, calls = _fetcher({'u': 1.0, 'v': 0.0, 'r': 0.0})
+    assert asyncio.run(resolver.resolve(CANDIDATES, fetch)) == '@misc{v,}'
+    assert calls == ['u', 'v'] and resolver.hedged == 1
+    # 被抢先取消的慢请求：其已耗时计入延迟，下次排在后面
+    assert resolver.order(CANDIDATES)[0][0] == 'view'
+
+
+def test_no_hedge_when_disallowed():
+    resolver = BibResolver(deadline=5, hedge_delay=0.05, min_hedge_delay=0.05, can_hedge=lambda: False)
+    fetch, calls = _fetcher({'u': 0.2, 'v': 0.0, 'r': 0.0})
+    assert asyncio.run(resolver.resolve(CANDIDATES, fetch)) == '@misc{u,}'
+    assert calls == ['u'] and resolver.hedged == 0
+
+
+def test_deadline_starts_when_request_is_sent():
+    # 排队时间超过截止时间，但发出后很快返回：不算超时
+    resolver = BibResolver(deadline=0.1, hedge_delay=1)
+    fetch, _ = _fetcher({'u': 0.02, 'v': 0.02, 'r': 0.02}, queued=0.2)
+    assert asyncio.run(resolver.resolve(CANDIDATES, fetch)) == '@misc{u,}'
+    assert resolver.deadline_exceeded == 0
+
+
+def test_deadline_exceeded_after_send():
+    resolver = BibResolver(deadline=0.1, hedge_delay=1)
+    fetch, _ = _fetcher({'u': 0.5, 'v': 0.5, 'r': 0.5})
+    assert asyncio.run(resolver.resolve(CANDIDATES, fetch)) is None
+    assert resolver.deadline_exceeded == 1